@@ -3,76 +3,108 @@ import matplotlib.pyplot as plt
 import os
 import multiprocessing as mp
 
-def run_single_sim(seed, L, T, dt, N, a, c, dx, noise_strength, tail_fraction=0.1):
+SLOPE_RANGE = (-2.5, 2.5)
+SLOPE_BINS = 100
+
+
+def run_batch(seed, R, L, T, dt, N, a, c, dx, noise_strength, tail_fraction=0.1):
     """
-    Integrates the PDE for a single realization:
+    Integrates the PDE for R realizations at once, as the rows of an (R, L) array:
     dh/dt = (a^2 p^2 / 2) \\nabla^2 h - (c/N) (\\nabla h)^2 - a p^2 |\\nabla h| + \\eta(x, t)
     where p = 1/N
+
+    The neighbour, derivative and noise arrays are buffers allocated once, so a
+    step is a fixed sequence of in-place ufunc calls; roughness is written straight into its
+    row and the tail slopes go into a histogram (SLOPE_RANGE, SLOPE_BINS)
+    instead of being kept.
     """
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     p = 1.0 / N
-    
-    # Coefficients
-    c_diff = (a**2 * p**2) / 2.0
+
+    # Coefficients, with the grid and time factors folded in
+    c_diff = (a**2 * p**2) / 2.0 / dx**2
     c_nonlin2 = c / N
     c_nonlin1 = a * p**2
-    
-    # Initialize h
-    h = np.zeros(L)
-    
-    # Track roughness over time
+    inv_2dx = 1.0 / (2.0 * dx)
+    noise_scale = noise_strength * np.sqrt(dt)
+
+    # Initialize h and the work buffers
+    h = np.zeros((R, L))
+    h_left, h_right, grad_h, dhdt, tmp, noise = (np.empty_like(h) for _ in range(6))
+
+    # Track roughness over time, one column per realization
     steps = int(T / dt)
-    roughness = np.zeros(steps)
-    
+    roughness = np.empty((steps, R))
+
     tail_steps = max(1, int(steps * tail_fraction))
-    slopes_tail = []
-    
+    counts = np.zeros(SLOPE_BINS + 2, dtype=np.int64)  # plus under/overflow
+    bin_scale = SLOPE_BINS / (SLOPE_RANGE[1] - SLOPE_RANGE[0])
+    bin_idx = np.empty((R, L))
+
     for i in range(steps):
-        # Calculate spatial derivatives with periodic boundary conditions
-        h_left = np.roll(h, 1)
-        h_right = np.roll(h, -1)
-        
+        # Neighbours with periodic boundary conditions
+        h_left[:, 1:] = h[:, :-1]
+        h_left[:, 0] = h[:, -1]
+        h_right[:, :-1] = h[:, 1:]
+        h_right[:, -1] = h[:, 0]
+
         # Central difference for first derivative
-        grad_h = (h_right - h_left) / (2.0 * dx)
-        
-        # Central difference for second derivative
-        laplace_h = (h_right - 2.0 * h + h_left) / (dx**2)
-        
-        # Deterministic part of dh/dt
-        dhdt = (c_diff * laplace_h - 
-                c_nonlin2 * grad_h**2 - 
-                c_nonlin1 * np.abs(grad_h))
-        
-        # Noise term \eta(x,t) scaled by sqrt(dt) for Euler-Maruyama
-        noise = noise_strength * np.random.normal(0, 1, L)
-        
-        # Update h
-        h = h + dhdt * dt + noise * np.sqrt(dt)
-        
+        np.subtract(h_right, h_left, out=grad_h)
+        grad_h *= inv_2dx
+
+        # Deterministic part of dh/dt, second derivative by central difference
+        np.add(h_right, h_left, out=dhdt)
+        np.multiply(h, 2.0, out=tmp)
+        dhdt -= tmp
+        dhdt *= c_diff
+        np.multiply(grad_h, grad_h, out=tmp)
+        tmp *= c_nonlin2
+        dhdt -= tmp
+        np.abs(grad_h, out=tmp)
+        tmp *= c_nonlin1
+        dhdt -= tmp
+
+        # Euler-Maruyama update, noise \eta(x,t) scaled by sqrt(dt)
+        dhdt *= dt
+        rng.standard_normal(out=noise)
+        noise *= noise_scale
+        h += dhdt
+        h += noise
+
         # Calculate roughness: standard deviation of height
-        roughness[i] = np.std(h)
-        
+        np.std(h, axis=1, out=roughness[i])
+
         if i >= steps - tail_steps:
-            slopes_tail.append(grad_h)
-            
+            np.subtract(grad_h, SLOPE_RANGE[0], out=bin_idx)
+            bin_idx *= bin_scale
+            np.floor(bin_idx, out=bin_idx)
+            np.clip(bin_idx, -1, SLOPE_BINS, out=bin_idx)
+            counts += np.bincount(bin_idx.astype(np.intp).ravel() + 1, minlength=SLOPE_BINS + 2)
+
     # Final state metrics
-    final_h = h - np.mean(h) # Center for better visualization
-    
-    return roughness, final_h, np.concatenate(slopes_tail)
+    final_h = h - h.mean(axis=1, keepdims=True)  # Center for better visualization
+
+    return roughness, final_h, counts[1:-1]
 
 
 def run_ensemble(num_runs, L, T, dt, N, a, c, dx, noise_strength):
-    seeds = np.random.randint(0, 1000000, num_runs)
-    args_list = [(seeds[i], L, T, dt, N, a, c, dx, noise_strength) for i in range(num_runs)]
-    
-    with mp.Pool() as pool:
-        results = pool.starmap(run_single_sim, args_list)
-        
-    avg_roughness = np.mean([r[0] for r in results], axis=0)
-    rep_profile = results[0][1] # Take the first run as representative
-    all_slopes = np.concatenate([r[2] for r in results])
-    
-    return avg_roughness, rep_profile, all_slopes
+    """
+    Splits the runs into one batch per worker; the averages do not depend on
+    how they are split, only on the (random) ensemble seeds.
+    """
+    workers = min(num_runs, mp.cpu_count())
+    sizes = [len(b) for b in np.array_split(np.arange(num_runs), workers)]
+    seeds = np.random.randint(0, 1000000, workers)
+    args_list = [(seeds[i], sizes[i], L, T, dt, N, a, c, dx, noise_strength) for i in range(workers)]
+
+    with mp.Pool(workers) as pool:
+        results = pool.starmap(run_batch, args_list)
+
+    avg_roughness = np.concatenate([r[0] for r in results], axis=1).mean(axis=1)
+    rep_profile = results[0][1][0]  # Take the first run as representative
+    slope_counts = np.sum([r[2] for r in results], axis=0)
+
+    return avg_roughness, rep_profile, slope_counts
 
 
 def main():
@@ -141,8 +173,9 @@ def main():
     
     # 3. Distribution of local slopes
     plt.figure()
+    edges = np.linspace(*SLOPE_RANGE, SLOPE_BINS + 1)
     for N in Ns:
-        plt.hist(results[N][2], bins=100, density=True, alpha=0.7, histtype='step', linewidth=2, label=f'N={N}')
+        plt.stairs(results[N][2] / (results[N][2].sum() * np.diff(edges)), edges, alpha=0.7, linewidth=2, label=f'N={N}')
     plt.yscale('log')
     plt.xlabel('Local Slope (grad h)')
     plt.ylabel('Density')
@@ -0,0 +1,524 @@
+#pragma once
+// Shared engine and sweep driver for the continuum puyo PDEs (abs_term/, exp_abs/).
+//
+// Both avalanchePDE.cpp used to hard-code L, T, dt, a, c, lambda, dx and
+// num_runs as constexpr, so every plots/ directory (lam0, lam1, lam10, ...)
+// meant editing and recompiling.  Here the parameters are runtime flags and
+// a, c, lam (lamexp) and N take comma-separated lists: the whole grid runs in
+// one process, every (grid point, N, run) a task on one thread pool, and each
+// (grid point, N) is written as soon as its last run finishes, into the same
+// directory and files the old binary wrote for that point (plus params.txt).
+//
+//     avalanchePDE --lam 0,1,10,100 --c 1 --a 1 --N 1,2,4,8 --T 8000 --threads 32
+//
+// A task integrates up to --batch runs (default 4) of one ensemble together:
+// they share the implicit operator, factorized once (CyclicTridiagonal).
+//
+// The equation-specific part is the explicit (nonlinear) term, a Term class
+// built from the Params of one (grid point, N):
+//
+//     struct Term {
+//         static constexpr bool usesLamExp;                  // accepts --lamexp
+//         static std::string name(const Params &);           // point directory
+//         explicit Term(const Params &);
+//         double operator()(double dp_fwd, double dp_bwd, double grad_central) const;
+//     };
+//
+// Run r of N uses the seed 42000 + 100 r + N as before, so a point run through
+// the sweep gives the same ensemble as the old binary compiled for it.
+#include <algorithm>
+#include <atomic>
+#include <cmath>
+#include <cstdint>
+#include <filesystem>
+#include <fstream>
+#include <iomanip>
+#include <iostream>
+#include <memory>
+#include <mutex>
+#include <random>
+#include <sstream>
+#include <string>
+#include <thread>
+#include <vector>
+
+struct Params
+{
+    double L = 128;
+    double T = 8000.0;
+    double dt = 0.01;
+    double a = 1;
+    double c = 1.0;
+    double lam = 10;     // lambda_abs
+    double lamexp = 100; // lambda_exp (exp_abs only)
+    double dx = 0.1;
+    double noise = 0.1;
+    int runs = 12;
+    int N = 1;
+};
+
+constexpr int record_steps = 10000;
+constexpr double hist_min = -2.5;
+constexpr double hist_max = 2.5;
+constexpr int hist_bins = 400;
+
+// The implicit diffusion operator: tridiagonal (a, b, c) with cyclic corners.
+// It is constant for a run, so the Thomas elimination and the Sherman-Morrison
+// correction vector q are computed once here; solve() is then a forward and a
+// back substitution plus the rank-one correction, with no allocation.  It
+// solves R systems at once, stored interleaved (element i of system r at
+// i*R + r): the recursions run along i, so the R independent chains fill the
+// pipeline / SIMD lanes.  Same arithmetic, in the same order, as the old
+// per-call solve_cyclic_tridiagonal.
+struct CyclicTridiagonal
+{
+    int n;
+    double a, bb, a_over_gamma, den;
+    std::vector<double> cp, m, q;
+
+    CyclicTridiagonal(int n, double a, double b, double c) : n(n), a(a), cp(n, 0.0), m(n, 0.0), q(n, 0.0)
+    {
+        double gamma = -b;
+        bb = b - gamma;
+        a_over_gamma = a / gamma;
+
+        // Modified system 1: standard tridiagonal with b' = b - gamma at 0, b' = b - a*c/gamma at n-1
+        std::vector<double> dp2(n, 0.0);
+        cp[0] = c / bb;
+        dp2[0] = gamma / bb;
+        for (int i = 1; i < n - 1; i++)
+        {
+            m[i] = 1.0 / (b - a * cp[i - 1]);
+            cp[i] = c * m[i];
+            dp2[i] = (0.0 - a * dp2[i - 1]) * m[i];
+        }
+        double b_last = b - a * c / gamma;
+        m[n - 1] = 1.0 / (b_last - a * cp[n - 2]);
+        dp2[n - 1] = (c - a * dp2[n - 2]) * m[n - 1];
+
+        q[n - 1] = dp2[n - 1];
+        for (int i = n - 2; i >= 0; i--)
+            q[i] = dp2[i] - cp[i] * q[i + 1];
+        den = 1.0 + q[0] + a_over_gamma * q[n - 1];
+    }
+
+    // out = A^-1 rhs for R interleaved systems (out may alias rhs); FixedR > 0
+    // fixes R at compile time.
+    template <int FixedR = 0>
+    void solve(const double *rhs, double *out, int R_) const
+    {
+        const int R = FixedR > 0 ? FixedR : R_;
+        for (int r = 0; r < R; ++r)
+            out[r] = rhs[r] / bb;
+        for (int i = 1; i < n; i++)
+        {
+            const double mi = m[i];
+            const double *d = out + (size_t)(i - 1) * R;
+            const double *f = rhs + (size_t)i * R;
+            double *o = out + (size_t)i * R;
+            for (int r = 0; r < R; ++r)
+                o[r] = (f[r] - a * d[r]) * mi;
+        }
+        for (int i = n - 2; i >= 0; i--)
+        {
+            const double ci = cp[i];
+            const double *y = out + (size_t)(i + 1) * R;
+            double *o = out + (size_t)i * R;
+            for (int r = 0; r < R; ++r)
+                o[r] = o[r] - ci * y[r];
+        }
+        double factor[64];
+        for (int r0 = 0; r0 < R; r0 += 64)
+        {
+            int B = std::min(64, R - r0);
+            for (int r = 0; r < B; ++r)
+                factor[r] = (out[r0 + r] + a_over_gamma * out[(size_t)(n - 1) * R + r0 + r]) / den;
+            for (int i = 0; i < n; i++)
+            {
+                double *o = out + (size_t)i * R + r0;
+                for (int r = 0; r < B; ++r)
+                    o[r] = o[r] - q[i] * factor[r];
+            }
+        }
+    }
+};
+
+// R runs of one (grid point, N) in lockstep, run r seeded with seeds[r] and
+// writing out_*[r]: every field is interleaved (x*R + r), so the explicit
+// term, the noise update and above all the implicit solve go over all R at
+// once.  Each run follows exactly the trajectory it has when run alone.
+// FixedR > 0 fixes R at compile time (see run_batch below).
+template <class Term, int FixedR>
+void run_batch_fixed(const Params &P, int R_, const int *seeds, std::vector<double> *out_roughness, std::vector<double> *out_profile, std::vector<uint64_t> *out_slope_hist)
+{
+    const int R = FixedR > 0 ? FixedR : R_;
+    // Fast linear congruential generator (much faster than mt19937 for massive loops)
+    std::vector<std::minstd_rand> gen;
+    for (int r = 0; r < R; ++r)
+        gen.emplace_back(seeds[r]);
+    std::vector<std::normal_distribution<double>> dist(R, std::normal_distribution<double>(0.0, 1.0));
+
+    const double dt = P.dt, dx = P.dx;
+    long long steps = std::round(P.T / dt);
+
+    double p = 1.0 / P.N;
+    double c_diff = (P.a * P.a * p * p) / 2.0;
+    const Term term(P);
+
+    // Spatiotemporal white noise must scale with 1/sqrt(dx)
+    double sqrt_dt_dx = std::sqrt(dt / dx);
+
+    // Number of array elements is Macroscopic Size / grid scaling
+    int array_size = std::round(P.L / dx);
+    size_t NR = (size_t)array_size * R;
+
+    std::vector<double> h(NR, 0.0);
+    std::vector<double> new_h(NR, 0.0);
+    std::vector<double> k1(NR, 0.0);
+    std::vector<double> k2(NR, 0.0);
+    std::vector<double> h_tmp(NR, 0.0);
+    std::vector<double> h_star(NR, 0.0);
+
+    long long tail_steps = std::max(1LL, (long long)(steps * 0.1));
+    double hist_bin_width = (hist_max - hist_min) / hist_bins;
+
+    // We still want 'record_steps' total data points over the macroscopic time T
+    long long record_interval = std::max(1LL, steps / record_steps);
+    int record_idx = 0;
+
+    // Precalculate division constants for massive speedup in the hot loop
+    double inv_dx = 1.0 / dx;
+    double inv_2dx = 1.0 / (2.0 * dx);
+
+    auto calc_explicit = [&](const std::vector<double> &current_h, std::vector<double> &out_explicit)
+    {
+        for (int x = 0; x < array_size; ++x)
+        {
+            int left = (x == 0) ? array_size - 1 : x - 1;
+            int right = (x == array_size - 1) ? 0 : x + 1;
+            const double *hc = &current_h[(size_t)x * R], *hl = &current_h[(size_t)left * R], *hr = &current_h[(size_t)right * R];
+            double *o = &out_explicit[(size_t)x * R];
+
+            for (int r = 0; r < R; ++r)
+            {
+                double dp_fwd = (hr[r] - hc[r]) * inv_dx;
+                double dp_bwd = (hc[r] - hl[r]) * inv_dx;
+                double grad_h_central = (hr[r] - hl[r]) * inv_2dx;
+
+                o[r] = term(dp_fwd, dp_bwd, grad_h_central);
+            }
+        }
+    };
+
+    // Thomas algorithm + Sherman-Morrison for the cyclic boundaries, factorized once
+    double rr = c_diff * dt * inv_dx * inv_dx;
+    const CyclicTridiagonal implicit(array_size, -rr, 1.0 + 2.0 * rr, -rr);
+
+    std::vector<char> alive(R, 1);
+    int n_alive = R;
+
+    // Crank-Nicolson-like IMEX RK-SSP2 for stability of non-linear terms
+    for (long long i = 0; i < steps; ++i)
+    {
+        // Stage 1: Explicit Euler predictor + Implicit solve
+        calc_explicit(h, k1);
+        for (size_t j = 0; j < NR; ++j)
+            h_tmp[j] = h[j] + k1[j] * dt;
+        implicit.solve<FixedR>(h_tmp.data(), h_star.data(), R);
+
+        // Stage 2: 2nd order corrector + Implicit solve
+        calc_explicit(h_star, k2);
+        for (size_t j = 0; j < NR; j += R)
+            for (int r = 0; r < R; ++r)
+            {
+                double noise = P.noise * dist[r](gen[r]) * sqrt_dt_dx;
+                // The un-inverted equation: 0.5 * h_old + 0.5 * (h_star + dt * k2) + noise
+                h_tmp[j + r] = 0.5 * h[j + r] + 0.5 * h_star[j + r] + 0.5 * k2[j + r] * dt + noise;
+            }
+
+        // The implicit operator here needs to apply to the 0.5 * h_star component exactly like the system requires
+        // Since the operator is linear, we can just solve the standard step using half off-diagonals,
+        // but for an SSP2 IMEX, applying the same implicit operator solve on the averaged explicit part is standard:
+        implicit.solve<FixedR>(h_tmp.data(), new_h.data(), R);
+
+        for (int r = 0; r < R; ++r)
+        {
+            if (!alive[r])
+                continue;
+
+            // Histogram local slopes at the tail
+            if (i >= steps - tail_steps)
+            {
+                for (int x = 0; x < array_size; ++x)
+                {
+                    int left = (x == 0) ? array_size - 1 : x - 1;
+                    int right = (x == array_size - 1) ? 0 : x + 1;
+
+                    // For observables, central difference is still mathematically unbiased
+                    double grad_h_central = (new_h[(size_t)right * R + r] - new_h[(size_t)left * R + r]) / (2.0 * dx);
+                    int bin = std::floor((grad_h_central - hist_min) / hist_bin_width);
+                    if (bin >= 0 && bin < hist_bins)
+                    {
+                        out_slope_hist[r][bin]++;
+                    }
+                }
+            }
+
+            // Subsample roughness only when needed
+            if (i % record_interval == 0 && record_idx < record_steps)
+            {
+                double mean_h = 0.0;
+                for (int x = 0; x < array_size; ++x)
+                    mean_h += h[(size_t)x * R + r];
+                mean_h /= array_size;
+
+                double sq_diff = 0.0;
+                for (int x = 0; x < array_size; ++x)
+                {
+                    double diff = h[(size_t)x * R + r] - mean_h;
+                    sq_diff += diff * diff;
+                }
+
+                out_roughness[r][record_idx] = std::sqrt(sq_diff / array_size);
+            }
+        }
+        if (i % record_interval == 0 && record_idx < record_steps)
+            record_idx++;
+
+        std::swap(h, new_h);
+
+        // A run that blew up stops recording (the rest of the batch carries on)
+        for (int r = 0; r < R; ++r)
+            if (alive[r] && std::isnan(h[r]))
+            {
+                alive[r] = 0;
+                --n_alive;
+            }
+        if (n_alive == 0)
+            break;
+    }
+
+    for (int r = 0; r < R; ++r)
+    {
+        double final_mean = 0.0;
+        for (int x = 0; x < array_size; ++x)
+            final_mean += h[(size_t)x * R + r];
+        final_mean /= array_size;
+        for (int x = 0; x < array_size; ++x)
+            out_profile[r][x] = h[(size_t)x * R + r] - final_mean;
+    }
+}
+
+template <class Term>
+void run_batch(const Params &P, int R, const int *seeds, std::vector<double> *out_roughness, std::vector<double> *out_profile, std::vector<uint64_t> *out_slope_hist)
+{
+    // the inner loops over the batch only pay off when the compiler knows R
+    switch (R)
+    {
+    case 1: return run_batch_fixed<Term, 1>(P, R, seeds, out_roughness, out_profile, out_slope_hist);
+    case 2: return run_batch_fixed<Term, 2>(P, R, seeds, out_roughness, out_profile, out_slope_hist);
+    case 4: return run_batch_fixed<Term, 4>(P, R, seeds, out_roughness, out_profile, out_slope_hist);
+    case 8: return run_batch_fixed<Term, 8>(P, R, seeds, out_roughness, out_profile, out_slope_hist);
+    default: return run_batch_fixed<Term, 0>(P, R, seeds, out_roughness, out_profile, out_slope_hist);
+    }
+}
+
+// The runs of one (grid point, N), gathered until the last one finishes.
+struct Ensemble
+{
+    Params P;
+    std::string dir;
+    std::mutex m;
+    int finished = 0;
+    std::vector<std::vector<double>> roughness, profiles;
+    std::vector<std::vector<uint64_t>> slope_hists;
+};
+
+inline void write_ensemble(Ensemble &E)
+{
+    const Params &P = E.P;
+    int N = P.N, num_runs = P.runs;
+    int array_size = std::round(P.L / P.dx);
+
+    std::vector<double> avg_roughness(record_steps, 0.0);
+    for (int r = 0; r < num_runs; ++r)
+        for (int i = 0; i < record_steps; ++i)
+            avg_roughness[i] += E.roughness[r][i] / num_runs;
+
+    std::vector<uint64_t> combined_hist(hist_bins, 0);
+    for (int r = 0; r < num_runs; ++r)
+        for (int b = 0; b < hist_bins; ++b)
+            combined_hist[b] += E.slope_hists[r][b];
+
+    std::filesystem::path dir(E.dir);
+    std::filesystem::create_directories(dir);
+
+    // Save Roughness
+    std::ofstream f_rough(dir / ("roughness_N" + std::to_string(N) + ".tsv"));
+    f_rough << "time\troughness\n";
+    for (int i = 0; i < record_steps; ++i)
+    {
+        double time_val = i * (P.T / record_steps);
+        f_rough << std::fixed << std::setprecision(6) << time_val << "\t" << avg_roughness[i] << "\n";
+    }
+
+    // Save Profile (just take run 0 as rep)
+    std::ofstream f_prof(dir / ("profile_N" + std::to_string(N) + ".tsv"));
+    f_prof << "x\th\n";
+    for (int x = 0; x < array_size; ++x)
+        f_prof << std::fixed << std::setprecision(6) << x * P.dx << "\t" << E.profiles[0][x] << "\n";
+
+    // Save Slopes
+    std::ofstream f_slope(dir / ("slopes_N" + std::to_string(N) + ".tsv"));
+    f_slope << "slope_bin_center\tcount\n";
+    double bin_width = (hist_max - hist_min) / hist_bins;
+    for (int b = 0; b < hist_bins; ++b)
+    {
+        double center = hist_min + (b + 0.5) * bin_width;
+        f_slope << std::fixed << std::setprecision(6) << center << "\t" << combined_hist[b] << "\n";
+    }
+}
+
+inline void write_params(const Params &P, const std::string &dir, const std::vector<int> &Ns, bool withLamExp)
+{
+    std::filesystem::create_directories(dir);
+    std::ofstream f(std::filesystem::path(dir) / "params.txt");
+    f << "L\t" << P.L << "\nT\t" << P.T << "\ndt\t" << P.dt << "\ndx\t" << P.dx
+      << "\na\t" << P.a << "\nc\t" << P.c << "\nlam\t" << P.lam;
+    if (withLamExp)
+        f << "\nlamexp\t" << P.lamexp;
+    f << "\nnoise\t" << P.noise << "\nruns\t" << P.runs << "\nN";
+    for (int N : Ns)
+        f << "\t" << N;
+    f << "\n";
+}
+
+inline std::vector<double> parse_list(const std::string &s)
+{
+    std::vector<double> v;
+    std::stringstream ss(s);
+    for (std::string item; std::getline(ss, item, ',');)
+        v.push_back(std::stod(item));
+    return v;
+}
+
+// Parse the flags, build the grid and run it.  `P` holds the file's defaults.
+template <class Term>
+int sweep_main(int argc, char *argv[], Params P, std::vector<int> Ns)
+{
+    std::vector<double> as{P.a}, cs{P.c}, lams{P.lam}, lamexps{P.lamexp};
+    int threads = std::max(1u, std::thread::hardware_concurrency());
+    int batch = 4;
+    std::string out = "outputs/avalanchePDE_cpp";
+
+    for (int i = 1; i < argc; ++i)
+    {
+        std::string key = argv[i];
+        if (i + 1 >= argc || key.rfind("--", 0) != 0)
+        {
+            std::cerr << "usage: " << argv[0] << " [--L x] [--T x] [--dt x] [--dx x] [--noise x] [--runs n]"
+                      << " [--a list] [--c list] [--lam list]" << (Term::usesLamExp ? " [--lamexp list]" : "")
+                      << " [--N list] [--threads n] [--batch n] [--out dir]\n";
+            return 1;
+        }
+        std::string val = argv[++i];
+        key = key.substr(2);
+        if (key == "L") P.L = std::stod(val);
+        else if (key == "T") P.T = std::stod(val);
+        else if (key == "dt") P.dt = std::stod(val);
+        else if (key == "dx") P.dx = std::stod(val);
+        else if (key == "noise") P.noise = std::stod(val);
+        else if (key == "runs") P.runs = std::stoi(val);
+        else if (key == "threads") threads = std::stoi(val);
+        else if (key == "batch") batch = std::max(1, std::stoi(val));
+        else if (key == "out") out = val;
+        else if (key == "a") as = parse_list(val);
+        else if (key == "c") cs = parse_list(val);
+        else if (key == "lam") lams = parse_list(val);
+        else if (key == "lamexp" && Term::usesLamExp) lamexps = parse_list(val);
+        else if (key == "N")
+        {
+            Ns.clear();
+            for (double n : parse_list(val))
+                Ns.push_back((int)n);
+        }
+        else
+        {
+            std::cerr << "unknown option --" << key << "\n";
+            return 1;
+        }
+    }
+    if (!Term::usesLamExp)
+        lamexps.resize(1);
+
+    // one Ensemble per (grid point, N)
+    std::vector<std::unique_ptr<Ensemble>> ensembles;
+    for (double a : as)
+        for (double c : cs)
+            for (double lam : lams)
+                for (double lamexp : lamexps)
+                {
+                    Params Q = P;
+                    Q.a = a, Q.c = c, Q.lam = lam, Q.lamexp = lamexp;
+                    std::string dir = out + "/" + Term::name(Q);
+                    write_params(Q, dir, Ns, Term::usesLamExp);
+                    for (int N : Ns)
+                    {
+                        ensembles.push_back(std::make_unique<Ensemble>());
+                        ensembles.back()->P = Q;
+                        ensembles.back()->P.N = N;
+                        ensembles.back()->dir = dir;
+                    }
+                }
+
+    // tasks are batches of up to `batch` runs of one ensemble (run_batch)
+    int per = (P.runs + batch - 1) / batch;
+    long long tasks = (long long)ensembles.size() * per;
+    std::atomic<long long> next{0};
+    std::mutex io;
+    std::cout << ensembles.size() << " ensembles x " << P.runs << " runs on " << threads << " threads\n";
+
+    auto work = [&]
+    {
+        for (long long k; (k = next++) < tasks;)
+        {
+            Ensemble &E = *ensembles[k / per];
+            int r0 = (k % per) * batch, R = std::min(batch, P.runs - r0), N = E.P.N;
+            {
+                std::lock_guard<std::mutex> lock(E.m);
+                if (E.roughness.empty())
+                {
+                    E.roughness.assign(P.runs, std::vector<double>(record_steps, 0.0));
+                    E.profiles.assign(P.runs, std::vector<double>((size_t)std::round(P.L / P.dx), 0.0));
+                    E.slope_hists.assign(P.runs, std::vector<uint64_t>(hist_bins, 0));
+                }
+            }
+            std::vector<int> seeds;
+            for (int r = r0; r < r0 + R; ++r)
+                seeds.push_back(42000 + r * 100 + N);
+            run_batch<Term>(E.P, R, seeds.data(), &E.roughness[r0], &E.profiles[r0], &E.slope_hists[r0]);
+
+            bool last;
+            {
+                std::lock_guard<std::mutex> lock(E.m);
+                last = (E.finished += R) == P.runs;
+            }
+            if (last)
+            {
+                write_ensemble(E);
+                E.roughness.clear(), E.profiles.clear(), E.slope_hists.clear();
+                E.roughness.shrink_to_fit(), E.profiles.shrink_to_fit(), E.slope_hists.shrink_to_fit();
+                std::lock_guard<std::mutex> lock(io);
+                std::cout << "Done N=" << N << " in " << E.dir << std::endl;
+            }
+        }
+    };
+    std::vector<std::thread> pool;
+    for (int t = 0; t < threads; ++t)
+        pool.emplace_back(work);
+    for (auto &t : pool)
+        t.join();
+
+    std::cout << "All simulations complete. Outputs in " << out << std::endl;
+    return 0;
+}
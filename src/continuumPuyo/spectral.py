@@ -0,0 +1,346 @@
+"""Exponential-time-differencing integrator for the continuum puyo PDEs.
+
+The finite-difference engine (avalanchePDE.h) takes a fixed dt = 0.01 with a
+semi-implicit step, and avalanche_test.py an explicit Euler step, so long T or
+large L cost O(T/dt x L) with a small dt.  This integrates the SAME
+semi-discrete system (same grid, same stencils) differently:
+
+  * the diffusion term is diagonal in Fourier space -- its symbol is the
+    discrete Laplacian's, -D (4/dx^2) sin^2(k dx / 2) -- so it is integrated
+    exactly, e^{lambda_k dt}, and never limits the step;
+  * the nonlinear |grad h|, (grad h)^2 and exp(-c|grad h|) terms are the Term
+    classes of the .cpp files, evaluated in real space, and are advanced with
+    Cox-Matthews ETD2 (two evaluations per step);
+  * the step adapts: the ETD1 predictor and the ETD2 result differ by the
+    local error of the lower-order step, and dt grows or shrinks to keep that
+    difference (rms over x and runs) near `tol`, rejecting a step that misses
+    it.  dt is also capped at cfl dx / max|dF/d(grad h)|, since the error
+    estimate does not see slow grid-scale growth of the explicit term;
+  * the noise is added after each accepted step, with the exact variance of
+    each Fourier mode of the linear (Ornstein-Uhlenbeck) problem over dt.
+
+All runs of one ensemble go as rows of one array (one FFT per stage for all of
+them) and share the step size.  The outputs have the same layout as the C++
+engine's (roughness_N*, profile_N*, slopes_N* in a directory named after the
+parameters), so the viz_cpp.py scripts read them; slope counts are
+accumulated with weight dt / params dt, i.e. in fixed-step-equivalent counts.
+
+    python src/continuumPuyo/spectral.py run --model abs --N 1,2,4 --lam 10
+    python src/continuumPuyo/spectral.py validate --model abs --N 4 --T 400 \\
+        --fd src/continuumPuyo/abs_term/avalanchePDE
+
+`validate` runs the finite-difference binary with the same parameters, then
+this integrator, and prints the late-time roughness, the distance between the
+slope distributions and the number of steps each took (and plots them).
+"""
+import argparse
+import glob
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+# as in avalanchePDE.h
+RECORD_STEPS = 10000
+HIST_MIN, HIST_MAX, HIST_BINS = -2.5, 2.5, 400
+
+# the defaults of abs_term/ and exp_abs/avalanchePDE.cpp
+DEFAULTS = {
+    "abs": dict(L=128, T=8000, dt=0.01, a=1, c=1, lam=10, lamexp=100, dx=0.1, noise=0.1, runs=12),
+    "exp": dict(L=128, T=8000, dt=0.01, a=0.1, c=1, lam=1, lamexp=100, dx=0.1, noise=0.1, runs=12),
+}
+
+
+def point_name(model, p):
+    """The directory name the C++ engine uses for these parameters."""
+    name = f"L{p['L']:g}_T{int(p['T'])}_dt{p['dt']:g}_a{p['a']:g}_c{p['c']:g}"
+    if model == "exp":
+        name += f"_lamexp{p['lamexp']:g}"
+    return name + f"_lam{p['lam']:g}"
+
+
+def explicit_term(model, p, N):
+    """The nonlinear right-hand side of the .cpp Term classes, on (..., n) arrays.
+
+    The returned function gives the term and the largest characteristic speed
+    |dF/d(grad h)| over the arrays, which bounds a stable explicit step."""
+    inv_dx = 1.0 / p["dx"]
+    q = 1.0 / N
+
+    if model == "abs":
+        c_nonlin2 = p["c"] / N
+        c_nonlin1 = p["lam"] * p["a"] * q * q
+
+        def term(h):
+            dp_fwd = (np.roll(h, -1, axis=-1) - h) * inv_dx
+            dp_bwd = np.roll(dp_fwd, 1, axis=-1)
+            grad_h_sq = (dp_fwd * dp_fwd + dp_fwd * dp_bwd + dp_bwd * dp_bwd) / 3.0
+            abs_grad_h = np.abs(0.5 * (dp_fwd + dp_bwd))
+            speed = 2.0 * c_nonlin2 * max(np.abs(dp_fwd).max(), 1e-300) + c_nonlin1
+            return -c_nonlin2 * grad_h_sq - c_nonlin1 * abs_grad_h, speed
+    else:
+        c_val = p["c"]
+        c_nonlin_exp = 2.0 * p["lamexp"] / N
+        c_nonlin_abs = p["lam"] * p["a"] * q * q
+
+        def term(h):
+            abs_grad_h = np.abs(np.roll(h, -1, axis=-1) - np.roll(h, 1, axis=-1)) * (0.5 * inv_dx)
+            decay = np.exp(-c_val * abs_grad_h)
+            speed = c_val * c_nonlin_exp * decay.max() + c_nonlin_abs
+            return c_nonlin_exp * decay - c_nonlin_abs * abs_grad_h, speed
+
+    return term
+
+
+class ETD:
+    """The runs of one (parameters, N) ensemble, stepped together.
+
+    h is (runs, n) and h_hat its rfft along x, both kept current so that a
+    step costs four FFTs: the nonlinear term at h and at the ETD1 predictor
+    forward, the predictor and the result back."""
+
+    def __init__(self, model, p, N, seeds, tol=1e-3, dt_max=1.0, cfl=0.5):
+        self.n = int(round(p["L"] / p["dx"]))
+        self.term = explicit_term(model, p, N)
+        self.h = np.zeros((len(seeds), self.n))
+        self.h_hat = np.zeros((len(seeds), self.n // 2 + 1), dtype=complex)
+        self.rng = np.random.default_rng(seeds)
+        self.tol = tol
+        self.dt_max = dt_max
+        self.cfl_dx = cfl * p["dx"]
+        self.dt = p["dt"]
+        self.steps = 0
+        self.rejected = 0
+        D = (p["a"] / N) ** 2 / 2.0
+        k = np.arange(self.n // 2 + 1)
+        self.lin = -D * (4.0 / p["dx"] ** 2) * np.sin(np.pi * k / self.n) ** 2
+        # rfft of unit white noise: variance n per mode, split over re/im
+        # except for the real k = 0 (and n/2) modes; Parseval weights likewise
+        self.white = np.full(k.size, np.sqrt(self.n / 2.0))
+        self.parseval = np.full(k.size, 2.0 / self.n ** 2)
+        self.white[0] = np.sqrt(self.n)
+        self.parseval[0] = 1.0 / self.n ** 2
+        if self.n % 2 == 0:
+            self.white[-1] = np.sqrt(self.n)
+            self.parseval[-1] = 1.0 / self.n ** 2
+        self.sigma = p["noise"] / np.sqrt(p["dx"])
+        self._coeffs_dt = None
+        self._n0 = None
+
+    def _coeffs(self, dt):
+        """e^{z}, dt phi1(z), dt phi2(z) and the OU noise amplitude for z = lin dt."""
+        if dt != self._coeffs_dt:
+            z = self.lin * dt
+            small = np.abs(z) < 1e-4
+            zs = np.where(small, 1.0, z)
+            phi1 = np.where(small, 1.0 + z / 2 + z * z / 6, np.expm1(zs) / zs)
+            phi2 = np.where(small, 0.5 + z / 6 + z * z / 24, (np.expm1(zs) - zs) / (zs * zs))
+            # variance of the mode after dt of dh = lin h dt + dW: (e^{2z} - 1) / (2 lin)
+            var = dt * np.where(small, 1.0 + z + 2 * z * z / 3, np.expm1(2 * zs) / (2 * zs))
+            self._cached = np.exp(z), dt * phi1, dt * phi2, self.sigma * self.white * np.sqrt(var)
+            self._coeffs_dt = dt
+        return self._cached
+
+    def advance(self, limit):
+        """One accepted step of at most `limit`; returns its dt."""
+        if self._n0 is None:
+            f0, self._speed = self.term(self.h)
+            self._n0 = np.fft.rfft(f0, axis=-1)
+        n0 = self._n0
+        # the error estimate misses slow grid-scale growth: cap by the CFL
+        # number of the explicit term as well
+        dt_cfl = self.cfl_dx / self._speed
+        while True:
+            dt = min(self.dt, limit, dt_cfl)
+            if not dt > 1e-12:
+                raise FloatingPointError(f"ETD step collapsed (dt = {dt:g}): the runs blew up")
+            e, dt_phi1, dt_phi2, noise = self._coeffs(dt)
+            a_hat = e * self.h_hat + dt_phi1 * n0
+            n1 = np.fft.rfft(self.term(np.fft.irfft(a_hat, n=self.n, axis=-1))[0], axis=-1)
+            correction = dt_phi2 * (n1 - n0)
+            # ETD2 - ETD1, rms over x and the runs (Parseval)
+            err = np.sqrt(np.mean(np.sum(self.parseval * np.abs(correction) ** 2, axis=-1))) / self.tol
+            if not np.isfinite(err):
+                err = 1e6
+            # embedded first-order estimate: err ~ dt^2
+            factor = min(5.0, max(0.2, 0.9 / np.sqrt(max(err, 1e-12))))
+            if err <= 1.0:
+                if dt == self.dt:
+                    self.dt = min(dt * factor, self.dt_max)
+                else:
+                    self.dt = min(self.dt, dt * factor)
+                xi = self.rng.standard_normal((2,) + self.h_hat.shape)
+                self.h_hat = a_hat + correction + noise * (xi[0] + 1j * xi[1])
+                self.h_hat[:, 0].imag = 0.0
+                if self.n % 2 == 0:
+                    self.h_hat[:, -1].imag = 0.0
+                self.h = np.fft.irfft(self.h_hat, n=self.n, axis=-1)
+                self._n0 = None
+                self.steps += 1
+                return dt
+            self.rejected += 1
+            self.dt = dt * factor
+
+
+def run_ensemble(model, p, N, tol=1e-3, dt_max=1.0, cfl=0.5):
+    """roughness (RECORD_STEPS, runs), profile of run 0, weighted slope counts."""
+    seeds = [42000 + r * 100 + N for r in range(p["runs"])]
+    etd = ETD(model, p, N, seeds, tol, dt_max, cfl)
+    T = p["T"]
+    record_times = np.arange(RECORD_STEPS) * (T / RECORD_STEPS)
+    roughness = np.zeros((RECORD_STEPS, p["runs"]))
+    counts = np.zeros(HIST_BINS)
+    bin_width = (HIST_MAX - HIST_MIN) / HIST_BINS
+    tail_start = 0.9 * T
+
+    t = 0.0
+    for i, tr in enumerate(record_times):
+        while t < tr - 1e-12:
+            dt = etd.advance(tr - t)
+            t += dt
+            if t > tail_start:
+                grad = (np.roll(etd.h, -1, axis=-1) - np.roll(etd.h, 1, axis=-1)) / (2.0 * p["dx"])
+                bins = np.floor((grad - HIST_MIN) / bin_width).astype(np.int64).ravel()
+                ok = (bins >= 0) & (bins < HIST_BINS)
+                counts += np.bincount(bins[ok], minlength=HIST_BINS) * (dt / p["dt"])
+        roughness[i] = etd.h.std(axis=-1)
+    while t < T - 1e-12:
+        t += etd.advance(T - t)
+
+    profile = etd.h[0] - etd.h[0].mean()
+    return roughness, profile, counts, etd
+
+
+def write_outputs(out_dir, N, p, roughness, profile, counts):
+    os.makedirs(out_dir, exist_ok=True)
+    times = np.arange(RECORD_STEPS) * (p["T"] / RECORD_STEPS)
+    np.savetxt(os.path.join(out_dir, f"roughness_N{N}.tsv"), np.column_stack([times, roughness.mean(axis=1)]),
+               fmt="%.6f", delimiter="\t", header="time\troughness", comments="")
+    x = np.arange(len(profile)) * p["dx"]
+    np.savetxt(os.path.join(out_dir, f"profile_N{N}.tsv"), np.column_stack([x, profile]),
+               fmt="%.6f", delimiter="\t", header="x\th", comments="")
+    centers = HIST_MIN + (np.arange(HIST_BINS) + 0.5) * (HIST_MAX - HIST_MIN) / HIST_BINS
+    np.savetxt(os.path.join(out_dir, f"slopes_N{N}.tsv"), np.column_stack([centers, counts]),
+               fmt="%.6f", delimiter="\t", header="slope_bin_center\tcount", comments="")
+
+
+def fd_record_times(p):
+    """Times of the roughness rows the finite-difference engine actually fills.
+
+    It records every max(1, steps // RECORD_STEPS)-th of its steps = T / dt
+    fixed steps, at most RECORD_STEPS of them, and labels row i with
+    i T / RECORD_STEPS whatever it holds; when steps is not a multiple of
+    RECORD_STEPS (any T < RECORD_STEPS dt with the defaults) the labels are
+    wrong and the rows past the last recorded step are zeros."""
+    steps = int(round(p["T"] / p["dt"]))
+    interval = max(1, steps // RECORD_STEPS)
+    n = min(RECORD_STEPS, -(-steps // interval))
+    return np.arange(n) * interval * p["dt"]
+
+
+def load_outputs(out_dir, N):
+    _, rough = np.loadtxt(os.path.join(out_dir, f"roughness_N{N}.tsv"), unpack=True, skiprows=1)
+    _, counts = np.loadtxt(os.path.join(out_dir, f"slopes_N{N}.tsv"), unpack=True, skiprows=1)
+    return rough, counts
+
+
+def run(model, p, Ns, out, tol, dt_max, cfl):
+    out_dir = os.path.join(out, point_name(model, p))
+    for N in Ns:
+        roughness, profile, counts, etd = run_ensemble(model, p, N, tol, dt_max, cfl)
+        write_outputs(out_dir, N, p, roughness, profile, counts)
+        print(f"N={N}: {etd.steps} steps ({etd.rejected} rejected), "
+              f"mean dt {p['T'] / etd.steps:.4g} vs {p['dt']:g} fixed")
+    print(f"Outputs in {out_dir}")
+
+
+def validate(model, p, Ns, fd_binary, tol, dt_max, cfl, plots):
+    """Run the finite-difference engine and this one on the same parameters
+    and compare roughness and slope distributions."""
+    # the FD rows on their real times, the unwritten tail dropped
+    fd_times = fd_record_times(p)
+    fd_late = fd_times >= p["T"] / 2
+    if not fd_late.any():
+        raise ValueError(f"the finite-difference engine records nothing after T/2 at T={p['T']:g}, dt={p['dt']:g}")
+    fd_out = tempfile.mkdtemp(prefix="avalanchePDE_fd_")
+    cmd = [fd_binary, "--N", ",".join(map(str, Ns))]
+    for key in ("L", "T", "dt", "dx", "noise", "runs", "a", "c", "lam") + (("lamexp",) if model == "exp" else ()):
+        cmd += [f"--{key}", f"{p[key]:g}"]
+    subprocess.run(cmd + ["--out", fd_out], check=True, stdout=subprocess.DEVNULL)
+    fd_dir = glob.glob(os.path.join(fd_out, "*"))[0]
+
+    os.makedirs(plots, exist_ok=True)
+    fig, (ax_r, ax_s) = plt.subplots(1, 2, figsize=(12, 5))
+    times = np.arange(RECORD_STEPS) * (p["T"] / RECORD_STEPS)
+    late = times >= p["T"] / 2
+    width = (HIST_MAX - HIST_MIN) / HIST_BINS
+    centers = HIST_MIN + (np.arange(HIST_BINS) + 0.5) * width
+
+    print(f"{'N':>4} {'W_fd':>9} {'W_etd':>9} {'+-':>7} {'rel':>7} {'TV(slopes)':>11} {'steps_fd':>9} {'steps_etd':>9}")
+    for N in Ns:
+        rough_fd, counts_fd = load_outputs(fd_dir, N)
+        rough_fd = rough_fd[:len(fd_times)]
+        roughness, _, counts, etd = run_ensemble(model, p, N, tol, dt_max, cfl)
+        w_runs = roughness[late].mean(axis=0)
+        w_fd, w_etd = rough_fd[fd_late].mean(), w_runs.mean()
+        se = w_runs.std(ddof=1) / np.sqrt(len(w_runs)) if len(w_runs) > 1 else np.nan
+        p_fd = counts_fd / max(counts_fd.sum(), 1e-300)
+        p_etd = counts / max(counts.sum(), 1e-300)
+        tv = 0.5 * np.abs(p_fd - p_etd).sum()
+        print(f"{N:>4} {w_fd:>9.4f} {w_etd:>9.4f} {se:>7.4f} {(w_etd - w_fd) / w_fd:>7.2%} {tv:>11.4f} "
+              f"{int(round(p['T'] / p['dt'])):>9} {etd.steps:>9}")
+
+        line = ax_r.plot(fd_times[1:], rough_fd[1:], label=f"N={N} FD")[0]
+        ax_r.plot(times[1:], roughness.mean(axis=1)[1:], "--", color=line.get_color(), label=f"N={N} ETD")
+        ax_s.plot(centers, p_fd / width, color=line.get_color(), label=f"N={N} FD")
+        ax_s.plot(centers, p_etd / width, "--", color=line.get_color(), label=f"N={N} ETD")
+
+    ax_r.set_xscale("log")
+    ax_r.set_yscale("log")
+    ax_r.set_xlabel("Time (t)")
+    ax_r.set_ylabel("Average Roughness W(t)")
+    ax_r.legend()
+    ax_s.set_yscale("log")
+    ax_s.set_xlabel("Local Slope (grad h)")
+    ax_s.set_ylabel("Density")
+    ax_s.legend()
+    fig.tight_layout()
+    path = os.path.join(plots, f"validate_{point_name(model, p)}_tol{tol:g}.png")
+    fig.savefig(path)
+    print(f"Plot saved as {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("mode", choices=["run", "validate"])
+    parser.add_argument("--model", choices=["abs", "exp"], default="abs")
+    parser.add_argument("--N", default="1,2,4,6,8,12,15,20,40")
+    for key in ("L", "T", "dt", "a", "c", "lam", "lamexp", "dx", "noise"):
+        parser.add_argument(f"--{key}", type=float)
+    parser.add_argument("--runs", type=int)
+    parser.add_argument("--tol", type=float, default=1e-3, help="local error per step (height units)")
+    parser.add_argument("--dt-max", type=float, default=1.0)
+    parser.add_argument("--cfl", type=float, default=0.5, help="dt <= cfl dx / max |dF/d(grad h)|")
+    parser.add_argument("--out", default="outputs/avalanchePDE_etd")
+    parser.add_argument("--fd", help="finite-difference binary (validate)")
+    parser.add_argument("--plots", default="src/continuumPuyo/plots/validation")
+    args = parser.parse_args()
+
+    p = dict(DEFAULTS[args.model])
+    for key in p:
+        if getattr(args, key) is not None:
+            p[key] = getattr(args, key)
+    Ns = [int(n) for n in args.N.split(",")]
+
+    if args.mode == "run":
+        run(args.model, p, Ns, args.out, args.tol, args.dt_max, args.cfl)
+    else:
+        if not args.fd:
+            parser.error("validate needs --fd path/to/avalanchePDE")
+        validate(args.model, p, Ns, args.fd, args.tol, args.dt_max, args.cfl, args.plots)
+
+
+if __name__ == "__main__":
+    main()
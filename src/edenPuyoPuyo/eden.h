@@ -0,0 +1,417 @@
+#pragma once
+// Flat-array engine for the Eden puyo lattices (2D and 3D).
+//
+// The old engines kept the grid as nested vectors and, on EVERY growth event,
+// allocated and cleared a fresh L^d visited array in floodAnnihilate (and a
+// second one in eliminateDisconnectedClusters): O(L^d) per event however small
+// the cluster, which is where survival runs with N_sims=1000 spent their time.
+// Here:
+//
+//   * the lattice is one flat vector, padded by a ring of WALL sites (-1: neither
+//     empty nor filled), so a neighbour is site + off[k] with no bounds checks;
+//   * "visited" is a generation stamp per site: a search bumps `stamp` and a
+//     site counts as visited iff mark[site] == stamp, so nothing is ever cleared;
+//   * annihilation floods the new cell's species from it.  Any same-species
+//     contact annihilates at once, so at rest every same-species cluster is a
+//     single site and the flood is the new cell plus its equal neighbours --
+//     O(1) instead of O(L^d);
+//   * evaporation (which piece of the colony survives once the annihilated
+//     sites are gone) grows one breadth-first search per filled neighbour of
+//     the hole, all in lockstep.  Searches that meet are in the same piece and
+//     merge (union-find over the searches).  Pieces finish smallest first, so
+//     the walk stops as soon as the one search still running is larger than
+//     every finished piece: cost ~ (seeds) x (size of the pieces that
+//     evaporate), not the size of the colony.
+//
+// Random numbers are drawn in the same order as the old engines (boundary pick,
+// species, tie-break among the largest pieces, ties listed in the old discovery
+// order), so with the same generator the trajectories are identical.
+//
+//     Eden eden(d, L);
+//     eden.seed(dis_sp(gen));
+//     while (t < STEPS && eden.step(gen, dis_sp, evaporate)) ...
+//     eden.alive        // filled sites
+//
+// runEnsemble() spreads independent trials over threads: trial `sim` draws
+// from its own mt19937 seeded with (seed, sim), so a trial's result does not
+// depend on the thread count, and results are handed back in sim order.
+#include <algorithm>
+#include <atomic>
+#include <condition_variable>
+#include <cstdint>
+#include <mutex>
+#include <ostream>
+#include <random>
+#include <string>
+#include <thread>
+#include <vector>
+
+class Eden
+{
+public:
+    static constexpr int WALL = -1;
+
+    long alive = 0;           // filled sites
+    std::vector<int> cluster; // sites annihilated by the last step
+
+    Eden(int d, int L) : d(d), L(L), W(L + 2)
+    {
+        size_t n = 1;
+        for (int i = 0; i < d; ++i)
+            n *= W;
+        grid.assign(n, WALL);
+        pos.assign(n, -1);
+        mark.assign(n, 0);
+        label.assign(n, 0);
+        // direction order of the old engines: +x, -x, +y, -y (, +z, -z), x slowest
+        std::vector<int> stride(d);
+        for (int i = d - 1, s = 1; i >= 0; --i, s *= W)
+            stride[i] = s;
+        for (int i = 0; i < d; ++i)
+        {
+            off.push_back(stride[i]);
+            off.push_back(-stride[i]);
+        }
+        // interior sites in row-major order
+        size_t sites = 1;
+        for (int i = 0; i < d; ++i)
+            sites *= L;
+        interior.reserve(sites);
+        std::vector<int> c(d, 0);
+        for (size_t k = 0; k < sites; ++k)
+        {
+            int s = 0;
+            for (int i = 0; i < d; ++i)
+                s += (c[i] + 1) * stride[i];
+            interior.push_back(s);
+            grid[s] = 0;
+            for (int i = d - 1; i >= 0 && ++c[i] == L; --i)
+                c[i] = 0;
+        }
+    }
+
+    // Fill the centre site and put its neighbours on the boundary.
+    void seed(int species)
+    {
+        int s = 0;
+        for (int o : off)
+            if (o > 0)
+                s += (L / 2 + 1) * o;
+        grid[s] = species;
+        ++alive;
+        for (int o : off)
+            if (grid[s + o] != WALL)
+                addBoundary(s + o);
+    }
+
+    // One growth event: fill a random boundary site with a random species,
+    // annihilate, optionally evaporate detached pieces, fix the boundary.
+    // False (and nothing done) if the boundary is empty.
+    template <class Gen>
+    bool step(Gen &gen, std::uniform_int_distribution<> &dis_sp, bool evaporate = false)
+    {
+        if (boundary.empty())
+            return false;
+        std::uniform_int_distribution<> dis_b(0, (int)boundary.size() - 1);
+        int s = boundary[dis_b(gen)];
+        removeBoundary(s);
+        grid[s] = dis_sp(gen);
+        ++alive;
+        for (int o : off)
+            if (grid[s + o] == 0)
+                addBoundary(s + o);
+
+        annihilate(s);
+        if (evaporate && !cluster.empty())
+            evaporateDetached(gen);
+
+        // annihilated sites may become boundary, their empty neighbours may stop being
+        for (int p : cluster)
+        {
+            if (pos[p] < 0 && hasFilledNeighbor(p))
+                addBoundary(p);
+            for (int o : off)
+            {
+                int n = p + o;
+                if (grid[n] == 0 && pos[n] >= 0 && !hasFilledNeighbor(n))
+                    removeBoundary(n);
+            }
+        }
+        return true;
+    }
+
+    // The lattice as comma-separated species, row-major (lattice2D's format).
+    void write(std::ostream &out) const
+    {
+        for (size_t k = 0; k < interior.size(); ++k)
+        {
+            out << grid[interior[k]];
+            if (k + 1 != interior.size())
+                out << ",";
+        }
+    }
+
+private:
+    struct Search
+    {
+        std::vector<int> q;     // claimed sites; q[head..] still to expand
+        size_t head = 0;
+        std::vector<int> extra; // expanded sites of searches merged into this one
+        int parent, first;      // union-find parent; smallest seed index merged in
+        bool done = false;
+        size_t size() const { return q.size() + extra.size(); }
+    };
+
+    int d, L, W;
+    std::vector<int> grid, off, interior;
+    std::vector<int> boundary, pos; // pos[site]: index in boundary, -1 if not on it
+    std::vector<unsigned> mark;
+    std::vector<int> label;         // search that claimed a site (valid if mark == stamp)
+    unsigned stamp = 0;
+    std::vector<Search> searches;
+
+    void addBoundary(int s)
+    {
+        if (pos[s] >= 0)
+            return;
+        pos[s] = boundary.size();
+        boundary.push_back(s);
+    }
+
+    void removeBoundary(int s)
+    {
+        int p = pos[s], last = boundary.back();
+        std::swap(boundary[p], boundary.back());
+        pos[last] = p;
+        boundary.pop_back();
+        pos[s] = -1;
+    }
+
+    bool hasFilledNeighbor(int s) const
+    {
+        for (int o : off)
+            if (grid[s + o] > 0)
+                return true;
+        return false;
+    }
+
+    void nextStamp()
+    {
+        if (++stamp == 0)
+        {
+            std::fill(mark.begin(), mark.end(), 0);
+            stamp = 1;
+        }
+    }
+
+    // Same-species flood from s; the cluster is removed if it has 2+ sites.
+    void annihilate(int s0)
+    {
+        int species = grid[s0];
+        nextStamp();
+        cluster.assign(1, s0);
+        mark[s0] = stamp;
+        for (size_t h = 0; h < cluster.size(); ++h)
+            for (int o : off)
+            {
+                int n = cluster[h] + o;
+                if (mark[n] != stamp && grid[n] == species)
+                {
+                    mark[n] = stamp;
+                    cluster.push_back(n);
+                }
+            }
+        if (cluster.size() > 1)
+        {
+            for (int p : cluster)
+                grid[p] = 0;
+            alive -= cluster.size();
+        }
+        else
+            cluster.clear();
+    }
+
+    int find(int a)
+    {
+        while (searches[a].parent != a)
+            a = searches[a].parent = searches[searches[a].parent].parent;
+        return a;
+    }
+
+    // Merge two live searches (they met); returns the surviving root.
+    int unite(int a, int b)
+    {
+        if (searches[a].q.size() - searches[a].head < searches[b].q.size() - searches[b].head)
+            std::swap(a, b);
+        Search &A = searches[a], &B = searches[b];
+        A.q.insert(A.q.end(), B.q.begin() + B.head, B.q.end());
+        A.extra.insert(A.extra.end(), B.q.begin(), B.q.begin() + B.head);
+        A.extra.insert(A.extra.end(), B.extra.begin(), B.extra.end());
+        A.first = std::min(A.first, B.first);
+        B.parent = a;
+        B.q.clear();
+        B.extra.clear();
+        return a;
+    }
+
+    // Keep the largest piece of the colony touching the annihilated sites (ties
+    // at random, as the old eliminateDisconnectedClusters), evaporate the rest.
+    template <class Gen>
+    void evaporateDetached(Gen &gen)
+    {
+        nextStamp();
+        searches.clear();
+        for (int p : cluster)
+            for (int o : off)
+            {
+                int n = p + o;
+                if (grid[n] > 0 && mark[n] != stamp)
+                {
+                    mark[n] = stamp;
+                    label[n] = searches.size();
+                    Search S;
+                    S.q.push_back(n);
+                    S.parent = S.first = searches.size();
+                    searches.push_back(std::move(S));
+                }
+            }
+        int roots = searches.size(), live = roots;
+        size_t maxDone = 0;
+        int survivor = -1;
+        while (roots > 1 && survivor < 0)
+        {
+            for (int g = 0; g < (int)searches.size() && roots > 1; ++g)
+            {
+                if (searches[g].parent != g || searches[g].done)
+                    continue;
+                if (searches[g].head == searches[g].q.size())
+                {
+                    searches[g].done = true;
+                    --live;
+                    maxDone = std::max(maxDone, searches[g].size());
+                }
+                else
+                {
+                    int u = searches[g].q[searches[g].head++], r = g;
+                    for (int o : off)
+                    {
+                        int n = u + o;
+                        if (grid[n] <= 0)
+                            continue;
+                        if (mark[n] != stamp)
+                        {
+                            mark[n] = stamp;
+                            label[n] = r;
+                            searches[r].q.push_back(n);
+                        }
+                        else if (int other = find(label[n]); other != r)
+                        {
+                            r = unite(r, other);
+                            --roots;
+                            --live;
+                        }
+                    }
+                }
+                if (live == 0)
+                    break;
+                if (live == 1)
+                {
+                    // the one still running is the largest once it outgrows every finished piece
+                    for (int h = 0; h < (int)searches.size(); ++h)
+                        if (searches[h].parent == h && !searches[h].done && searches[h].size() > maxDone)
+                            survivor = h;
+                    if (survivor >= 0)
+                        break;
+                }
+            }
+            if (live == 0 && roots > 1)
+            {
+                std::vector<int> largest;
+                for (int h = 0; h < (int)searches.size(); ++h)
+                    if (searches[h].parent == h && searches[h].size() == maxDone)
+                        largest.push_back(h);
+                std::sort(largest.begin(), largest.end(),
+                          [&](int a, int b)
+                          { return searches[a].first < searches[b].first; });
+                survivor = largest[0];
+                if (largest.size() > 1)
+                {
+                    std::uniform_int_distribution<> dis(0, (int)largest.size() - 1);
+                    survivor = largest[dis(gen)];
+                }
+            }
+        }
+        if (survivor < 0)
+            return; // one piece only
+        for (int h = 0; h < (int)searches.size(); ++h)
+        {
+            if (searches[h].parent != h || h == survivor)
+                continue;
+            for (auto *v : {&searches[h].q, &searches[h].extra})
+                for (int s : *v)
+                    grid[s] = 0;
+            alive -= searches[h].size();
+        }
+    }
+};
+
+// "--name V" from args (removed), or def if absent.
+inline unsigned long long optionArg(std::vector<std::string> &args, const std::string &name,
+                                    unsigned long long def)
+{
+    for (size_t i = 0; i + 1 < args.size(); ++i)
+        if (args[i] == name)
+        {
+            def = std::stoull(args[i + 1]);
+            args.erase(args.begin() + i, args.begin() + i + 2);
+            break;
+        }
+    return def;
+}
+
+// The generator of trial `sim` of an ensemble seeded with `seed`.
+inline std::mt19937 trialGenerator(unsigned long long seed, int sim)
+{
+    std::seed_seq seq{(uint32_t)seed, (uint32_t)(seed >> 32), (uint32_t)sim};
+    return std::mt19937(seq);
+}
+
+// Run trial(sim, gen) for sim = 0..N_sims-1 on `threads` workers; emit(sim,
+// result) is called on the calling thread, in sim order, as results come in.
+template <class Trial, class Emit>
+void runEnsemble(int N_sims, int threads, unsigned long long seed, Trial trial, Emit emit)
+{
+    std::vector<int> result(N_sims);
+    std::vector<char> ready(N_sims, 0);
+    std::atomic<int> next{0};
+    std::mutex m;
+    std::condition_variable cv;
+
+    auto work = [&]
+    {
+        for (int sim; (sim = next++) < N_sims;)
+        {
+            std::mt19937 gen = trialGenerator(seed, sim);
+            int r = trial(sim, gen);
+            {
+                std::lock_guard<std::mutex> lock(m);
+                result[sim] = r;
+                ready[sim] = 1;
+            }
+            cv.notify_one();
+        }
+    };
+    std::vector<std::thread> workers;
+    for (int w = 0; w < std::max(threads, 1); ++w)
+        workers.emplace_back(work);
+
+    for (int sim = 0; sim < N_sims; ++sim)
+    {
+        std::unique_lock<std::mutex> lock(m);
+        cv.wait(lock, [&] { return ready[sim] != 0; });
+        lock.unlock();
+        emit(sim, result[sim]);
+    }
+    for (auto &w : workers)
+        w.join();
+}
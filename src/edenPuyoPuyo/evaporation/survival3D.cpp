@@ -1,12 +1,14 @@
 #include <random>
 #include <vector>
-#include <queue>
 #include <iostream>
 #include <fstream>
 #include <sstream>
 #include <filesystem>
 #include <iomanip>
 #include <algorithm>
+#include <string>
+
+#include "../eden.h"
 
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
@@ -14,276 +16,44 @@
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-
-void eliminateDisconnectedClusters(
-    std::vector<std::vector<std::vector<int>>> &grid,
-    const std::vector<std::tuple<int, int, int>> &eliminated,
-    std::mt19937 &gen)
+int run_survival3D(int L, int N_SPECIES, int STEPS, std::mt19937 &gen)
 {
-    int L = grid.size();
-    std::vector<std::vector<std::vector<bool>>> visited(L, std::vector<std::vector<bool>>(L, std::vector<bool>(L, false)));
-    std::vector<std::vector<std::tuple<int, int, int>>> clusters;
-
-    // Find all clusters adjacent to the eliminated region
-    for (const auto &[x, y, z] : eliminated)
-    {
-        for (auto d : std::vector<std::tuple<int, int, int>>{
-                 {1, 0, 0}, {-1, 0, 0},
-                 {0, 1, 0}, {0, -1, 0},
-                 {0, 0, 1}, {0, 0, -1}})
-        {
-            int nx = x + std::get<0>(d), ny = y + std::get<1>(d), nz = z + std::get<2>(d);
-            if (nx >= 0 && nx < L && ny >= 0 && ny < L && nz >= 0 && nz < L &&
-                grid[nx][ny][nz] > 0 && !visited[nx][ny][nz])
-            {
-                // BFS to find the cluster
-                std::vector<std::tuple<int, int, int>> cluster;
-                std::queue<std::tuple<int, int, int>> q;
-                q.push({nx, ny, nz});
-                visited[nx][ny][nz] = true;
-                while (!q.empty())
-                {
-                    auto [cx, cy, cz] = q.front();
-                    q.pop();
-                    cluster.emplace_back(cx, cy, cz);
-                    for (auto nd : std::vector<std::tuple<int, int, int>>{
-                             {1, 0, 0}, {-1, 0, 0},
-                             {0, 1, 0}, {0, -1, 0},
-                             {0, 0, 1}, {0, 0, -1}})
-                    {
-                        int nnx = cx + std::get<0>(nd), nny = cy + std::get<1>(nd), nnz = cz + std::get<2>(nd);
-                        if (nnx >= 0 && nnx < L && nny >= 0 && nny < L && nnz >= 0 && nnz < L &&
-                            grid[nnx][nny][nnz] > 0 && !visited[nnx][nny][nnz])
-                        {
-                            visited[nnx][nny][nnz] = true;
-                            q.push({nnx, nny, nnz});
-                        }
-                    }
-                }
-                clusters.push_back(std::move(cluster));
-            }
-        }
-    }
-
-    if (clusters.size() <= 1)
-        return;
-
-    // Find the largest cluster(s)
-    size_t max_size = 0;
-    for (const auto &c : clusters)
-        if (c.size() > max_size)
-            max_size = c.size();
-
-    std::vector<int> largest_indices;
-    for (size_t i = 0; i < clusters.size(); ++i)
-        if (clusters[i].size() == max_size)
-            largest_indices.push_back((int)i);
-
-    // Randomly select one if there are ties
-    int survivor = largest_indices[0];
-    if (largest_indices.size() > 1)
-    {
-        std::uniform_int_distribution<> dis(0, (int)largest_indices.size() - 1);
-        survivor = largest_indices[dis(gen)];
-    }
-
-    // Eliminate all clusters except the survivor
-    for (size_t i = 0; i < clusters.size(); ++i)
-    {
-        if ((int)i == survivor)
-            continue;
-        for (auto &[x, y, z] : clusters[i])
-            grid[x][y][z] = 0;
-    }
-}
-
-void floodAnnihilate3D(std::vector<std::vector<std::vector<int>>> &grid,
-                       int x0, int y0, int z0,
-                       std::vector<std::tuple<int, int, int>> &cluster)
-{
-    int L = grid.size();
-    int species = grid[x0][y0][z0];
-    cluster.clear();
-    std::vector<std::vector<std::vector<bool>>> vis(L, std::vector<std::vector<bool>>(L, std::vector<bool>(L, false)));
-    std::queue<std::tuple<int, int, int>> q;
-    q.push({x0, y0, z0});
-    vis[x0][y0][z0] = true;
-    while (!q.empty())
-    {
-        auto [x, y, z] = q.front();
-        q.pop();
-        cluster.emplace_back(x, y, z);
-        for (auto d : std::vector<std::tuple<int, int, int>>{
-                 {1, 0, 0}, {-1, 0, 0},
-                 {0, 1, 0}, {0, -1, 0},
-                 {0, 0, 1}, {0, 0, -1}})
-        {
-            int nx = x + std::get<0>(d), ny = y + std::get<1>(d), nz = z + std::get<2>(d);
-            if (nx >= 0 && nx < L && ny >= 0 && ny < L && nz >= 0 && nz < L &&
-                !vis[nx][ny][nz] && grid[nx][ny][nz] == species)
-            {
-                vis[nx][ny][nz] = true;
-                q.push({nx, ny, nz});
-            }
-        }
-    }
-    if (cluster.size() > 1)
-    {
-        for (auto &p : cluster)
-        {
-            auto [x, y, z] = p;
-            grid[x][y][z] = 0;
-        }
-    }
-    else
-    {
-        cluster.clear();
-    }
-}
-
-inline bool hasFilledNeighbor3D(const std::vector<std::vector<std::vector<int>>> &grid, int x, int y, int z)
-{
-    int L = grid.size();
-    static const int D[6][3] = {
-        {1, 0, 0}, {-1, 0, 0},
-        {0, 1, 0}, {0, -1, 0},
-        {0, 0, 1}, {0, 0, -1}};
-    for (auto &d : D)
-    {
-        int nx = x + d[0], ny = y + d[1], nz = z + d[2];
-        if (nx >= 0 && nx < L && ny >= 0 && ny < L && nz >= 0 && nz < L && grid[nx][ny][nz] > 0)
-            return true;
-    }
-    return false;
-}
-
-int run_survival3D(int L, int N_SPECIES, int STEPS)
-{
-    std::mt19937 gen(std::random_device{}());
     std::uniform_int_distribution<> dis_sp(1, N_SPECIES);
 
-    std::vector<std::vector<std::vector<int>>> grid(L, std::vector<std::vector<int>>(L, std::vector<int>(L, 0)));
-    std::vector<int> boundary;
-    std::vector<int> pos(L * L * L, -1);
-    std::vector<char> isBoundary(L * L * L, 0);
-
-    int cx = L / 2, cy = L / 2, cz = L / 2;
-    grid[cx][cy][cz] = dis_sp(gen);
-    for (auto d : std::vector<std::tuple<int, int, int>>{
-             {1, 0, 0}, {-1, 0, 0},
-             {0, 1, 0}, {0, -1, 0},
-             {0, 0, 1}, {0, 0, -1}})
-    {
-        int nx = cx + std::get<0>(d), ny = cy + std::get<1>(d), nz = cz + std::get<2>(d);
-        if (nx >= 0 && nx < L && ny >= 0 && ny < L && nz >= 0 && nz < L)
-        {
-            int idx = nx * L * L + ny * L + nz;
-            isBoundary[idx] = 1;
-            pos[idx] = boundary.size();
-            boundary.push_back(idx);
-        }
-    }
+    Eden eden(3, L);
+    eden.seed(dis_sp(gen));
 
-    std::vector<std::tuple<int, int, int>> cluster;
     int t_dead = -1;
     for (int t = 0; t < STEPS; ++t)
     {
-        if (boundary.empty())
+        if (!eden.step(gen, dis_sp, true))
             break;
-        std::uniform_int_distribution<> dis_b(0, (int)boundary.size() - 1);
-        int bi = dis_b(gen);
-        int idx = boundary[bi];
-        int x = idx / (L * L), y = (idx / L) % L, z = idx % L;
-        int last = boundary.back();
-        std::swap(boundary[bi], boundary.back());
-        pos[last] = bi;
-        boundary.pop_back();
-        pos[idx] = -1;
-        isBoundary[idx] = 0;
-
-        grid[x][y][z] = dis_sp(gen);
-
-        for (auto &d : std::vector<std::tuple<int, int, int>>{
-                 {1, 0, 0}, {-1, 0, 0},
-                 {0, 1, 0}, {0, -1, 0},
-                 {0, 0, 1}, {0, 0, -1}})
-        {
-            int nx = x + std::get<0>(d), ny = y + std::get<1>(d), nz = z + std::get<2>(d);
-            if (nx >= 0 && nx < L && ny >= 0 && ny < L && nz >= 0 && nz < L && grid[nx][ny][nz] == 0)
-            {
-                int nidx = nx * L * L + ny * L + nz;
-                if (!isBoundary[nidx])
-                {
-                    isBoundary[nidx] = 1;
-                    pos[nidx] = boundary.size();
-                    boundary.push_back(nidx);
-                }
-            }
-        }
-
-        floodAnnihilate3D(grid, x, y, z, cluster);
-        if (!cluster.empty()) {
-            eliminateDisconnectedClusters(grid, cluster, gen);
-        }
-                
-        for (auto &p : cluster)
-        {
-            int px, py, pz;
-            std::tie(px, py, pz) = p;
-            int pidx = px * L * L + py * L + pz;
-            if (hasFilledNeighbor3D(grid, px, py, pz) && !isBoundary[pidx])
-            {
-                isBoundary[pidx] = 1;
-                pos[pidx] = boundary.size();
-                boundary.push_back(pidx);
-            }
-            for (auto &d : std::vector<std::tuple<int, int, int>>{
-                     {1, 0, 0}, {-1, 0, 0},
-                     {0, 1, 0}, {0, -1, 0},
-                     {0, 0, 1}, {0, 0, -1}})
-            {
-                int nx = px + std::get<0>(d), ny = py + std::get<1>(d), nz = pz + std::get<2>(d);
-                if (nx >= 0 && nx < L && ny >= 0 && ny < L && nz >= 0 && nz < L && grid[nx][ny][nz] == 0)
-                {
-                    int nidx = nx * L * L + ny * L + nz;
-                    if (isBoundary[nidx] && !hasFilledNeighbor3D(grid, nx, ny, nz))
-                    {
-                        int ppos = pos[nidx], lidx = boundary.back();
-                        std::swap(boundary[ppos], boundary.back());
-                        pos[lidx] = ppos;
-                        boundary.pop_back();
-                        pos[nidx] = -1;
-                        isBoundary[nidx] = 0;
-                    }
-                }
-            }
-        }
         t_dead = t;
     }
 
-    for (int i = 0; i < L; ++i)
-        for (int j = 0; j < L; ++j)
-            for (int k = 0; k < L; ++k)
-                if (grid[i][j][k] > 0)
-                {
-                    t_dead = -1;
-                    break;
-                }
-
-    return t_dead;
+    return eden.alive > 0 ? -1 : t_dead;
 }
 
+// Usage: survival3D [L] [N] [STEPS] [N_sims] [--threads T] [--seed S]
+//   --threads T: spread the N_sims trials over T threads (../eden.h runEnsemble)
+//   --seed S:    ensemble seed (default: from random_device, printed); trial sim
+//                draws from its own stream seeded with (S, sim), so the output
+//                depends on S only, never on T
 int main(int argc, char *argv[])
 {
     int L = 16, N = 2, N_STEPS = 1024, N_sims = 1000;
-    if (argc > 1)
-        L = std::stoi(argv[1]);
-    if (argc > 2)
-        N = std::stoi(argv[2]);
-    if (argc > 3)
-        N_STEPS = std::stoi(argv[3]);
-    if (argc > 4)
-        N_sims = std::stoi(argv[4]);
+    std::vector<std::string> args(argv + 1, argv + argc);
+    int threads = optionArg(args, "--threads", 1);
+    unsigned long long seed = optionArg(args, "--seed", ((unsigned long long)std::random_device{}() << 32) | std::random_device{}());
+    if (args.size() > 0)
+        L = std::stoi(args[0]);
+    if (args.size() > 1)
+        N = std::stoi(args[1]);
+    if (args.size() > 2)
+        N_STEPS = std::stoi(args[2]);
+    if (args.size() > 3)
+        N_sims = std::stoi(args[3]);
+    std::cout << "seed " << seed << "\n";
 
     auto exe = std::filesystem::path(argv[0]).parent_path();
     std::ostringstream fp;
@@ -292,12 +62,13 @@ int main(int argc, char *argv[])
     std::ofstream out(fp.str());
     out << "sim\tt_dead\n";
 
-    for (int sim = 0; sim < N_sims; ++sim)
-    {
-        int t_dead = run_survival3D(L, N, N_STEPS);
-        out << sim << "\t" << t_dead << "\n";
-        std::cout << "\rSim " << (sim + 1) << "/" << N_sims << std::flush;
-    }
+    runEnsemble(N_sims, threads, seed,
+                [&](int, std::mt19937 &gen) { return run_survival3D(L, N, N_STEPS, gen); },
+                [&](int sim, int t_dead)
+                {
+                    out << sim << "\t" << t_dead << "\n";
+                    std::cout << "\rSim " << (sim + 1) << "/" << N_sims << std::flush;
+                });
     std::cout << "\nDone.\n";
     return 0;
 }
\ No newline at end of file
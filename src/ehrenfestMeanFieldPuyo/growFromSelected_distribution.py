@@ -3,28 +3,26 @@ import numpy as np
 import matplotlib.pyplot as plt
 from multiprocessing import Pool, cpu_count
 
+from urn import Urn
+
 def simulate_urn(N_colors, K_selections, N_steps, initial_total_balls):
     """
     Simulate the urn evolution and return the final urn state.
     """
     # Initialize urn with equal number of balls of each color
     initial_balls_per_color = initial_total_balls // N_colors
-    urn = np.full(N_colors, initial_balls_per_color, dtype=int)
+    box = Urn(N_colors, initial_balls_per_color)   # Fenwick tree over the counts (urn.py)
+    urn = box.counts
 
     for step in range(N_steps):
-        total_balls = np.sum(urn)
+        total_balls = box.total
         
         # Can't draw K balls if we don't have enough
         if total_balls < K_selections:
             break
         
-        # Create a list of all balls by expanding the urn counts
-        all_balls = []
-        for color in range(N_colors):
-            all_balls.extend([color] * urn[color])
-        
-        # Randomly draw K balls without replacement
-        drawn_balls = np.random.choice(all_balls, size=K_selections, replace=False)
+        # Randomly draw K balls without replacement, O(K log N_colors)
+        drawn_balls = box.draw(K_selections)
         
         # Count occurrences of each color in the drawn balls
         unique_colors, counts = np.unique(drawn_balls, return_counts=True)
@@ -33,12 +31,12 @@ def simulate_urn(N_colors, K_selections, N_steps, initial_total_balls):
         if len(unique_colors) == K_selections:
             # All K balls are different colors - put them back and add one extra
             random_color = np.random.choice(unique_colors)
-            urn[random_color] += 1
+            box.add(random_color, 1)
         else:
             # There are duplicates - remove all balls of colors that appeared more than once
             for color, count in zip(unique_colors, counts):
                 if count > 1:
-                    urn[color] -= count
+                    box.add(color, -count)
     
     return urn
 
@@ -8,8 +8,12 @@
 #include <sstream>
 #include <filesystem>
 #include <numeric>
+
+#include "urnSampler.h"
 #include <utility>
 
+#include "../../streamRng.h"
+
 // #pragma GCC optimize("Ofast","inline","fast-math","unroll-loops","no-stack-protector")
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
@@ -17,8 +21,8 @@
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 // Define constants
 constexpr int DEFAULT_N_COLORS = 500;
@@ -27,26 +31,11 @@ constexpr int DEFAULT_N_STEPS = 10000;
 constexpr int DEFAULT_INITIAL_TOTAL_BALLS = 1000;
 constexpr double DEFAULT_EXPONENTIAL_RATE = 1.0;
 
-// Efficient sampling without replacement using Fisher-Yates shuffle
-void sampleWithoutReplacement(std::vector<int>& all_balls, int K, std::vector<int>& drawn_balls)
-{
-    int total = all_balls.size();
-    drawn_balls.clear();
-    
-    for (int i = 0; i < K; ++i)
-    {
-        std::uniform_int_distribution<> dis(i, total - 1);
-        int j = dis(gen);
-        std::swap(all_balls[i], all_balls[j]);
-        drawn_balls.push_back(all_balls[i]);
-    }
-}
-
 std::pair<std::vector<int>, std::vector<double>> simulate_urn(int N_colors, int K_selections, int N_steps, int initial_total_balls, double exponential_rate)
 {
     // Initialize urn with equal number of balls of each color
     int initial_balls_per_color = initial_total_balls / N_colors;
-    std::vector<int> urn(N_colors, initial_balls_per_color);
+    UrnSampler urn(N_colors, initial_balls_per_color);   // Fenwick tree over the counts (urnSampler.h)
     
     // Assign random reproductivity parameters to each color using exponential distribution
     std::vector<double> reproductivity(N_colors);
@@ -64,32 +53,19 @@ std::pair<std::vector<int>, std::vector<double>> simulate_urn(int N_colors, int
     // Sort in descending order so color 0 has highest, color N-1 has lowest
     std::sort(reproductivity.begin(), reproductivity.end(), std::greater<double>());
     
-    // Pre-allocate vectors to avoid repeated allocations
-    std::vector<int> all_balls;
-    all_balls.reserve(initial_total_balls * 2); // Reserve extra space for growth
     std::vector<int> drawn_balls;
     drawn_balls.reserve(K_selections);
     
     for (int step = 0; step < N_steps; ++step)
     {
-        int total_balls = std::accumulate(urn.begin(), urn.end(), 0);
+        long long total_balls = urn.total();
         
         // Can't draw K balls if we don't have enough
         if (total_balls < K_selections)
             break;
         
-        // Create list of all balls by expanding urn counts
-        all_balls.clear();
-        for (int color = 0; color < N_colors; ++color)
-        {
-            for (int i = 0; i < urn[color]; ++i)
-            {
-                all_balls.push_back(color);
-            }
-        }
-        
-        // Randomly draw K balls without replacement
-        sampleWithoutReplacement(all_balls, K_selections, drawn_balls);
+        // Randomly draw K balls without replacement, O(K log N_colors)
+        urn.draw(K_selections, gen, drawn_balls);
         
         // Count occurrences of each color in drawn balls
         std::unordered_map<int, int> color_counts;
@@ -114,7 +90,7 @@ std::pair<std::vector<int>, std::vector<double>> simulate_urn(int N_colors, int
             std::discrete_distribution<> weighted_dis(weights.begin(), weights.end());
             int random_idx = weighted_dis(gen);
             int random_color = drawn_balls[random_idx];
-            urn[random_color]++;
+            urn.add(random_color, 1);
         }
         else
         {
@@ -123,7 +99,7 @@ std::pair<std::vector<int>, std::vector<double>> simulate_urn(int N_colors, int
             {
                 if (count > 1)
                 {
-                    urn[color] -= count;
+                    urn.add(color, -count);
                 }
             }
         }
@@ -139,11 +115,12 @@ std::pair<std::vector<int>, std::vector<double>> simulate_urn(int N_colors, int
     // std::cout << "Progress: 100.00%  \n" << std::flush;
     
     // Return both the distribution and reproductivity
-    return {urn, reproductivity};
+    return {urn.state(), reproductivity};
 }
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int N_colors = DEFAULT_N_COLORS;
     int K_selections = DEFAULT_K_SELECTIONS;
     int N_steps = DEFAULT_N_STEPS;
@@ -163,6 +140,7 @@ int main(int argc, char *argv[])
         exponential_rate = std::stod(argv[5]);
     if (argc > 6)
         simNumber = std::stoi(argv[6]);
+    gen = rngArgs.rng(simNumber);
     
     auto [final_distribution, reproductivity] = simulate_urn(N_colors, K_selections, N_steps, initial_total_balls, exponential_rate);
     
@@ -174,7 +152,7 @@ int main(int argc, char *argv[])
                    << "_steps" << N_steps 
                    << "_init" << initial_total_balls
                    << "_rate" << std::fixed << std::setprecision(2) << exponential_rate
-                   << "_sim" << simNumber << ".txt";
+                   << "_sim" << simNumber << rngArgs.keySuffix() << ".txt";
     std::string filePath = filePathStream.str();
     
     // Create output directory if it doesn't exist
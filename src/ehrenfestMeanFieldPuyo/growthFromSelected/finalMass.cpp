@@ -9,6 +9,10 @@
 #include <filesystem>
 #include <numeric>
 
+#include "../../streamRng.h"
+
+#include "urnSampler.h"
+
 // #pragma GCC optimize("Ofast","inline","fast-math","unroll-loops","no-stack-protector")
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
@@ -16,8 +20,8 @@
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 // Define constants
 constexpr int DEFAULT_N_COLORS = 500;
@@ -25,53 +29,25 @@ constexpr int DEFAULT_K_SELECTIONS = 15;
 constexpr int DEFAULT_N_STEPS = 10000;
 constexpr int DEFAULT_INITIAL_TOTAL_BALLS = 1000;
 
-// Efficient sampling without replacement using Fisher-Yates shuffle
-void sampleWithoutReplacement(std::vector<int>& all_balls, int K, std::vector<int>& drawn_balls)
-{
-    int total = all_balls.size();
-    drawn_balls.clear();
-    
-    for (int i = 0; i < K; ++i)
-    {
-        std::uniform_int_distribution<> dis(i, total - 1);
-        int j = dis(gen);
-        std::swap(all_balls[i], all_balls[j]);
-        drawn_balls.push_back(all_balls[i]);
-    }
-}
-
 int simulate_urn(int N_colors, int K_selections, int N_steps, int initial_total_balls)
 {
     // Initialize urn with equal number of balls of each color
     int initial_balls_per_color = initial_total_balls / N_colors;
-    std::vector<int> urn(N_colors, initial_balls_per_color);
+    UrnSampler urn(N_colors, initial_balls_per_color);   // Fenwick tree over the counts (urnSampler.h)
     
-    // Pre-allocate vectors to avoid repeated allocations
-    std::vector<int> all_balls;
-    all_balls.reserve(initial_total_balls * 2); // Reserve extra space for growth
     std::vector<int> drawn_balls;
     drawn_balls.reserve(K_selections);
     
     for (int step = 0; step < N_steps; ++step)
     {
-        int total_balls = std::accumulate(urn.begin(), urn.end(), 0);
+        long long total_balls = urn.total();
         
         // Can't draw K balls if we don't have enough
         if (total_balls < K_selections)
             break;
         
-        // Create list of all balls by expanding urn counts
-        all_balls.clear();
-        for (int color = 0; color < N_colors; ++color)
-        {
-            for (int i = 0; i < urn[color]; ++i)
-            {
-                all_balls.push_back(color);
-            }
-        }
-        
-        // Randomly draw K balls without replacement
-        sampleWithoutReplacement(all_balls, K_selections, drawn_balls);
+        // Randomly draw K balls without replacement, O(K log N_colors)
+        urn.draw(K_selections, gen, drawn_balls);
         
         // Count occurrences of each color in drawn balls
         std::unordered_map<int, int> color_counts;
@@ -87,7 +63,7 @@ int simulate_urn(int N_colors, int K_selections, int N_steps, int initial_total_
             std::uniform_int_distribution<> dis(0, drawn_balls.size() - 1);
             int random_idx = dis(gen);
             int random_color = drawn_balls[random_idx];
-            urn[random_color]++;
+            urn.add(random_color, 1);
         }
         else
         {
@@ -96,7 +72,7 @@ int simulate_urn(int N_colors, int K_selections, int N_steps, int initial_total_
             {
                 if (count > 1)
                 {
-                    urn[color] -= count;
+                    urn.add(color, -count);
                 }
             }
         }
@@ -112,11 +88,12 @@ int simulate_urn(int N_colors, int K_selections, int N_steps, int initial_total_
     // std::cout << "Progress: 100.00%  \n" << std::flush;
     
     // Return final total
-    return std::accumulate(urn.begin(), urn.end(), 0);
+    return static_cast<int>(urn.total());
 }
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int N_colors = DEFAULT_N_COLORS;
     int K_selections = DEFAULT_K_SELECTIONS;
     int N_steps = DEFAULT_N_STEPS;
@@ -130,6 +107,7 @@ int main(int argc, char *argv[])
         N_steps = std::stoi(argv[3]);
     if (argc > 4)
         initial_total_balls = std::stoi(argv[4]);
+    gen = rngArgs.rng();
     
     int final_size = simulate_urn(N_colors, K_selections, N_steps, initial_total_balls);
     
@@ -139,7 +117,7 @@ int main(int argc, char *argv[])
     filePathStream << exeDir << "/outputs/finalMass/N" << N_colors 
                    << "_K" << K_selections 
                    << "_steps" << N_steps 
-                   << "_init" << initial_total_balls << ".txt";
+                   << "_init" << initial_total_balls << rngArgs.keySuffix(false) << ".txt";
     std::string filePath = filePathStream.str();
     
     // Create output directory if it doesn't exist
@@ -0,0 +1,71 @@
+// The urn as per-color counts, with K-without-replacement draws in O(K log N).
+//
+// The engines used to expand the urn into an explicit `all_balls` vector every
+// step and Fisher-Yates K of them: O(total balls) per step, i.e. 10^4+ pushes
+// per step x 20000 steps x every point of the N-by-K raster.  Only the counts
+// matter, so they live in a Fenwick tree instead: ball r (0 <= r < total, in
+// color order) is found by descending the tree, and drawing without
+// replacement is "find, decrement, repeat" on the shrinking urn -- the same
+// distribution as the shuffle, one O(log N) descent per ball.  The drawn balls
+// are put back afterwards, so the caller applies the game's add/remove rule
+// with add() exactly as it did on the count vector.
+#pragma once
+#include <random>
+#include <vector>
+
+class UrnSampler
+{
+public:
+    UrnSampler(int nColors, int perColor) : n(nColors), tree(nColors + 1, 0), counts(nColors, 0)
+    {
+        top = 1;
+        while (top * 2 <= n) top *= 2;
+        for (int c = 0; c < n; ++c) add(c, perColor);
+    }
+
+    int colors() const { return n; }
+    long long total() const { return sum; }
+    int count(int color) const { return counts[color]; }
+    const std::vector<int> &state() const { return counts; }
+
+    void add(int color, int delta)
+    {
+        counts[color] += delta;
+        sum += delta;
+        for (int i = color + 1; i <= n; i += i & -i) tree[i] += delta;
+    }
+
+    // K balls without replacement (total() >= K); the urn is unchanged after.
+    template <class Gen>
+    void draw(int K, Gen &gen, std::vector<int> &drawn)
+    {
+        drawn.clear();
+        for (int i = 0; i < K; ++i)
+        {
+            std::uniform_int_distribution<long long> dis(0, sum - 1);
+            int color = find(dis(gen));
+            add(color, -1);
+            drawn.push_back(color);
+        }
+        for (int color : drawn) add(color, 1);
+    }
+
+private:
+    int n, top;
+    long long sum = 0;
+    std::vector<long long> tree;   // 1-based Fenwick tree over counts
+    std::vector<int> counts;
+
+    // the color of ball r, balls numbered in color order
+    int find(long long r) const
+    {
+        int pos = 0;
+        for (int step = top; step > 0; step >>= 1)
+            if (pos + step <= n && tree[pos + step] <= r)
+            {
+                pos += step;
+                r -= tree[pos];
+            }
+        return pos;   // 0-based color: the first prefix sum exceeding r ends here
+    }
+};
@@ -0,0 +1,66 @@
+"""The urn as per-color counts, with K-without-replacement draws in O(K log N).
+
+The urn scripts used to expand the counts into an explicit `all_balls` list on
+every step and np.random.choice(..., replace=False) from it: O(total balls)
+per step.  Only the counts matter, so they sit in a Fenwick tree: ball r (in
+color order) is found by one descent, and drawing without replacement is
+"find, decrement, repeat" -- the same distribution, O(log N) per ball.  The
+drawn balls are put back afterwards, so each script applies its own add/remove
+rule through add() (growthFromSelected/urnSampler.h is the same structure for
+the C++ engines).
+
+`counts` is kept as a NumPy array alongside, so the strategies that look at the
+whole urn (np.min(urn), the final distribution) still can.
+"""
+import numpy as np
+
+
+class Urn:
+    def __init__(self, n_colors, per_color):
+        self.n = int(n_colors)
+        self.counts = np.full(self.n, per_color, dtype=int)
+        self.total = int(self.counts.sum())
+        # linear-time Fenwick build; plain lists, as scalar numpy indexing is slow
+        tree = [0] + [int(per_color)] * self.n
+        for i in range(1, self.n + 1):
+            j = i + (i & -i)
+            if j <= self.n:
+                tree[j] += tree[i]
+        self.tree = tree
+        self.top = 1 << (self.n.bit_length() - 1)
+
+    def add(self, color, delta):
+        color, delta = int(color), int(delta)
+        self.counts[color] += delta
+        self._update(color, delta)
+
+    def _update(self, color, delta):
+        self.total += delta
+        tree, n, i = self.tree, self.n, color + 1
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def _find(self, r):
+        """The color of ball r, balls numbered in color order."""
+        tree, n, pos = self.tree, self.n, 0
+        step = self.top
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= r:
+                pos = nxt
+                r -= tree[nxt]
+            step >>= 1
+        return pos
+
+    def draw(self, k):
+        """k balls without replacement (total >= k), as a NumPy array of colors;
+        the urn is unchanged afterwards."""
+        drawn = []
+        for x in np.random.random(k).tolist():
+            color = self._find(min(int(x * self.total), self.total - 1))
+            self._update(color, -1)   # counts untouched: the balls go back below
+            drawn.append(color)
+        for color in drawn:
+            self._update(color, 1)
+        return np.array(drawn, dtype=int)
@@ -0,0 +1,227 @@
+#pragma once
+// The deposition pile on the honeycomb lattice (honeycombPuyo, its server
+// copy, and hexSlippingPuyo), with per-drop cost O(active region).
+//
+// Columns are vertical and every other column is shifted by half a cell
+// (honeycombPuyo/readme.md), so a site has its two vertical neighbours plus
+// two in each adjacent column: at heights y and y-1 next to an even column, at
+// y and y+1 next to an odd one (columns wrap, the floor is hard).  The old
+// engines rebuilt that neighbour list as a vector per visit, allocated a
+// fresh H*L visited grid per annihilation, scanned the whole lattice for moved
+// sites, ran a std::queue BFS of pairs and rebuilt and compared H*L moved flags
+// per cascade generation.  This is the slopeDistFast layout instead
+// (puyoRoughnessScaling/puyoEngine.h):
+//
+//   sideCol/sideDy : the four side neighbours of every column, precomputed
+//                    (parity is that of the absolute column, as before)
+//   colH[c]        : column heights (columns are always compact) -> O(1)
+//                    placement and slipping, mass = sum colH, height = max colH
+//   movedList      : sites that just landed or fell -> the BFS seeds
+//   visitedGen     : generation-stamped BFS, the component is the queue
+//   dirtyCols      : only columns something was eliminated from are compacted,
+//                    and only above their lowest hole
+//
+// Every same-species component of size > 1 that contains a moved site is
+// eliminated, then gravity, until nothing falls.  For even L the neighbour
+// relation is symmetric and components do not depend on the seed order; for
+// odd L the wrap joins two even columns and is not, so there the seeds are
+// taken in the old top-down, left-to-right scan order.  Either way the old
+// engines' outputs are reproduced exactly from the same draws.  Species are
+// bytes: the constructor rejects more than 255.
+//
+// Slipping (hexSlippingPuyo, after singlePuyo.py): a block aimed at column c
+// lands in whichever of c-1, c, c+1 is lowest, ties broken uniformly -- three
+// colH reads, and a draw only when there is a tie.
+//
+//     HexPile pile(L, H, nSpecies);
+//     HexPile::Chain ch;
+//     int col = pile.slipColumn(c, gen);     // slipping rule only
+//     if (pile.drop(col, species, ch)) ... ch.clusters, ch.eliminated
+//     pile.mass(), pile.maxHeight()
+#include <algorithm>
+#include <cstdint>
+#include <random>
+#include <stdexcept>
+#include <vector>
+
+class HexPile
+{
+public:
+    struct Chain
+    {
+        int clusters = 0;   // clusters eliminated, summed over the cascade
+        int eliminated = 0; // sites eliminated
+    };
+
+    int L, H;
+
+    HexPile(int L_, int H_, int nSpecies)
+        : L(L_), H(H_), lat(static_cast<size_t>(L_) * H_, 0), visitedGen(static_cast<size_t>(L_) * H_, 0),
+          colH(L_, 0), colDirtyGen(L_, 0), lowestElim(L_, 0), sideCol(4 * L_), sideDy(4 * L_)
+    {
+        if (nSpecies > 255)
+            throw std::invalid_argument("HexPile: at most 255 species");
+        for (int c = 0; c < L; ++c)
+        {
+            int k = 4 * c;
+            int dys[2] = {c % 2 == 0 ? 0 : 1, c % 2 == 0 ? -1 : 0};
+            for (int dc : {-1, 1})
+                for (int dy : dys)
+                {
+                    sideCol[k] = (c + dc + L) % L;
+                    sideDy[k] = dy;
+                    ++k;
+                }
+        }
+    }
+
+    // the column among c-1, c, c+1 (periodic) a slipping block lands in: the
+    // lowest that is not full, ties uniform; c itself if all three are full
+    template <class URBG>
+    int slipColumn(int c, URBG &g) const
+    {
+        int cand[3], k = 0, best = H;
+        for (int dc : {-1, 0, 1})
+        {
+            int nc = (c + dc + L) % L;
+            if (colH[nc] < best)
+                best = colH[nc], k = 0;
+            if (colH[nc] == best && best < H)
+                cand[k++] = nc;
+        }
+        if (k == 0)
+            return c;
+        if (k == 1)
+            return cand[0];
+        return cand[std::uniform_int_distribution<>(0, k - 1)(g)];
+    }
+
+    // one block onto column `col` and its cascade to rest; false if the column is full
+    bool drop(int col, int species, Chain &ch)
+    {
+        ch = Chain{};
+        if (colH[col] >= H)
+            return false;
+        int pos = colH[col] * L + col;
+        lat[pos] = static_cast<uint8_t>(species);
+        ++colH[col];
+
+        movedList.clear();
+        movedList.push_back(pos);
+        while (true)
+        {
+            annihilate(ch);
+            fallDirty();
+            if (newMovedList.empty())
+                break;
+            movedList.swap(newMovedList);
+            if (L % 2 == 1)
+                std::sort(movedList.begin(), movedList.end(), [this](int a, int b)
+                          { return scanKey(a) < scanKey(b); });
+        }
+        return true;
+    }
+
+    long long mass() const
+    {
+        long long m = 0;
+        for (int h : colH)
+            m += h;
+        return m;
+    }
+
+    int maxHeight() const { return *std::max_element(colH.begin(), colH.end()); }
+
+private:
+    std::vector<uint8_t> lat;
+    std::vector<int> visitedGen, colH, colDirtyGen, lowestElim, sideCol, sideDy;
+    std::vector<int> movedList, newMovedList, dirtyCols, component;
+    int stamp = 0;
+
+    // position of a site in the old engines' row-major, top-row-first scan
+    int scanKey(int id) const
+    {
+        int y = id / L;
+        return (H - 1 - y) * L + (id - y * L);
+    }
+
+    void visit(int nb, uint8_t species, int g)
+    {
+        if (lat[nb] == species && visitedGen[nb] != g)
+        {
+            visitedGen[nb] = g;
+            component.push_back(nb);
+        }
+    }
+
+    void annihilate(Chain &ch)
+    {
+        int g = ++stamp;
+        dirtyCols.clear();
+        for (int seed : movedList)
+        {
+            if (lat[seed] == 0 || visitedGen[seed] == g)
+                continue;
+            uint8_t species = lat[seed];
+            component.clear();
+            component.push_back(seed);
+            visitedGen[seed] = g;
+            for (size_t head = 0; head < component.size(); ++head)
+            {
+                int cur = component[head];
+                int y = cur / L, col = cur - y * L;
+                if (y > 0)
+                    visit(cur - L, species, g);
+                if (y + 1 < H)
+                    visit(cur + L, species, g);
+                for (int k = 4 * col; k < 4 * col + 4; ++k)
+                {
+                    int ny = y + sideDy[k];
+                    if (ny >= 0 && ny < H)
+                        visit(ny * L + sideCol[k], species, g);
+                }
+            }
+            if (component.size() > 1)
+            {
+                for (int id : component)
+                {
+                    lat[id] = 0;
+                    int y = id / L, col = id - y * L;
+                    if (colDirtyGen[col] != g)
+                    {
+                        colDirtyGen[col] = g;
+                        lowestElim[col] = y;
+                        dirtyCols.push_back(col);
+                    }
+                    else if (y < lowestElim[col])
+                        lowestElim[col] = y;
+                }
+                ++ch.clusters;
+                ch.eliminated += static_cast<int>(component.size());
+            }
+        }
+    }
+
+    // compact each dirty column above its lowest hole; blocks below are inert
+    void fallDirty()
+    {
+        newMovedList.clear();
+        for (int c : dirtyCols)
+        {
+            int write = lowestElim[c];
+            for (int y = write + 1; y < colH[c]; ++y)
+            {
+                int id = y * L + c;
+                if (lat[id] != 0)
+                {
+                    int dst = write * L + c;
+                    lat[dst] = lat[id];
+                    lat[id] = 0;
+                    newMovedList.push_back(dst);
+                    ++write;
+                }
+            }
+            colH[c] = write;
+        }
+    }
+};
@@ -1,16 +1,16 @@
 #include <random>
 #include <vector>
-#include <unordered_map>
 #include <iostream>
 #include <iomanip>
 #include <fstream>
 #include <sstream>
 #include <filesystem>
-#include <queue>
-#include <set>
 #include <cmath> // For std::floor
 #include <memory>
 
+#include "../streamRng.h"
+#include "../hexPile.h"
+
 // #pragma GCC optimize("Ofast","inline","fast-math","unroll-loops","no-stack-protector")
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
@@ -18,8 +18,8 @@
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 // Define constants
 constexpr int DEFAULT_L = 128;       // side length of the square lattice
@@ -40,144 +40,6 @@ std::discrete_distribution<> createSpeciesDistribution(double N_SPECIES) {
     return std::discrete_distribution<>(weights.begin(), weights.end());
 }
 
-inline int index2D(int row, int col, int L)
-{
-    return row * L + col;
-}
-
-bool placePuyo(std::vector<int> &lattice, bool *movedSites,
-               std::uniform_int_distribution<> &dis_l, std::discrete_distribution<> &species_dist, int L, int H)
-{
-    int col = dis_l(gen);
-    if (col < 0 || col >= L)
-        return false;
-
-    int species = species_dist(gen) + 1;
-
-    for (int row = H - 1; row >= 0; --row)
-    {
-        int pos = index2D(row, col, L);
-        if (lattice[pos] == 0)
-        {
-            lattice[pos] = species;
-            movedSites[pos] = true;
-            return true;
-        }
-    }
-
-    return false;
-}
-
-std::vector<std::pair<int, int>> getNeighbors(int row, int col, int L, int H)
-{
-    std::vector<std::pair<int, int>> neighbors;
-
-    for (int dr : {-1, 1})
-    {
-        int nr = row + dr;
-        if (nr >= 0 && nr < H)
-        {
-            neighbors.push_back({nr, col});
-        }
-    }
-
-    std::vector<int> sideRows;
-    if (col % 2 == 0)
-        sideRows = {row, row + 1};
-    else
-        sideRows = {row - 1, row};
-
-    for (int dc : {-1, 1})
-    {
-        int nc = (col + dc + L) % L;
-        for (int nr : sideRows)
-        {
-            if (nr >= 0 && nr < H)
-            {
-                neighbors.push_back({nr, nc});
-            }
-        }
-    }
-
-    return neighbors;
-}
-
-void annihilatePuyo(std::vector<int> &lattice, bool *movedSites, int L, int H)
-{
-    std::vector<bool> visited(H * L, false);
-
-    for (int row = 0; row < H; ++row)
-    {
-        for (int col = 0; col < L; ++col)
-        {
-            int start = index2D(row, col, L);
-            if (movedSites[start] && !visited[start] && lattice[start] != 0)
-            {
-                std::vector<std::pair<int, int>> cluster;
-                std::queue<std::pair<int, int>> q;
-                q.push({row, col});
-                visited[start] = true;
-                int species = lattice[start];
-
-                while (!q.empty())
-                {
-                    auto [r, c] = q.front();
-                    q.pop();
-                    cluster.push_back({r, c});
-
-                    for (auto [nr, nc] : getNeighbors(r, c, L, H))
-                    {
-                        int next = index2D(nr, nc, L);
-                        if (!visited[next] && lattice[next] == species)
-                        {
-                            q.push({nr, nc});
-                            visited[next] = true;
-                        }
-                    }
-                }
-
-                if (cluster.size() > 1)
-                {
-                    for (auto [r, c] : cluster)
-                    {
-                        int pos = index2D(r, c, L);
-                        lattice[pos] = 0;
-                        movedSites[pos] = false;
-                    }
-                }
-            }
-        }
-    }
-}
-
-void fall(std::vector<int> &lattice, bool *movedSites, int L, int H)
-{
-    std::unique_ptr<bool[]> newMovedSites(new bool[H * L]());
-
-    for (int col = 0; col < L; ++col)
-    {
-        int writeRow = H - 1;
-        for (int row = H - 1; row >= 0; --row)
-        {
-            int src = index2D(row, col, L);
-            if (lattice[src] != 0)
-            {
-                if (writeRow != row)
-                {
-                    int dst = index2D(writeRow, col, L);
-                    lattice[dst] = lattice[src];
-                    lattice[src] = 0;
-                    newMovedSites[dst] = true;
-                }
-                writeRow--;
-            }
-        }
-    }
-
-    for (int i = 0; i < H * L; ++i)
-        movedSites[i] = newMovedSites[i];
-}
-
 void run(std::ofstream &file, int L, double N_SPECIES, int STEPS_PER_LATTICEPOINT)
 {
     std::discrete_distribution<> species_dist = createSpeciesDistribution(N_SPECIES);
@@ -193,72 +55,17 @@ void run(std::ofstream &file, int L, double N_SPECIES, int STEPS_PER_LATTICEPOIN
         random_species[drop] = species_dist(gen) + 1;
     }
 
-    std::vector<int> lattice(H * L, 0);
-    std::unique_ptr<bool[]> movedSites(new bool[H * L]());
+    // column heights, moved-site seeds, stamped BFS, precomputed hex neighbours (hexPile.h)
+    HexPile pile(L, H, static_cast<int>(species_dist.probabilities().size()));
+    HexPile::Chain chain;
 
     int drop = 0;
     for (int step = 0; step <= STEPS_PER_LATTICEPOINT; ++step)
     {
-        for (int i = 0; i < L; ++i)
-        {
-            int col = random_columns[drop];
-            int species = random_species[drop];
-            ++drop;
-
-            bool placed = false;
-            for (int row = H - 1; row >= 0; --row)
-            {
-                int pos = index2D(row, col, L);
-                if (lattice[pos] == 0)
-                {
-                    lattice[pos] = species;
-                    movedSites[pos] = true;
-                    placed = true;
-                    break;
-                }
-            }
-            if (!placed)
-                continue;
-
-            while (true)
-            {
-                annihilatePuyo(lattice, movedSites.get(), L, H);
-                std::unique_ptr<bool[]> newMovedSites(new bool[H * L]());
-                fall(lattice, newMovedSites.get(), L, H);
-
-                bool same = true;
-                for (int idx = 0; idx < H * L; ++idx)
-                {
-                    if (newMovedSites[idx] != movedSites[idx])
-                    {
-                        same = false;
-                        break;
-                    }
-                }
-
-                if (same)
-                    break;
-
-                for (int idx = 0; idx < H * L; ++idx)
-                    movedSites[idx] = newMovedSites[idx];
-            }
-        }
-
-        int filled_cells = 0;
-        int max_height = 0;
-        for (int col = 0; col < L; ++col)
-        {
-            for (int row = 0; row < H; ++row)
-            {
-                if (lattice[index2D(row, col, L)] != 0)
-                {
-                    filled_cells++;
-                    max_height = std::max(max_height, H - row);
-                }
-            }
-        }
+        for (int i = 0; i < L; ++i, ++drop)
+            pile.drop(random_columns[drop], random_species[drop], chain);
 
-        file << step << "\t" << filled_cells << "\t" << max_height << "\n";
+        file << step << "\t" << pile.mass() << "\t" << pile.maxHeight() << "\n";
 
         std::cout << "Progress: " << std::fixed << std::setprecision(2)
                   << static_cast<double>(step) / STEPS_PER_LATTICEPOINT * 100 << "%\r" << std::flush;
@@ -267,6 +74,7 @@ void run(std::ofstream &file, int L, double N_SPECIES, int STEPS_PER_LATTICEPOIN
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int L = DEFAULT_L;
     double N_SPECIES = DEFAULT_N_SPECIES;
     int STEPS_PER_LATTICEPOINT = DEFAULT_STEPS_PER_LATTICEPOINT;
@@ -279,9 +87,10 @@ int main(int argc, char *argv[])
         STEPS_PER_LATTICEPOINT = std::stoi(argv[3]);
     if (argc > 4)
         SIM_NO = std::stoi(argv[4]);
+    gen = rngArgs.rng(SIM_NO);
 
     std::filesystem::path exeDir = std::filesystem::path(argv[0]).parent_path();
-    std::filesystem::path filePath = exeDir / "outputs" / "massVsTime2D" / ("L_" + std::to_string(L) + "_N_" + std::to_string(N_SPECIES) + "_steps_" + std::to_string(STEPS_PER_LATTICEPOINT) + "_sim_" + std::to_string(SIM_NO) + ".tsv");
+    std::filesystem::path filePath = exeDir / "outputs" / "massVsTime2D" / ("L_" + std::to_string(L) + "_N_" + std::to_string(N_SPECIES) + "_steps_" + std::to_string(STEPS_PER_LATTICEPOINT) + "_sim_" + std::to_string(SIM_NO) + rngArgs.keySuffix() + ".tsv");
 
     std::filesystem::create_directories(filePath.parent_path());
 
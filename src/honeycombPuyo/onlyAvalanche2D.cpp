@@ -5,29 +5,26 @@
 #include <fstream>
 #include <sstream>
 #include <filesystem>
-#include <queue>
 #include <cmath>
 #include <algorithm>
 #include <memory>
 
+#include "../streamRng.h"
+#include "../hexPile.h"
+
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
 
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 constexpr int DEFAULT_L = 128;
 constexpr double DEFAULT_N_SPECIES = 6.0;
 constexpr int DEFAULT_STEPS_PER_LATTICEPOINT = 128;
 
-inline int index2D(int row, int col, int L)
-{
-    return row * L + col;
-}
-
 // Helper to create a discrete distribution for floating-point N_SPECIES
 std::discrete_distribution<> createSpeciesDistribution(double N_SPECIES) {
     int n_int = static_cast<int>(std::floor(N_SPECIES));
@@ -42,144 +39,6 @@ std::discrete_distribution<> createSpeciesDistribution(double N_SPECIES) {
     return std::discrete_distribution<>(weights.begin(), weights.end());
 }
 
-std::vector<std::pair<int, int>> getNeighbors(int row, int col, int L, int H)
-{
-    std::vector<std::pair<int, int>> neighbors;
-
-    for (int dr : {-1, 1})
-    {
-        int nr = row + dr;
-        if (nr >= 0 && nr < H)
-        {
-            neighbors.push_back({nr, col});
-        }
-    }
-
-    std::vector<int> sideRows;
-    if (col % 2 == 0)
-        sideRows = {row, row + 1};
-    else
-        sideRows = {row - 1, row};
-
-    for (int dc : {-1, 1})
-    {
-        int nc = (col + dc + L) % L;
-        for (int nr : sideRows)
-        {
-            if (nr >= 0 && nr < H)
-            {
-                neighbors.push_back({nr, nc});
-            }
-        }
-    }
-
-    return neighbors;
-}
-
-bool placePuyo(std::vector<int> &lattice, bool *movedSites,
-               std::uniform_int_distribution<> &dis_l, std::discrete_distribution<> &species_dist, int L, int H)
-{
-    int col = dis_l(gen);
-    if (col < 0 || col >= L)
-        return false;
-
-    int species = species_dist(gen) + 1;
-
-    for (int row = H - 1; row >= 0; --row)
-    {
-        int pos = index2D(row, col, L);
-        if (lattice[pos] == 0)
-        {
-            lattice[pos] = species;
-            movedSites[pos] = true;
-            return true;
-        }
-    }
-
-    return false;
-}
-
-int annihilatePuyo(std::vector<int> &lattice, bool *movedSites,
-                   int L, int H, int &avalancheCount)
-{
-    std::vector<bool> visited(H * L, false);
-    int totalEliminated = 0;
-
-    for (int row = 0; row < H; ++row)
-    {
-        for (int col = 0; col < L; ++col)
-        {
-            int start = index2D(row, col, L);
-            if (movedSites[start] && !visited[start] && lattice[start] != 0)
-            {
-                std::vector<std::pair<int, int>> cluster;
-                std::queue<std::pair<int, int>> q;
-                q.push({row, col});
-                visited[start] = true;
-                int species = lattice[start];
-
-                while (!q.empty())
-                {
-                    auto [r, c] = q.front();
-                    q.pop();
-                    cluster.push_back({r, c});
-
-                    for (auto [nr, nc] : getNeighbors(r, c, L, H))
-                    {
-                        int next = index2D(nr, nc, L);
-                        if (!visited[next] && lattice[next] == species)
-                        {
-                            q.push({nr, nc});
-                            visited[next] = true;
-                        }
-                    }
-                }
-
-                if (cluster.size() > 1)
-                {
-                    for (auto [r, c] : cluster)
-                    {
-                        int pos = index2D(r, c, L);
-                        lattice[pos] = 0;
-                        movedSites[pos] = false;
-                    }
-                    totalEliminated += cluster.size();
-                    ++avalancheCount;
-                }
-            }
-        }
-    }
-    return totalEliminated;
-}
-
-void fall(std::vector<int> &lattice, bool *movedSites, int L, int H)
-{
-    std::unique_ptr<bool[]> newMovedSites(new bool[H * L]());
-
-    for (int col = 0; col < L; ++col)
-    {
-        int writeRow = H - 1;
-        for (int row = H - 1; row >= 0; --row)
-        {
-            int src = index2D(row, col, L);
-            if (lattice[src] != 0)
-            {
-                if (writeRow != row)
-                {
-                    int dst = index2D(writeRow, col, L);
-                    lattice[dst] = lattice[src];
-                    lattice[src] = 0;
-                    newMovedSites[dst] = true;
-                }
-                writeRow--;
-            }
-        }
-    }
-
-    for (int i = 0; i < H * L; ++i)
-        movedSites[i] = newMovedSites[i];
-}
-
 void run(std::ofstream &file, int L, double N_SPECIES, int STEPS_PER_LATTICEPOINT)
 {
     std::discrete_distribution<> species_dist = createSpeciesDistribution(N_SPECIES);
@@ -195,71 +54,28 @@ void run(std::ofstream &file, int L, double N_SPECIES, int STEPS_PER_LATTICEPOIN
         random_species[drop] = species_dist(gen) + 1;
     }
 
-    std::vector<int> lattice(H * L, 0);
-    std::unique_ptr<bool[]> movedSites(new bool[H * L]());
+    // column heights, moved-site seeds, stamped BFS, precomputed hex neighbours (hexPile.h)
+    HexPile pile(L, H, static_cast<int>(species_dist.probabilities().size()));
+    HexPile::Chain chain;
 
-    int drop = 0;
     for (int i = 0; i < L * STEPS_PER_LATTICEPOINT; ++i)
     {
-        int col = random_columns[drop];
-        int species = random_species[drop];
-        ++drop;
-
-        bool placed = false;
-        for (int row = H - 1; row >= 0; --row)
-        {
-            int pos = index2D(row, col, L);
-            if (lattice[pos] == 0)
-            {
-                lattice[pos] = species;
-                movedSites[pos] = true;
-                placed = true;
-                break;
-            }
-        }
-        if (!placed)
+        if (!pile.drop(random_columns[i], random_species[i], chain))
             continue;
 
-        int avalancheCount = 0;
-        int totalEliminated = 0;
-
-        while (true)
-        {
-            int eliminated = annihilatePuyo(lattice, movedSites.get(), L, H, avalancheCount);
-            totalEliminated += eliminated;
-
-            std::unique_ptr<bool[]> newMovedSites(new bool[H * L]());
-            fall(lattice, newMovedSites.get(), L, H);
-
-            bool same = true;
-            for (int idx = 0; idx < H * L; ++idx)
-            {
-                if (newMovedSites[idx] != movedSites[idx])
-                {
-                    same = false;
-                    break;
-                }
-            }
-
-            if (same)
-                break;
-
-            for (int idx = 0; idx < H * L; ++idx)
-                movedSites[idx] = newMovedSites[idx];
-        }
-
         // Only write if there was an avalanche
-        if (avalancheCount > 0) {
+        if (chain.clusters > 0) {
             file << std::fixed << std::setprecision(6)
                  << static_cast<double>(i) / L << "\t"
-                 << avalancheCount << "\t"
-                 << totalEliminated << "\n";
+                 << chain.clusters << "\t"
+                 << chain.eliminated << "\n";
         }
     }
 }
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int L = DEFAULT_L;
     double N_SPECIES = DEFAULT_N_SPECIES;
     int STEPS_PER_LATTICEPOINT = DEFAULT_STEPS_PER_LATTICEPOINT;
@@ -272,10 +88,11 @@ int main(int argc, char *argv[])
         STEPS_PER_LATTICEPOINT = std::stoi(argv[3]);
     if (argc > 4)
         SIM_NO = std::stoi(argv[4]);
+    gen = rngArgs.rng(SIM_NO);
 
     std::filesystem::path exeDir = std::filesystem::path(argv[0]).parent_path();
     std::ostringstream fileNameStream;
-    fileNameStream << "L_" << L << "_N_" << std::defaultfloat << N_SPECIES << "_" << SIM_NO << ".tsv";
+    fileNameStream << "L_" << L << "_N_" << std::defaultfloat << N_SPECIES << "_" << SIM_NO << rngArgs.keySuffix() << ".tsv";
     std::filesystem::path filePath = exeDir / "outputs" / "avalanche2D" / fileNameStream.str();
 
     std::filesystem::create_directories(filePath.parent_path());
@@ -0,0 +1,157 @@
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <iomanip>
+#include <iostream>
+#include <random>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "../streamRng.h"
+#include "langmuirPile.h"
+
+// Throughput of the langmuirRandom pile per reaction kernel, at N_COLORS = 16,
+// 128 and 1024 (the density scans run N = 128).  Each point builds J the way
+// finalMass does, draws the finalMass drop sequence once and replays it
+// through
+//
+//   bitset : LangmuirPile (ReactionMatrix: 64-bit-word rows, partner mask)
+//   nested : the same pile with the old J[a][b] lookup on vector<vector<bool>>
+//            and a BFS from every moved site
+//
+// checks both end with the same mass, and prints the best of REPEATS wall
+// times of the drop loop in million drops per second (building J, O(N^2),
+// is per run and the same for both).  Nothing is written to disk.
+//
+//     benchPile [L] [STEPS] [REPEATS] [--seed S]
+
+#pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
+#pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
+
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
+
+constexpr int DEFAULT_L = 64;
+constexpr int DEFAULT_N_STEPS = 1000;
+constexpr int DEFAULT_REPEATS = 3;
+const std::vector<int> N_COLORS = {16, 128, 1024};
+const std::vector<double> DENSITIES = {0.02, 0.1, 0.25, 0.5};
+
+// the lookup the engines used before ReactionMatrix
+struct NestedBoolRule
+{
+    struct Row
+    {
+        const std::vector<std::vector<bool>> *J;
+        int a;
+    };
+
+    explicit NestedBoolRule(const std::vector<std::vector<bool>> &J_) : J(J_) {}
+
+    int size() const { return static_cast<int>(J.size()); }
+    bool hasPartner(int a) const { return a != 0; }
+    Row row(int a) const { return Row{&J, a}; }
+    static bool reacts(Row r, int b) { return (*r.J)[r.a][b]; }
+
+    std::vector<std::vector<bool>> J;
+};
+
+std::vector<std::vector<bool>> createInteractionMatrix(double density, int nColors)
+{
+    density = std::clamp(density, 0.0, 1.0);
+
+    std::vector<std::pair<int, int>> upperEntries;
+    upperEntries.reserve(nColors * (nColors + 1) / 2);
+    for (int i = 1; i <= nColors; ++i)
+    {
+        for (int j = i; j <= nColors; ++j)
+            upperEntries.emplace_back(i, j);
+    }
+
+    std::shuffle(upperEntries.begin(), upperEntries.end(), gen);
+
+    int onesTarget = static_cast<int>(std::llround(density * static_cast<double>(upperEntries.size())));
+    onesTarget = std::clamp(onesTarget, 0, static_cast<int>(upperEntries.size()));
+
+    std::vector<std::vector<bool>> J(nColors + 1, std::vector<bool>(nColors + 1, false));
+    for (int idx = 0; idx < onesTarget; ++idx)
+    {
+        auto [i, j] = upperEntries[idx];
+        J[i][j] = true;
+        J[j][i] = true;
+    }
+    return J;
+}
+
+// best drop-loop wall time (s) over `repeats` replays, and the final mass
+template <class Rule>
+std::pair<double, long long> timePile(int L, int H, const std::vector<std::vector<bool>> &J,
+                                      const std::vector<int> &cols, const std::vector<int> &species, int repeats)
+{
+    double best = 1e300;
+    long long mass = 0;
+    for (int r = 0; r < repeats; ++r)
+    {
+        BasicLangmuirPile<Rule> pile(L, H, J);
+        typename BasicLangmuirPile<Rule>::Chain chain;
+        auto t0 = std::chrono::steady_clock::now();
+        for (size_t i = 0; i < cols.size(); ++i)
+            pile.drop(cols[i], species[i], chain);
+        mass = pile.mass();
+        best = std::min(best, std::chrono::duration<double>(std::chrono::steady_clock::now() - t0).count());
+    }
+    return {best, mass};
+}
+
+int main(int argc, char *argv[])
+{
+    RngArgs rngArgs = takeRngArgs(argc, argv);
+    int L = DEFAULT_L;
+    int N_STEPS = DEFAULT_N_STEPS;
+    int REPEATS = DEFAULT_REPEATS;
+    if (argc > 1)
+        L = std::stoi(argv[1]);
+    if (argc > 2)
+        N_STEPS = std::stoi(argv[2]);
+    if (argc > 3)
+        REPEATS = std::stoi(argv[3]);
+
+    std::cout << "L = " << L << ", steps = " << N_STEPS << ", best of " << REPEATS << "\n";
+    std::cout << "N\trho\tmass\tbitset_Mdrops/s\tnested_Mdrops/s\tspeedup\n";
+
+    int point = 0;
+    for (int nColors : N_COLORS)
+    {
+        for (double density : DENSITIES)
+        {
+            gen = rngArgs.rng(point++);
+            std::vector<std::vector<bool>> J = createInteractionMatrix(density, nColors);
+
+            int total_drops = (N_STEPS + 1) * L;
+            std::uniform_int_distribution<> dis_l(0, L - 1);
+            std::uniform_int_distribution<> dis_species(1, nColors);
+            std::vector<int> cols(total_drops), species(total_drops);
+            for (int drop = 0; drop < total_drops; ++drop)
+            {
+                cols[drop] = dis_l(gen);
+                species[drop] = dis_species(gen);
+            }
+
+            auto [tBit, massBit] = timePile<ReactionMatrix>(L, N_STEPS, J, cols, species, REPEATS);
+            auto [tRef, massRef] = timePile<NestedBoolRule>(L, N_STEPS, J, cols, species, REPEATS);
+            if (massBit != massRef)
+            {
+                std::cerr << "kernels disagree at N = " << nColors << ", rho = " << density
+                          << ": " << massBit << " vs " << massRef << "\n";
+                return 1;
+            }
+
+            std::cout << nColors << "\t" << std::fixed << std::setprecision(2) << density << "\t"
+                      << massBit << "\t" << std::setprecision(1)
+                      << total_drops / tBit * 1e-6 << "\t" << total_drops / tRef * 1e-6 << "\t"
+                      << std::setprecision(2) << tRef / tBit << "\n";
+        }
+    }
+    return 0;
+}
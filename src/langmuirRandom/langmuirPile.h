@@ -0,0 +1,222 @@
+#pragma once
+// The deposition pile of the langmuirRandom engines (finalMass, massVsTime2D,
+// onlyAvalanche2D, 1D/finalMass), with per-drop cost O(active region).
+//
+// The old engines allocated a fresh H*L visited vector for every seed of
+// annihilatePuyo, scanned the whole lattice for moved sites, rebuilt the moved
+// flags over the whole lattice in fall() and compared two H*L flag arrays to
+// decide whether a cascade had ended: O(H*L) several times per drop, with
+// H = STEPS.  This is the layout puyoRoughnessScaling/puyoEngine.h uses
+// (slopeDistFast.cpp), with the cluster rule generalised to the J matrix:
+//
+//   colH[c]    : column heights (columns are always compact) -> O(1) placement,
+//                mass = sum colH, height = max colH
+//   movedList  : sites that just landed or fell -> the BFS seeds, no scan
+//   visitedGen : generation-stamped BFS -> no per-seed allocation or clearing
+//   dirtyCols  : only the columns something was eliminated from are compacted,
+//                and only above their lowest hole
+//
+// A cluster is a connected component of the graph whose edges join occupied
+// neighbours a, b with J[species a][species b]; J is symmetric, so components
+// are well defined and one stamp per generation finds each once, however many
+// moved sites it holds.  Every component of size > 1 that contains a moved site
+// is eliminated (the old `hasReaction`: a J-edge from a site always pulls its
+// neighbour into the component).  A cascade ends when nothing fell -- the old
+// loop's "new moved flags equal the old" test, which after an elimination can
+// only hold with both empty.  The pile is the full H rows (a J cluster can
+// reach arbitrarily deep).
+//
+// J itself is a ReactionMatrix: one bitset row per species in 64-bit words, so
+// the test in the innermost BFS loop is a load, a shift and an AND on the row
+// of the site being expanded (hoisted out of its four neighbour visits)
+// instead of two indirections and a bit extraction in vector<vector<bool>>.
+// It also keeps, per species, whether it reacts with anything at all: a moved
+// site without partners is a cluster of one and is skipped without a BFS,
+// which is most seeds at the low densities of the density scans.  Species are
+// stored as 16-bit cells, so N_COLORS = 1024 (and beyond) fits.
+//
+// With the same generator the old engines' outputs are reproduced exactly.
+// benchPile.cpp times the pile at N = 16, 128 and 1024 against the
+// vector<vector<bool>> lookup (any rule with the ReactionMatrix interface
+// plugs into BasicLangmuirPile).
+//
+//     LangmuirPile pile(L, H, J);
+//     LangmuirPile::Chain ch;
+//     if (pile.drop(col, species, ch)) ... ch.clusters, ch.eliminated
+//     pile.mass(), pile.maxHeight()
+#include <algorithm>
+#include <cstdint>
+#include <stdexcept>
+#include <vector>
+
+// symmetric J over species 1..n-1 (0 is empty and reacts with nothing)
+class ReactionMatrix
+{
+public:
+    explicit ReactionMatrix(const std::vector<std::vector<bool>> &J)
+        : n(static_cast<int>(J.size())), words((n + 63) / 64),
+          rows(static_cast<size_t>(n) * words, 0), partner(n, 0)
+    {
+        for (int i = 1; i < n; ++i)
+            for (int j = 1; j < n; ++j)
+                if (J[i][j])
+                {
+                    rows[static_cast<size_t>(i) * words + (j >> 6)] |= uint64_t(1) << (j & 63);
+                    partner[i] = 1;
+                }
+    }
+
+    using Row = const uint64_t *;
+
+    int size() const { return n; }
+    bool hasPartner(int a) const { return partner[a]; }
+
+    // the row of species a; reacts(row(a), b) == J[a][b]
+    Row row(int a) const { return &rows[static_cast<size_t>(a) * words]; }
+    static bool reacts(Row r, int b) { return (r[b >> 6] >> (b & 63)) & 1; }
+
+private:
+    int n, words;
+    std::vector<uint64_t> rows;
+    std::vector<uint8_t> partner;
+};
+
+template <class Rule>
+class BasicLangmuirPile
+{
+public:
+    struct Chain
+    {
+        int clusters = 0;   // components eliminated, summed over the cascade
+        int eliminated = 0; // sites eliminated
+    };
+
+    int L, H;
+
+    BasicLangmuirPile(int L_, int H_, const std::vector<std::vector<bool>> &J)
+        : L(L_), H(H_), rule(J), lat(static_cast<size_t>(L_) * H_, 0),
+          visitedGen(static_cast<size_t>(L_) * H_, 0), colH(L_, 0), colDirtyGen(L_, 0), lowestElim(L_, 0)
+    {
+        if (rule.size() > 65536)
+            throw std::invalid_argument("LangmuirPile: at most 65535 species");
+    }
+
+    // one block onto column `col` and its cascade to rest; false if the column is full
+    bool drop(int col, int species, Chain &ch)
+    {
+        ch = Chain{};
+        if (colH[col] >= H)
+            return false;
+        int pos = colH[col] * L + col;
+        lat[pos] = static_cast<uint16_t>(species);
+        ++colH[col];
+
+        movedList.clear();
+        movedList.push_back(pos);
+        while (true)
+        {
+            annihilate(ch);
+            fallDirty();
+            if (newMovedList.empty())
+                break;
+            movedList.swap(newMovedList);
+        }
+        return true;
+    }
+
+    long long mass() const
+    {
+        long long m = 0;
+        for (int h : colH)
+            m += h;
+        return m;
+    }
+
+    int maxHeight() const { return *std::max_element(colH.begin(), colH.end()); }
+
+private:
+    Rule rule;
+    std::vector<uint16_t> lat;
+    std::vector<int> visitedGen, colH, colDirtyGen, lowestElim;
+    std::vector<int> movedList, newMovedList, dirtyCols, component;
+    int stamp = 0;
+
+    void visit(int nb, typename Rule::Row row, int g)
+    {
+        if (Rule::reacts(row, lat[nb]) && visitedGen[nb] != g)
+        {
+            visitedGen[nb] = g;
+            component.push_back(nb);
+        }
+    }
+
+    void annihilate(Chain &ch)
+    {
+        int g = ++stamp;
+        dirtyCols.clear();
+        for (int seed : movedList)
+        {
+            if (!rule.hasPartner(lat[seed]) || visitedGen[seed] == g)
+                continue;
+            // the component doubles as the BFS queue
+            component.clear();
+            component.push_back(seed);
+            visitedGen[seed] = g;
+            for (size_t head = 0; head < component.size(); ++head)
+            {
+                int cur = component[head];
+                int y = cur / L, col = cur - y * L, row = y * L;
+                typename Rule::Row r = rule.row(lat[cur]);
+                if (y > 0)
+                    visit(cur - L, r, g);
+                if (y + 1 < H)
+                    visit(cur + L, r, g);
+                visit(row + (col == 0 ? L - 1 : col - 1), r, g);
+                visit(row + (col == L - 1 ? 0 : col + 1), r, g);
+            }
+            if (component.size() > 1)
+            {
+                for (int id : component)
+                {
+                    lat[id] = 0;
+                    int y = id / L, col = id - y * L;
+                    if (colDirtyGen[col] != g)
+                    {
+                        colDirtyGen[col] = g;
+                        lowestElim[col] = y;
+                        dirtyCols.push_back(col);
+                    }
+                    else if (y < lowestElim[col])
+                        lowestElim[col] = y;
+                }
+                ++ch.clusters;
+                ch.eliminated += static_cast<int>(component.size());
+            }
+        }
+    }
+
+    // compact each dirty column above its lowest hole; blocks below are inert
+    void fallDirty()
+    {
+        newMovedList.clear();
+        for (int c : dirtyCols)
+        {
+            int write = lowestElim[c];
+            for (int y = write + 1; y < colH[c]; ++y)
+            {
+                int id = y * L + c;
+                if (lat[id] != 0)
+                {
+                    int dst = write * L + c;
+                    lat[dst] = lat[id];
+                    lat[id] = 0;
+                    newMovedList.push_back(dst);
+                    ++write;
+                }
+            }
+            colH[c] = write;
+        }
+    }
+};
+
+using LangmuirPile = BasicLangmuirPile<ReactionMatrix>;
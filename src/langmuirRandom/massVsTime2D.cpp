@@ -5,9 +5,11 @@
 #include <fstream>
 #include <sstream>
 #include <filesystem>
-#include <queue>
 #include <memory>
 
+#include "../streamRng.h"
+#include "langmuirPile.h"
+
 // #pragma GCC optimize("Ofast","inline","fast-math","unroll-loops","no-stack-protector")
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
@@ -15,19 +17,14 @@
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 // Define constants
 constexpr int DEFAULT_L = 128;       // side length of the square lattice
 constexpr int DEFAULT_N_SPECIES = 6;
 constexpr int DEFAULT_STEPS_PER_LATTICEPOINT = 128;
 
-inline int index2D(int row, int col, int L)
-{
-    return row * L + col;
-}
-
 std::vector<std::vector<bool>> createInteractionMatrix(int nSpecies)
 {
     std::vector<std::vector<bool>> J(nSpecies + 1, std::vector<bool>(nSpecies + 1, false));
@@ -74,130 +71,6 @@ void writeInteractionMatrix(std::ofstream &file, const std::vector<std::vector<b
     }
 }
 
-std::vector<std::pair<int, int>> getNeighbors(int row, int col, int L, int H)
-{
-    std::vector<std::pair<int, int>> neighbors;
-
-    if (row > 0)
-        neighbors.push_back({row - 1, col});
-    if (row + 1 < H)
-        neighbors.push_back({row + 1, col});
-
-    neighbors.push_back({row, (col - 1 + L) % L});
-    neighbors.push_back({row, (col + 1) % L});
-
-    return neighbors;
-}
-
-int annihilatePuyo(std::vector<int> &lattice, bool *movedSites,
-                   const std::vector<std::vector<bool>> &J, int L, int H)
-{
-    std::vector<bool> seedProcessed(H * L, false);
-    std::vector<bool> toEliminate(H * L, false);
-    int totalEliminated = 0;
-
-    for (int row = 0; row < H; ++row)
-    {
-        for (int col = 0; col < L; ++col)
-        {
-            int start = index2D(row, col, L);
-            if (!movedSites[start] || seedProcessed[start] || lattice[start] == 0)
-                continue;
-
-            std::vector<bool> visited(H * L, false);
-            std::vector<int> component;
-            std::queue<int> q;
-            q.push(start);
-            visited[start] = true;
-            seedProcessed[start] = true;
-
-            bool hasReaction = false;
-
-            while (!q.empty())
-            {
-                int current = q.front();
-                q.pop();
-                component.push_back(current);
-
-                int r = current / L;
-                int c = current % L;
-                int speciesCurrent = lattice[current];
-
-                for (auto [nr, nc] : getNeighbors(r, c, L, H))
-                {
-                    int next = index2D(nr, nc, L);
-                    int speciesNext = lattice[next];
-                    if (speciesNext == 0)
-                        continue;
-
-                    if (!J[speciesCurrent][speciesNext])
-                        continue;
-
-                    hasReaction = true;
-                    if (!visited[next])
-                    {
-                        visited[next] = true;
-                        q.push(next);
-                        if (movedSites[next])
-                            seedProcessed[next] = true;
-                    }
-                }
-            }
-
-            if (hasReaction)
-            {
-                for (int idx : component)
-                {
-                    if (!toEliminate[idx])
-                    {
-                        toEliminate[idx] = true;
-                        ++totalEliminated;
-                    }
-                }
-            }
-        }
-    }
-
-    for (int idx = 0; idx < H * L; ++idx)
-    {
-        if (toEliminate[idx])
-        {
-            lattice[idx] = 0;
-            movedSites[idx] = false;
-        }
-    }
-
-    return totalEliminated;
-}
-
-void fall(std::vector<int> &lattice, bool *movedSites, int L, int H)
-{
-    std::unique_ptr<bool[]> newMovedSites(new bool[H * L]());
-
-    for (int col = 0; col < L; ++col)
-    {
-        int writeRow = H - 1;
-        for (int row = H - 1; row >= 0; --row)
-        {
-            int src = index2D(row, col, L);
-            if (lattice[src] != 0)
-            {
-                if (writeRow != row)
-                {
-                    int dst = index2D(writeRow, col, L);
-                    lattice[dst] = lattice[src];
-                    lattice[src] = 0;
-                    newMovedSites[dst] = true;
-                }
-                writeRow--;
-            }
-        }
-    }
-
-    for (int i = 0; i < H * L; ++i)
-        movedSites[i] = newMovedSites[i];
-}
-
 void run(std::ofstream &file, int L, int N_SPECIES, int STEPS_PER_LATTICEPOINT)
 {
     std::uniform_int_distribution<> dis_l(0, L - 1);
@@ -217,72 +90,17 @@ void run(std::ofstream &file, int L, int N_SPECIES, int STEPS_PER_LATTICEPOINT)
         random_species[drop] = dis_species(gen);
     }
 
-    std::vector<int> lattice(H * L, 0);
-    std::unique_ptr<bool[]> movedSites(new bool[H * L]());
+    // column heights, moved-site seeds, stamped J-cluster BFS (langmuirPile.h)
+    LangmuirPile pile(L, H, J);
+    LangmuirPile::Chain chain;
 
     int drop = 0;
     for (int step = 0; step <= STEPS_PER_LATTICEPOINT; ++step)
     {
-        for (int i = 0; i < L; ++i)
-        {
-            int col = random_columns[drop];
-            int species = random_species[drop];
-            ++drop;
-
-            bool placed = false;
-            for (int row = H - 1; row >= 0; --row)
-            {
-                int pos = index2D(row, col, L);
-                if (lattice[pos] == 0)
-                {
-                    lattice[pos] = species;
-                    movedSites[pos] = true;
-                    placed = true;
-                    break;
-                }
-            }
-            if (!placed)
-                continue;
-
-            while (true)
-            {
-                annihilatePuyo(lattice, movedSites.get(), J, L, H);
-                std::unique_ptr<bool[]> newMovedSites(new bool[H * L]());
-                fall(lattice, newMovedSites.get(), L, H);
-
-                bool same = true;
-                for (int idx = 0; idx < H * L; ++idx)
-                {
-                    if (newMovedSites[idx] != movedSites[idx])
-                    {
-                        same = false;
-                        break;
-                    }
-                }
-
-                if (same)
-                    break;
-
-                for (int idx = 0; idx < H * L; ++idx)
-                    movedSites[idx] = newMovedSites[idx];
-            }
-        }
-
-        int filled_cells = 0;
-        int max_height = 0;
-        for (int col = 0; col < L; ++col)
-        {
-            for (int row = 0; row < H; ++row)
-            {
-                if (lattice[index2D(row, col, L)] != 0)
-                {
-                    filled_cells++;
-                    max_height = std::max(max_height, H - row);
-                }
-            }
-        }
+        for (int i = 0; i < L; ++i, ++drop)
+            pile.drop(random_columns[drop], random_species[drop], chain);
 
-        file << step << "\t" << filled_cells << "\t" << max_height << "\n";
+        file << step << "\t" << pile.mass() << "\t" << pile.maxHeight() << "\n";
 
         std::cout << "Progress: " << std::fixed << std::setprecision(2)
                   << static_cast<double>(step) / STEPS_PER_LATTICEPOINT * 100 << "%\r" << std::flush;
@@ -291,6 +109,7 @@ void run(std::ofstream &file, int L, int N_SPECIES, int STEPS_PER_LATTICEPOINT)
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int L = DEFAULT_L;
     int N_SPECIES = DEFAULT_N_SPECIES;
     int STEPS_PER_LATTICEPOINT = DEFAULT_STEPS_PER_LATTICEPOINT;
@@ -303,9 +122,10 @@ int main(int argc, char *argv[])
         STEPS_PER_LATTICEPOINT = std::stoi(argv[3]);
     if (argc > 4)
         SIM_NO = std::stoi(argv[4]);
+    gen = rngArgs.rng(SIM_NO);
 
     std::filesystem::path exeDir = std::filesystem::path(argv[0]).parent_path();
-    std::filesystem::path filePath = exeDir / "outputs" / "massVsTime2D" / ("L_" + std::to_string(L) + "_N_" + std::to_string(N_SPECIES) + "_steps_" + std::to_string(STEPS_PER_LATTICEPOINT) + "_sim_" + std::to_string(SIM_NO) + ".tsv");
+    std::filesystem::path filePath = exeDir / "outputs" / "massVsTime2D" / ("L_" + std::to_string(L) + "_N_" + std::to_string(N_SPECIES) + "_steps_" + std::to_string(STEPS_PER_LATTICEPOINT) + "_sim_" + std::to_string(SIM_NO) + rngArgs.keySuffix() + ".tsv");
 
     std::filesystem::create_directories(filePath.parent_path());
 
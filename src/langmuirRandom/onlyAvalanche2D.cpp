@@ -5,30 +5,27 @@
 #include <fstream>
 #include <sstream>
 #include <filesystem>
-#include <queue>
 #include <algorithm>
 #include <cmath>
 #include <memory>
 
+#include "../streamRng.h"
+#include "langmuirPile.h"
+
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
 
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 constexpr int DEFAULT_L = 128;
 constexpr int DEFAULT_N_SPECIES = 6;
 constexpr int DEFAULT_STEPS_PER_LATTICEPOINT = 128;
 constexpr double DEFAULT_RHO = 0.5;
 
-inline int index2D(int row, int col, int L)
-{
-    return row * L + col;
-}
-
 std::vector<std::vector<bool>> createInteractionMatrix(int nSpecies, double rho)
 {
     rho = std::clamp(rho, 0.0, 1.0);
@@ -86,131 +83,6 @@ void writeInteractionMatrix(std::ofstream &file, const std::vector<std::vector<b
     }
 }
 
-std::vector<std::pair<int, int>> getNeighbors(int row, int col, int L, int H)
-{
-    std::vector<std::pair<int, int>> neighbors;
-
-    if (row > 0)
-        neighbors.push_back({row - 1, col});
-    if (row + 1 < H)
-        neighbors.push_back({row + 1, col});
-
-    neighbors.push_back({row, (col - 1 + L) % L});
-    neighbors.push_back({row, (col + 1) % L});
-
-    return neighbors;
-}
-
-int annihilatePuyo(std::vector<int> &lattice, bool *movedSites,
-                   const std::vector<std::vector<bool>> &J, int L, int H, int &avalancheCount)
-{
-    std::vector<bool> seedProcessed(H * L, false);
-    std::vector<bool> toEliminate(H * L, false);
-    int totalEliminated = 0;
-
-    for (int row = 0; row < H; ++row)
-    {
-        for (int col = 0; col < L; ++col)
-        {
-            int start = index2D(row, col, L);
-            if (!movedSites[start] || seedProcessed[start] || lattice[start] == 0)
-                continue;
-
-            std::vector<bool> visited(H * L, false);
-            std::vector<int> component;
-            std::queue<int> q;
-            q.push(start);
-            visited[start] = true;
-            seedProcessed[start] = true;
-
-            bool hasReaction = false;
-
-            while (!q.empty())
-            {
-                int current = q.front();
-                q.pop();
-                component.push_back(current);
-
-                int r = current / L;
-                int c = current % L;
-                int speciesCurrent = lattice[current];
-
-                for (auto [nr, nc] : getNeighbors(r, c, L, H))
-                {
-                    int next = index2D(nr, nc, L);
-                    int speciesNext = lattice[next];
-                    if (speciesNext == 0)
-                        continue;
-
-                    if (!J[speciesCurrent][speciesNext])
-                        continue;
-
-                    hasReaction = true;
-                    if (!visited[next])
-                    {
-                        visited[next] = true;
-                        q.push(next);
-                        if (movedSites[next])
-                            seedProcessed[next] = true;
-                    }
-                }
-            }
-
-            if (hasReaction)
-            {
-                ++avalancheCount;
-                for (int idx : component)
-                {
-                    if (!toEliminate[idx])
-                    {
-                        toEliminate[idx] = true;
-                        ++totalEliminated;
-                    }
-                }
-            }
-        }
-    }
-
-    for (int idx = 0; idx < H * L; ++idx)
-    {
-        if (toEliminate[idx])
-        {
-            lattice[idx] = 0;
-            movedSites[idx] = false;
-        }
-    }
-
-    return totalEliminated;
-}
-
-void fall(std::vector<int> &lattice, bool *movedSites, int L, int H)
-{
-    std::unique_ptr<bool[]> newMovedSites(new bool[H * L]());
-
-    for (int col = 0; col < L; ++col)
-    {
-        int writeRow = H - 1;
-        for (int row = H - 1; row >= 0; --row)
-        {
-            int src = index2D(row, col, L);
-            if (lattice[src] != 0)
-            {
-                if (writeRow != row)
-                {
-                    int dst = index2D(writeRow, col, L);
-                    lattice[dst] = lattice[src];
-                    lattice[src] = 0;
-                    newMovedSites[dst] = true;
-                }
-                writeRow--;
-            }
-        }
-    }
-
-    for (int i = 0; i < H * L; ++i)
-        movedSites[i] = newMovedSites[i];
-}
-
 void run(std::ofstream &file, int L, int N_SPECIES, int STEPS_PER_LATTICEPOINT, double rho)
 {
     std::uniform_int_distribution<> dis_l(0, L - 1);
@@ -231,71 +103,28 @@ void run(std::ofstream &file, int L, int N_SPECIES, int STEPS_PER_LATTICEPOINT,
         random_species[drop] = dis_species(gen);
     }
 
-    std::vector<int> lattice(H * L, 0);
-    std::unique_ptr<bool[]> movedSites(new bool[H * L]());
+    // column heights, moved-site seeds, stamped J-cluster BFS (langmuirPile.h)
+    LangmuirPile pile(L, H, J);
+    LangmuirPile::Chain chain;
 
-    int drop = 0;
-    for (int i = 0; i < L * STEPS_PER_LATTICEPOINT; ++i)
+    for (int i = 0; i < total_drops; ++i)
     {
-        int col = random_columns[drop];
-        int species = random_species[drop];
-        ++drop;
-
-        bool placed = false;
-        for (int row = H - 1; row >= 0; --row)
-        {
-            int pos = index2D(row, col, L);
-            if (lattice[pos] == 0)
-            {
-                lattice[pos] = species;
-                movedSites[pos] = true;
-                placed = true;
-                break;
-            }
-        }
-        if (!placed)
+        if (!pile.drop(random_columns[i], random_species[i], chain))
             continue;
 
-        int avalancheCount = 0;
-        int totalEliminated = 0;
-
-        while (true)
-        {
-            int eliminated = annihilatePuyo(lattice, movedSites.get(), J, L, H, avalancheCount);
-            totalEliminated += eliminated;
-
-            std::unique_ptr<bool[]> newMovedSites(new bool[H * L]());
-            fall(lattice, newMovedSites.get(), L, H);
-
-            bool same = true;
-            for (int idx = 0; idx < H * L; ++idx)
-            {
-                if (newMovedSites[idx] != movedSites[idx])
-                {
-                    same = false;
-                    break;
-                }
-            }
-
-            if (same)
-                break;
-
-            for (int idx = 0; idx < H * L; ++idx)
-                movedSites[idx] = newMovedSites[idx];
-        }
-
         // Only write if there was an avalanche
-        if (avalancheCount > 0) {
+        if (chain.clusters > 0) {
             file << std::fixed << std::setprecision(6)
                  << static_cast<double>(i) / L << "\t"
-                 << avalancheCount << "\t"
-                 << totalEliminated << "\n";
+                 << chain.clusters << "\t"
+                 << chain.eliminated << "\n";
         }
     }
 }
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int L = DEFAULT_L;
     int N_SPECIES = DEFAULT_N_SPECIES;
     int STEPS_PER_LATTICEPOINT = DEFAULT_STEPS_PER_LATTICEPOINT;
@@ -311,6 +140,7 @@ int main(int argc, char *argv[])
         RHO = std::stod(argv[4]);
     if (argc > 5)
         SIM_NO = std::stoi(argv[5]);
+    gen = rngArgs.rng(SIM_NO);
 
     RHO = std::clamp(RHO, 0.0, 1.0);
 
@@ -318,7 +148,7 @@ int main(int argc, char *argv[])
     std::ostringstream fileNameStream;
     fileNameStream << "L_" << L << "_N_" << N_SPECIES
                    << "_rho_" << std::fixed << std::setprecision(4) << RHO
-                   << "_" << SIM_NO << ".tsv";
+                   << "_" << SIM_NO << rngArgs.keySuffix() << ".tsv";
     std::filesystem::path filePath = exeDir / "outputs" / "avalanche2D" / fileNameStream.str();
 
     std::filesystem::create_directories(filePath.parent_path());
@@ -8,6 +8,8 @@
 #include <queue>
 #include <memory>
 
+#include "../../streamRng.h"
+
 // #pragma GCC optimize("Ofast","inline","fast-math","unroll-loops","no-stack-protector")
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
@@ -15,8 +17,8 @@
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 // Define constants
 constexpr int DEFAULT_L = 128;       // side length of the square lattice
@@ -247,6 +249,7 @@ void run(std::ofstream &file, int L, int N_SPECIES, int STEPS_PER_LATTICEPOINT)
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int L = DEFAULT_L;
     int N_SPECIES = DEFAULT_N_SPECIES;
     int STEPS_PER_LATTICEPOINT = DEFAULT_STEPS_PER_LATTICEPOINT;
@@ -259,9 +262,10 @@ int main(int argc, char *argv[])
         STEPS_PER_LATTICEPOINT = std::stoi(argv[3]);
     if (argc > 4)
         SIM_NO = std::stoi(argv[4]);
+    gen = rngArgs.rng(SIM_NO);
 
     std::filesystem::path exeDir = std::filesystem::path(argv[0]).parent_path();
-    std::filesystem::path filePath = exeDir / "outputs" / "slopeDist" / ("L_" + std::to_string(L) + "_N_" + std::to_string(N_SPECIES) + "_steps_" + std::to_string(STEPS_PER_LATTICEPOINT) + "_sim_" + std::to_string(SIM_NO) + ".tsv");
+    std::filesystem::path filePath = exeDir / "outputs" / "slopeDist" / ("L_" + std::to_string(L) + "_N_" + std::to_string(N_SPECIES) + "_steps_" + std::to_string(STEPS_PER_LATTICEPOINT) + "_sim_" + std::to_string(SIM_NO) + rngArgs.keySuffix() + ".tsv");
 
     std::filesystem::create_directories(filePath.parent_path());
 
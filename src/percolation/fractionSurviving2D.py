@@ -1,24 +1,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import cc3d
 from tqdm import tqdm
 
-
-def update(matrix, currentVictim):
-    # Make a copy of the matrix, with 0 set to currentVictim
-    copiedMatrix = matrix.copy()
-    copiedMatrix[copiedMatrix == 0] = currentVictim
-
-    # Find the connected components of the copied matrix
-    labels = cc3d.connected_components(copiedMatrix, connectivity=4)
-
-    # Look for the cluster at the boundaries of 0
-    boundaryCluster = labels[0, 0]
-
-    # Update the matrix
-    matrix[labels == boundaryCluster] = 0
-
-    return matrix
+from front import run_replicas
 
 
 def main():
@@ -33,35 +17,13 @@ def main():
     for idx, N_species in enumerate(N_species_values):
         ax = axes[idx]
         for L in L_array:
-            fractions_over_time = []
-            max_time_steps = 0  # Track the maximum number of steps for this system size
-
-            for _ in range(N_simulations):
-                matrix = np.random.randint(1, N_species + 1, (L, L))
-                matrix = np.pad(matrix, pad_width=1, mode='constant', constant_values=0)
-                victimOrder = np.arange(1, N_species + 1)
-
-                fractions = []
-                for t in range(max_steps):
-                    currentVictim = victimOrder[t % N_species]
-                    matrix = update(matrix, currentVictim)
-                    fraction = np.count_nonzero(matrix) / (L * L)  # Fraction of surviving elements
-                    fractions.append(fraction)
-
-                    if np.count_nonzero(matrix) == 0:
-                        break
-
-                max_time_steps = max(max_time_steps, len(fractions))
-                fractions_over_time.append(fractions)
-
-            # Truncate or pad all simulations to the maximum time steps
-            for i in range(len(fractions_over_time)):
-                fractions_over_time[i] = fractions_over_time[i][:max_time_steps]
-                if len(fractions_over_time[i]) < max_time_steps:
-                    fractions_over_time[i] += [0] * (max_time_steps - len(fractions_over_time[i]))
+            # All replicas together (front.py); extinct ones count as 0
+            matrices = np.random.randint(1, N_species + 1, (N_simulations, L, L))
+            traj = run_replicas(matrices, N_species, max_steps)
+            fractions_over_time = traj.alive / (L * L)  # Fraction of surviving elements
+            max_time_steps = fractions_over_time.shape[1]
 
             # Compute mean and standard deviation over simulations
-            fractions_over_time = np.array(fractions_over_time)
             mean_fractions = np.mean(fractions_over_time, axis=0)
             std_fractions = np.std(fractions_over_time, axis=0)
 
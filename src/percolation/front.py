@@ -0,0 +1,165 @@
+"""Incremental engine for the sequential-killing model, in any dimension.
+
+The scripts used to run `cc3d.connected_components` over the whole padded
+matrix, after a full copy, on every wave -- O(L^d) per wave even when the wave
+kills a handful of sites.  But the killed region only ever grows, and it is
+always connected to the boundary (a site dies only by touching it), so a wave
+of species v can only kill the v-sites touching the empty region and the
+v-clusters behind them.  This engine therefore keeps, per species, the FRONT:
+the living sites of that species with an empty (or boundary) nearest neighbour.
+Wave v floods breadth-first from front[v] through v-sites, each layer one set of
+vectorised NumPy operations; the sites it kills hand their other-species
+neighbours to those species' fronts.  A wave costs O(killed + front growth), a
+whole run O(L^d), and 3D sizes of several hundred become practical
+(L=400: 65 MB of species, the same again of front flags).
+
+Same result as the cc3d update: the component of {empty} u {victim} holding the
+padding becomes empty, with nearest-neighbour connectivity (cc3d's 4 in 2D,
+6 in 3D).
+
+    f = Front(matrix)            # unpadded d-dim array of species 1..N
+    killed = f.kill(victim)      # one wave; f.alive, f.count[s] afterwards
+
+Replicas of one (L, N) point run TOGETHER with batched=True: the leading axis
+indexes replicas, each padded on its own, so one kill() floods all of them in
+the same NumPy operations and kill/alive/count become per-replica arrays.
+run_replicas() records a whole trajectory that way (see Trajectories).
+"""
+from collections import namedtuple
+
+import numpy as np
+
+
+def _distinct(a):
+    """Sorted distinct values; np.unique's hash path is ~40x slower here."""
+    a = np.sort(a)
+    return a[np.concatenate(([True], a[1:] != a[:-1]))] if a.size else a
+
+
+class Front:
+    def __init__(self, matrix, batched=False):
+        matrix = np.asarray(matrix)
+        if matrix.max(initial=0) > 255:
+            raise ValueError("species must fit in uint8")
+        self.batched = batched
+        if not batched:
+            matrix = matrix[None]
+        self.replicas = matrix.shape[0]
+        self.shape = matrix.shape[1:]
+        # every replica gets a ring of empty padding: neighbours are then plain
+        # flat offsets, and no offset crosses from one replica into the next
+        padded = np.pad(matrix.astype(np.uint8), [(0, 0)] + [(1, 1)] * len(self.shape))
+        self.pshape = padded.shape
+        self.stride = int(np.prod(self.pshape[1:]))   # sites per replica
+        self.lat = padded.ravel()
+        strides = np.cumprod((1,) + self.pshape[:1:-1])[::-1]
+        self.offsets = np.concatenate([strides, -strides]).astype(np.int64)
+        self.inFront = np.zeros(self.lat.size, dtype=bool)
+        self._count = np.stack([np.bincount(r.ravel(), minlength=256) for r in padded]).astype(np.int64)
+        self._count[:, 0] = 0
+        self._alive = self._count.sum(axis=1)
+        self.front = [[] for _ in range(256)]   # per species: arrays of flat indices
+        # initial front: living sites next to the padding
+        edge = np.zeros(self.pshape, dtype=bool)
+        edge[(slice(None),) + (slice(1, -1),) * len(self.shape)] = True
+        edge[(slice(None),) + (slice(2, -2),) * len(self.shape)] = False
+        self._push(np.flatnonzero(edge & (padded > 0)))
+
+    @property
+    def alive(self):
+        """Living sites (per replica when batched)."""
+        return self._alive if self.batched else int(self._alive[0])
+
+    @property
+    def count(self):
+        """Living sites per species: count[s], or count[:, s] when batched."""
+        return self._count if self.batched else self._count[0]
+
+    def _push(self, sites):
+        """Add living sites, not yet on a front, to their species' fronts."""
+        sites = sites[~self.inFront[sites]]
+        if sites.size == 0:
+            return
+        sites = _distinct(sites)
+        self.inFront[sites] = True
+        sp = self.lat[sites]
+        order = np.argsort(sp, kind="stable")
+        sites, sp = sites[order], sp[order]
+        cuts = np.flatnonzero(np.diff(sp)) + 1
+        for chunk in np.split(sites, cuts):
+            self.front[self.lat[chunk[0]]].append(chunk)
+
+    def kill(self, victim):
+        """One wave of species `victim`; returns the number of sites killed
+        (per replica when batched)."""
+        victim = int(victim)
+        killed = np.zeros(self.replicas, dtype=np.int64)
+        if self.front[victim]:
+            layer = np.concatenate(self.front[victim])
+            self.front[victim] = []
+            self.inFront[layer] = False
+            while layer.size:
+                self.lat[layer] = 0
+                killed += np.bincount(layer // self.stride, minlength=self.replicas)
+                nb = (layer[:, None] + self.offsets).ravel()
+                sp = self.lat[nb]
+                self._push(nb[(sp != 0) & (sp != victim)])
+                layer = _distinct(nb[sp == victim])
+            self._count[:, victim] -= killed
+            self._alive -= killed
+        return killed if self.batched else int(killed[0])
+
+    def matrix(self):
+        """The current unpadded species matrix (0 = killed); per replica when
+        batched."""
+        inner = (slice(None),) + (slice(1, -1),) * len(self.shape)
+        m = self.lat.reshape(self.pshape)[inner].copy()
+        return m if self.batched else m[0]
+
+
+def waves_to_extinction(matrix, N_species, max_steps=10000):
+    """Waves 1, 2, ..., N, 1, 2, ... until nothing survives: the index t of
+    the wave that killed the last site (as the systemSize scripts count), or
+    None if max_steps was not enough."""
+    f = Front(matrix)
+    for t in range(max_steps):
+        f.kill(t % N_species + 1)
+        if f.alive == 0:
+            return t
+    return None
+
+
+# Per-wave records of a batch of replicas, each (replicas, waves): sites killed
+# by wave t, living victims just before it, living sites just after it.  `waves`
+# counts each replica's waves up to and including its extinction; past that its
+# rows are 0, so a mean over replicas counts an extinct one as 0, and
+# running() masks it out instead.
+Trajectories = namedtuple("Trajectories", "killed victims alive waves")
+
+
+def running(traj):
+    """(replicas, waves) mask: the replica still had survivors going into wave t."""
+    return np.arange(traj.killed.shape[1]) < traj.waves[:, None]
+
+
+def run_replicas(matrices, N_species, max_steps=1000):
+    """Run the replicas (leading axis of `matrices`) through waves 1..N, 1..N,
+    ... together until all are extinct or max_steps; Trajectories trimmed to
+    the longest replica."""
+    f = Front(matrices, batched=True)
+    R = f.replicas
+    killed = np.zeros((R, max_steps), dtype=np.int64)
+    victims = np.zeros((R, max_steps), dtype=np.int64)
+    alive = np.zeros((R, max_steps), dtype=np.int64)
+    waves = np.full(R, max_steps, dtype=np.int64)
+    T = max_steps
+    for t in range(max_steps):
+        v = t % N_species + 1
+        victims[:, t] = f.count[:, v]
+        killed[:, t] = f.kill(v)
+        alive[:, t] = f.alive
+        waves[(f.alive == 0) & (waves == max_steps)] = t + 1
+        if not f.alive.any():
+            T = t + 1
+            break
+    return Trajectories(killed[:, :T], victims[:, :T], alive[:, :T], waves)
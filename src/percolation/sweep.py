@@ -0,0 +1,102 @@
+"""Process-pool sweep runner with an on-disk cache of extinction times.
+
+The systemSize / lengthScalingVsSpecies scripts used to loop serially over
+N_species x L x sims and keep the times only in memory for one plot, so adding
+sims, adding an L or just restyling the figure meant rerunning everything.
+Here every (N, L, sim) is one task:
+
+  * tasks run on a multiprocessing Pool;
+  * each task draws its initial lattice from its OWN seed, derived from the
+    task's parameters, so a result does not depend on which worker ran it or
+    on what else was in the sweep -- and a cached one is exactly what a rerun
+    would give;
+  * every finished task is appended to a JSON-lines cache (one record per
+    extinction time, keyed by model, parameters, d, N, L, sim and max_steps)
+    as soon as it arrives, so an interrupted sweep loses nothing and a rerun
+    only computes what is missing.  A replot costs nothing.
+
+    times = extinction_times(3, N_values, L_values, n_sims, max_steps)
+    times[(N, L)]   # array of wave indices t, sims that never died left out
+
+Initial conditions: `uniform` (each site a uniformly random species, the
+percolation scripts), or any module-level init(rng, N, L, d, *params) with a
+`model` name for the cache (the power-law scripts pass their Zipf filler).
+"""
+import hashlib
+import json
+import os
+from multiprocessing import Pool
+
+import numpy as np
+from tqdm import tqdm
+
+from front import waves_to_extinction
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE = os.path.join(HERE, "outputs", "extinction.jsonl")
+
+
+def uniform(rng, N, L, d):
+    """Every site an independent uniformly random species 1..N."""
+    return rng.integers(1, N + 1, (L,) * d)
+
+
+def _key(model, params, d, N, L, sim, max_steps):
+    return (model, tuple(params), d, N, L, sim, max_steps)
+
+
+def _seed(key):
+    """A 128-bit seed from the task's parameters alone."""
+    return int.from_bytes(hashlib.sha256(repr(key).encode()).digest()[:16], "little")
+
+
+def _task(job):
+    key, init = job
+    model, params, d, N, L, sim, max_steps = key
+    rng = np.random.default_rng(_seed(key))
+    return key, waves_to_extinction(init(rng, N, L, d, *params), N, max_steps)
+
+
+def _load(cache):
+    done = {}
+    if os.path.exists(cache):
+        with open(cache) as fh:
+            for line in fh:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue   # a line cut short by a kill
+                done[_key(r["model"], r["params"], r["d"], r["N"], r["L"], r["sim"], r["max_steps"])] = r["t"]
+    return done
+
+
+def extinction_times(d, N_values, L_values, n_sims, max_steps=10000, init=uniform, model="uniform",
+                     params=(), cache=CACHE, workers=None):
+    """Extinction wave index t for every (N, L) and sims 0..n_sims-1, computing
+    only what `cache` lacks.  Returns {(N, L): array of t}, sims in order,
+    those still alive after max_steps left out (as the scripts always did)."""
+    N_values = [int(n) for n in N_values]
+    L_values = [int(L) for L in L_values]
+    params = [float(p) for p in params]
+    done = _load(cache)
+    todo = [_key(model, params, d, N, L, sim, max_steps)
+            for N in N_values for L in L_values for sim in range(n_sims)]
+    todo = [k for k in todo if k not in done]
+    if todo:
+        os.makedirs(os.path.dirname(cache) or ".", exist_ok=True)
+        # largest lattices first, so the long tasks do not start last
+        todo.sort(key=lambda k: -k[4])
+        with Pool(workers) as pool, open(cache, "a") as fh:
+            results = pool.imap_unordered(_task, [(k, init) for k in todo])
+            for key, t in tqdm(results, total=len(todo), desc=f"{model} {d}D"):
+                done[key] = t
+                m, p, dd, N, L, sim, ms = key
+                fh.write(json.dumps({"model": m, "params": list(p), "d": dd, "N": N, "L": L,
+                                     "sim": sim, "max_steps": ms, "t": t}) + "\n")
+                fh.flush()
+    out = {}
+    for N in N_values:
+        for L in L_values:
+            ts = [done[_key(model, params, d, N, L, sim, max_steps)] for sim in range(n_sims)]
+            out[(N, L)] = np.array([t for t in ts if t is not None])
+    return out
@@ -1,28 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from tqdm import tqdm
 
-
-def update(matrix, currentVictim):
-    # Iterate from the left boundary
-    for i in range(len(matrix)):
-        if matrix[i] == 0:
-            continue
-        elif matrix[i] == currentVictim:
-            matrix[i] = 0
-        else:
-            break
-
-    # Iterate from the right boundary
-    for i in range(len(matrix) - 1, -1, -1):
-        if matrix[i] == 0:
-            continue
-        elif matrix[i] == currentVictim:
-            matrix[i] = 0
-        else:
-            break
-
-    return matrix
+from sweep import extinction_times
 
 
 def main():
@@ -31,29 +10,16 @@ def main():
     max_steps = 10000
     N_simulations = 10  # Number of simulations for each (L, N_species)
 
-    for N_species in tqdm(N_species_values):
+    # every (N, L, sim) once, on all cores; cached runs are read back (sweep.py)
+    times = extinction_times(1, N_species_values, L_array, N_simulations, max_steps)
+
+    for N_species in N_species_values:
         t_means = []
         t_stds = []
 
         for L in L_array:
-            t_values = []
-
-            for _ in range(N_simulations):
-                # Generate a 1D array with random values
-                matrix = np.random.randint(1, N_species + 1, (L,))
-                # Pad the array with zeros on both sides
-                matrix = np.pad(matrix, pad_width=1, mode='constant', constant_values=0)
-                victimOrder = np.arange(1, N_species + 1)
-
-                for t in range(max_steps):
-                    currentVictim = victimOrder[t % N_species]
-                    matrix = update(matrix, currentVictim)
-                    if np.count_nonzero(matrix) == 0:
-                        t_values.append(t)
-                        break
-
             # Compute mean and standard deviation of t for this (L, N_species)
-            t_values = np.array(t_values) / N_species
+            t_values = times[(N_species, L)] / N_species
 
             t_means.append(np.mean(t_values))
             t_stds.append(np.std(t_values))
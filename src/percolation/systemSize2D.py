@@ -1,19 +1,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import cc3d
-from tqdm import tqdm
 
+from sweep import extinction_times
 
-def update(matrix, currentVictim):
-    # make a copy of the matrix, with 0 set to currentVictim
-    copiedMatrix = matrix.copy()
-    copiedMatrix[copiedMatrix == 0] = currentVictim
-    # find the connected components of the copied matrix
-    labels = cc3d.connected_components(copiedMatrix, connectivity=4)
-    # look for the cluster at the boundaries of 0. That cluster shuold be copied on to `matrix` (as zeros). Other clusters of 0 (which are due to currentVictim being set to 0) should be ingnored
-    boundaryCluster = labels[0, 0]
-    matrix[labels == boundaryCluster] = 0
-    return matrix
 
 def main():
     N_species_values = [2, 4, 6, 8, 10, 12, 40]  # Multiple values of N_species
@@ -21,27 +10,16 @@ def main():
     max_steps = 10000
     N_simulations = 10  # Number of simulations for each (L, N_species)
 
-    for N_species in tqdm(N_species_values):
+    # every (N, L, sim) once, on all cores; cached runs are read back (sweep.py)
+    times = extinction_times(2, N_species_values, L_array, N_simulations, max_steps)
+
+    for N_species in N_species_values:
         t_means = []
         t_stds = []
 
         for L in L_array:
-            t_values = []
-
-            for _ in range(N_simulations):
-                matrix = np.random.randint(1, N_species + 1, (L, L))
-                matrix = np.pad(matrix, pad_width=1, mode='constant', constant_values=0)
-                victimOrder = np.arange(1, N_species + 1)
-
-                for t in range(max_steps):
-                    currentVictim = victimOrder[t % N_species]
-                    matrix = update(matrix, currentVictim)
-                    if np.count_nonzero(matrix) == 0:
-                        t_values.append(t)
-                        break
-
             # Compute mean and standard deviation of t for this (L, N_species)
-            t_values = np.array(t_values) / N_species
+            t_values = times[(N_species, L)] / N_species
 
             t_means.append(np.mean(t_values))
             t_stds.append(np.std(t_values))
@@ -1,29 +1,13 @@
+import os
+import sys
+
 import numpy as np
 import matplotlib.pyplot as plt
-import cc3d
-from tqdm import tqdm
-
 
-def update(matrix, currentVictim):
-    # Iterate from the left boundary
-    for i in range(len(matrix)):
-        if matrix[i] == 0:
-            continue
-        elif matrix[i] == currentVictim:
-            matrix[i] = 0
-        else:
-            break
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "percolation"))
+from sweep import extinction_times
 
-    # Iterate from the right boundary
-    for i in range(len(matrix) - 1, -1, -1):
-        if matrix[i] == 0:
-            continue
-        elif matrix[i] == currentVictim:
-            matrix[i] = 0
-        else:
-            break
-
-    return matrix
+CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "extinction.jsonl")
 
 
 def generate_zipf_population(N_species, L, tau):
@@ -44,6 +28,12 @@ def generate_zipf_population(N_species, L, tau):
     return populations
 
 
+def zipf_lattice(rng, N_species, L, d, tau):
+    """The Zipf populations shuffled over an L^d lattice (sweep.py init)."""
+    species = np.repeat(np.arange(1, N_species + 1), generate_zipf_population(N_species, L, tau))
+    return rng.permutation(species).reshape((L,) * d)
+
+
 def main():
     N_species_values = [2, 4, 6, 8, 10, 12, 40]  # Multiple values of N_species
     L_array = np.arange(10, 410, 10)
@@ -51,38 +41,17 @@ def main():
     N_simulations = 10  # Number of simulations for each (L, N_species)
     tau = 2.0  # species abundances distribution exponent (plot of N_species vs Abundances)
 
-    for N_species in tqdm(N_species_values):
+    # every (N, L, sim) once, on all cores; cached runs are read back (sweep.py)
+    times = extinction_times(1, N_species_values, L_array, N_simulations, max_steps,
+                             init=zipf_lattice, model="zipf", params=(tau,), cache=CACHE)
+
+    for N_species in N_species_values:
         t_means = []
         t_stds = []
 
         for L in L_array:
-            t_values = []
-
-            for _ in range(N_simulations):
-                # Generate Zipf-distributed populations
-                populations = generate_zipf_population(N_species, L, tau)
-
-                # Create the array with the specified populations
-                array = np.zeros(L, dtype=int)
-                species = np.arange(1, N_species + 1)
-                indices = np.arange(L)
-                np.random.shuffle(indices)
-                start = 0
-                for i, pop in enumerate(populations):
-                    array[indices[start:start + pop]] = species[i]
-                    start += pop
-
-                victimOrder = np.arange(1, N_species + 1)
-
-                for t in range(max_steps):
-                    currentVictim = victimOrder[t % N_species]
-                    array = update(array, currentVictim)
-                    if np.count_nonzero(array) == 0:
-                        t_values.append(t)
-                        break
-
             # Compute mean and standard deviation of t for this (L, N_species)
-            t_values = np.array(t_values) / N_species
+            t_values = times[(N_species, L)] / N_species
 
             t_means.append(np.mean(t_values))
             t_stds.append(np.std(t_values))
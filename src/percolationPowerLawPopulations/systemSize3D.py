@@ -1,19 +1,13 @@
+import os
+import sys
+
 import numpy as np
 import matplotlib.pyplot as plt
-import cc3d
-from tqdm import tqdm
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "percolation"))
+from sweep import extinction_times
 
-def update(matrix, currentVictim):
-    # Make a copy of the matrix, with 0 set to currentVictim
-    copiedMatrix = matrix.copy()
-    copiedMatrix[copiedMatrix == 0] = currentVictim
-    # Find the connected components of the copied matrix
-    labels = cc3d.connected_components(copiedMatrix, connectivity=6)  # 6-connectivity for 3D
-    # Look for the cluster at the boundaries of 0
-    boundaryCluster = labels[0, 0, 0]
-    matrix[labels == boundaryCluster] = 0
-    return matrix
+CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "extinction.jsonl")
 
 
 def generate_zipf_population(N_species, L, tau):
@@ -34,6 +28,12 @@ def generate_zipf_population(N_species, L, tau):
     return populations
 
 
+def zipf_lattice(rng, N_species, L, d, tau):
+    """The Zipf populations shuffled over an L^d lattice (sweep.py init)."""
+    species = np.repeat(np.arange(1, N_species + 1), generate_zipf_population(N_species, L, tau))
+    return rng.permutation(species).reshape((L,) * d)
+
+
 def main():
     N_species_values = [2, 4, 6, 8, 10, 12, 40]  # Multiple values of N_species
     L_array = np.arange(10, 110, 10)  # Smaller sizes for 3D due to computational cost
@@ -41,44 +41,17 @@ def main():
     N_simulations = 10  # Number of simulations for each (L, N_species)
     tau = 4.0  # species abundances distribution exponent (plot of N_species vs Abundances)
 
-    for N_species in tqdm(N_species_values):
+    # every (N, L, sim) once, on all cores; cached runs are read back (sweep.py)
+    times = extinction_times(3, N_species_values, L_array, N_simulations, max_steps,
+                             init=zipf_lattice, model="zipf", params=(tau,), cache=CACHE)
+
+    for N_species in N_species_values:
         t_means = []
         t_stds = []
 
         for L in L_array:
-            t_values = []
-
-            for _ in range(N_simulations):
-                # Generate Zipf-distributed populations
-                populations = generate_zipf_population(N_species, L, tau)
-
-                # Create the 3D matrix with the specified populations
-                matrix = np.zeros((L, L, L), dtype=int)
-                species = np.arange(1, N_species + 1)
-                flat_matrix = matrix.flatten()
-
-                # Assign species to the matrix based on the populations
-                indices = np.arange(L * L * L)
-                np.random.shuffle(indices)
-                start = 0
-                for i, pop in enumerate(populations):
-                    flat_matrix[indices[start:start + pop]] = species[i]
-                    start += pop
-
-                matrix = flat_matrix.reshape((L, L, L))
-                matrix = np.pad(matrix, pad_width=1, mode='constant', constant_values=0)
-
-                victimOrder = np.arange(1, N_species + 1)
-
-                for t in range(max_steps):
-                    currentVictim = victimOrder[t % N_species]
-                    matrix = update(matrix, currentVictim)
-                    if np.count_nonzero(matrix) == 0:
-                        t_values.append(t)
-                        break
-
             # Compute mean and standard deviation of t for this (L, N_species)
-            t_values = np.array(t_values) / N_species
+            t_values = times[(N_species, L)] / N_species
 
             t_means.append(np.mean(t_values))
             t_stds.append(np.std(t_values))
@@ -1,15 +1,15 @@
 #include <random>
 #include <vector>
-#include <unordered_map>
 #include <iostream>
 #include <iomanip>
 #include <fstream>
 #include <sstream>
 #include <filesystem>
-#include <queue>
-#include <set>
-#include <cmath>
-#include <algorithm>
+#include <string>
+
+#include "../streamRng.h"
+#include "../puyopuyo/gravityPile.h"
+#include "speciesSampler.h"
 
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
@@ -17,178 +17,39 @@
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 constexpr int DEFAULT_L = 128;
 constexpr int DEFAULT_N_SPECIES = 6;
 constexpr int DEFAULT_STEPS_PER_LATTICEPOINT = 128;
 
-// Generate a sorted random probability vector and return a discrete_distribution
-std::discrete_distribution<> createRandomSpeciesDistribution(std::vector<double> &sorted_probs, int N_SPECIES)
-{
-    std::vector<double> weights(N_SPECIES);
-    std::uniform_real_distribution<> dis(0.0, 1.0);
-    double sum = 0.0;
-    for (int i = 0; i < N_SPECIES; ++i)
-    {
-        weights[i] = dis(gen);
-        sum += weights[i];
-    }
-    for (int i = 0; i < N_SPECIES; ++i)
-        weights[i] /= sum;
-    sorted_probs = weights;
-    std::sort(sorted_probs.begin(), sorted_probs.end(), std::greater<>());
-    return std::discrete_distribution<>(sorted_probs.begin(), sorted_probs.end());
-}
-
-void placePuyo(std::vector<std::vector<int>> &lattice, std::vector<std::vector<bool>> &movedSites,
-               std::uniform_int_distribution<> &dis_l, std::discrete_distribution<> &species_dist, int L, int H)
-{
-    int col = dis_l(gen);
-    int species = species_dist(gen) + 1; // 1-indexed
-
-    for (int row = H - 1; row >= 0; --row)
-    {
-        if (lattice[row][col] == 0)
-        {
-            lattice[row][col] = species;
-            movedSites[row][col] = true;
-            return;
-        }
-    }
-}
-
-int annihilatePuyo(std::vector<std::vector<int>> &lattice,
-                   std::vector<std::vector<bool>> &movedSites,
-                   int L, int H, int &avalancheCount)
-{
-    std::vector<std::vector<bool>> visited(H, std::vector<bool>(L, false));
-    int totalEliminated = 0;
-    std::vector<std::pair<int, int>> directions = {{-1, 0}, {1, 0}, {0, -1}, {0, 1}};
-
-    for (int row = 0; row < H; ++row)
-    {
-        for (int col = 0; col < L; ++col)
-        {
-            if (!movedSites[row][col] || visited[row][col] || lattice[row][col] == 0)
-                continue;
-            std::queue<std::pair<int, int>> q;
-            std::vector<std::pair<int, int>> cluster;
-            q.push({row, col});
-            visited[row][col] = true;
-            int species = lattice[row][col];
-            while (!q.empty())
-            {
-                auto [r, c] = q.front();
-                q.pop();
-                cluster.emplace_back(r, c);
-                for (auto [dr, dc] : directions)
-                {
-                    int nr = r + dr;
-                    int nc = (c + dc + L) % L;
-                    if (nr >= 0 && nr < H && !visited[nr][nc] && lattice[nr][nc] == species)
-                    {
-                        visited[nr][nc] = true;
-                        q.push({nr, nc});
-                    }
-                }
-            }
-            if (cluster.size() > 1)
-            {
-                for (auto [r, c] : cluster)
-                {
-                    lattice[r][c] = 0;
-                }
-                totalEliminated += cluster.size();
-                ++avalancheCount;
-            }
-        }
-    }
-    return totalEliminated;
-}
-
-void fall(std::vector<std::vector<int>> &lattice, std::vector<std::vector<bool>> &movedSites, int L, int H)
-{
-    for (int col = 0; col < L; ++col)
-    {
-        int writeRow = H - 1;
-        for (int row = H - 1; row >= 0; --row)
-        {
-            if (lattice[row][col] != 0)
-            {
-                if (writeRow != row)
-                {
-                    lattice[writeRow][col] = lattice[row][col];
-                    lattice[row][col] = 0;
-                    movedSites[writeRow][col] = true;
-                }
-                writeRow--;
-            }
-        }
-        for (int row = writeRow; row >= 0; --row)
-        {
-            movedSites[row][col] = false;
-        }
-    }
-}
-
-void run(std::ofstream &file, int L, std::discrete_distribution<> &species_dist, int STEPS_PER_LATTICEPOINT)
+void run(std::ofstream &file, int L, const AliasTable &species_dist, int STEPS_PER_LATTICEPOINT)
 {
     std::uniform_int_distribution<> dis_l(0, L - 1);
 
     int H = STEPS_PER_LATTICEPOINT;
-    std::vector<std::vector<int>> lattice(H, std::vector<int>(L, 0));
-    std::vector<std::vector<bool>> movedSites(H, std::vector<bool>(L, false));
+    // periodic columns, hard floor (../puyopuyo/gravityPile.h)
+    GravityPile<2> pile(L, H, true, species_dist.size());
+    GravityPile<2>::Chain chain;
 
     double step = 0.0;
 
     for (int i = 0; i < L * STEPS_PER_LATTICEPOINT; ++i)
     {
-        placePuyo(lattice, movedSites, dis_l, species_dist, L, H);
-
-        int avalancheCount = 0;
-        int totalEliminated = 0;
-
-        while (true)
-        {
-            int eliminated = annihilatePuyo(lattice, movedSites, L, H, avalancheCount);
-            totalEliminated += eliminated;
-
-            std::vector<std::vector<bool>> newMovedSites(H, std::vector<bool>(L, false));
-            fall(lattice, newMovedSites, L, H);
-
-            if (newMovedSites == movedSites)
-                break;
-
-            movedSites = newMovedSites;
-        }
-
-        int filled_cells = 0;
-        for (int col = 0; col < L; ++col)
-            for (int row = 0; row < H; ++row)
-                if (lattice[row][col] != 0)
-                    filled_cells++;
-
-        std::vector<int> heights(L, 0);
-        for (int c = 0; c < L; ++c)
-            for (int r = 0; r < H; ++r)
-                if (lattice[r][c])
-                {
-                    heights[c] = H - r;
-                    break;
-                }
+        int col = dis_l(gen);
+        pile.drop(col, species_dist(gen) + 1, chain);
 
         file << std::fixed << std::setprecision(6)
              << step << "\t"
-             << filled_cells << "\t"
-             << avalancheCount << "\t"
-             << totalEliminated << "\t"
-             << heights[0] << "\t";
+             << pile.mass() << "\t"
+             << chain.clusters << "\t"
+             << chain.eliminated << "\t"
+             << pile.height(0) << "\t";
         for (int c = 0; c < L; ++c)
         {
             int next = (c + 1) % L;
-            int slope = heights[next] - heights[c];
+            int slope = pile.height(next) - pile.height(c);
             file << slope;
             if (c < L - 1)
                 file << ",";
@@ -201,6 +62,7 @@ void run(std::ofstream &file, int L, std::discrete_distribution<> &species_dist,
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int L = DEFAULT_L;
     int N_SPECIES = DEFAULT_N_SPECIES;
     int STEPS_PER_LATTICEPOINT = DEFAULT_STEPS_PER_LATTICEPOINT;
@@ -210,10 +72,11 @@ int main(int argc, char *argv[])
         N_SPECIES = std::stoi(argv[2]);
     if (argc > 3)
         STEPS_PER_LATTICEPOINT = std::stoi(argv[3]);
+    gen = rngArgs.rng();
 
-    // Generate sorted random probabilities
-    std::vector<double> sorted_probs;
-    std::discrete_distribution<> species_dist = createRandomSpeciesDistribution(sorted_probs, N_SPECIES);
+    // Generate sorted random probabilities (one weight vector per stream)
+    std::vector<double> sorted_probs = randomSpeciesWeights(N_SPECIES, gen);
+    AliasTable species_dist(sorted_probs);
 
     // Build probability string for filename
     std::ostringstream probStream;
@@ -224,14 +87,19 @@ int main(int argc, char *argv[])
     }
     std::string probStr = probStream.str();
 
-    std::string exePath = argv[0];
-    std::string exeDir = std::filesystem::path(exePath).parent_path().string();
-    std::ostringstream filePathStream;
-    filePathStream << exeDir << "\\outputs\\avalanche2D\\L_" << L << "_P_" << probStr << ".tsv";
-    std::string filePath = filePathStream.str();
+    std::filesystem::path exeDir = std::filesystem::path(argv[0]).parent_path();
+    std::ostringstream fileNameStream;
+    fileNameStream << "L_" << L << "_P_" << probStr << rngArgs.keySuffix(false) << ".tsv";
+    std::filesystem::path filePath = exeDir / "outputs" / "avalanche2D" / fileNameStream.str();
+    std::filesystem::create_directories(filePath.parent_path());
 
     std::ofstream file;
     file.open(filePath);
+    if (!file.is_open())
+    {
+        std::cerr << "Failed to open output file: " << filePath.string() << "\n";
+        return 1;
+    }
     file << "step\tmass\tavalanches\ttotal_eliminated\tfirst_col_height\tslope_distribution\n";
 
     run(file, L, species_dist, STEPS_PER_LATTICEPOINT);
@@ -239,4 +107,4 @@ int main(int argc, char *argv[])
     file.close();
 
     return 0;
-}
\ No newline at end of file
+}
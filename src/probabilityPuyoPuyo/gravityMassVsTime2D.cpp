@@ -1,189 +1,49 @@
 #include <random>
 #include <vector>
-#include <unordered_map>
 #include <iostream>
 #include <iomanip>
 #include <fstream>
 #include <sstream>
 #include <filesystem>
-#include <queue>
-#include <set>
-#include <cmath> // For std::floor
 
-// #pragma GCC optimize("Ofast","inline","fast-math","unroll-loops","no-stack-protector")
+#include "../streamRng.h"
+#include "../puyopuyo/gravityPile.h"
+#include "speciesSampler.h"
+
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
 
 static auto _ = []()
 {std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 // Define constants
 constexpr int DEFAULT_L = 128;       // side length of the square lattice
 constexpr double DEFAULT_N_SPECIES = 6.0; // number of species (now double)
 constexpr int DEFAULT_STEPS_PER_LATTICEPOINT = 128;
 
-// Helper to create a discrete distribution for floating-point N_SPECIES
-std::discrete_distribution<> createSpeciesDistribution(double N_SPECIES) {
-    int n_int = static_cast<int>(std::floor(N_SPECIES));
-    double frac = N_SPECIES - n_int;
-    std::vector<double> weights;
-    for (int i = 0; i < n_int; ++i) {
-        weights.push_back(1.0);
-    }
-    if (frac > 0) {
-        weights.push_back(frac);
-    }
-    return std::discrete_distribution<>(weights.begin(), weights.end());
-}
-
-void placePuyo(std::vector<std::vector<int>> &lattice, std::vector<std::vector<bool>> &movedSites,
-               std::uniform_int_distribution<> &dis_l, std::discrete_distribution<> &species_dist, int L, int H)
-{
-    // Select a column and species
-    int col = dis_l(gen);
-    int species = species_dist(gen) + 1; // species are 1-indexed
-
-    for (int row = H - 1; row >= 0; --row)
-    {
-        if (lattice[row][col] == 0)
-        {
-            lattice[row][col] = species;
-            movedSites[row][col] = true;
-            return;
-        }
-    }
-}
-
-void annihilatePuyo(std::vector<std::vector<int>> &lattice, std::vector<std::vector<bool>> &movedSites, int L, int H)
-{
-    std::vector<std::vector<bool>> visited(H, std::vector<bool>(L, false));
-
-    // Directions for neighbors (up, down, left, right)
-    std::vector<std::pair<int, int>> directions = {{-1, 0}, {1, 0}, {0, -1}, {0, 1}};
-
-    for (int row = 0; row < H; ++row)
-    {
-        for (int col = 0; col < L; ++col)
-        {
-            if (movedSites[row][col] && !visited[row][col] && lattice[row][col] != 0)
-            {
-                // Perform flood-fill to find the cluster
-                std::vector<std::pair<int, int>> cluster;
-                std::queue<std::pair<int, int>> q;
-                q.push({row, col});
-                visited[row][col] = true;
-
-                while (!q.empty())
-                {
-                    auto [r, c] = q.front();
-                    q.pop();
-                    cluster.push_back({r, c});
-
-                    // Check neighbors with periodic boundary in columns (x-direction)
-                    for (auto [dr, dc] : directions)
-                    {
-                        int nr = r + dr;
-                        int nc = (c + dc + L) % L; // periodic in x (columns)
-                        // Only wrap columns, not rows
-                        if (nr >= 0 && nr < H && !visited[nr][nc] && lattice[nr][nc] == lattice[row][col])
-                        {
-                            q.push({nr, nc});
-                            visited[nr][nc] = true;
-                        }
-                    }
-                }
-
-                // If the cluster size is greater than 1, remove it
-                if (cluster.size() > 1)
-                {
-                    for (auto [r, c] : cluster)
-                    {
-                        lattice[r][c] = 0;
-                    }
-                }
-            }
-        }
-    }
-}
-
-void fall(std::vector<std::vector<int>> &lattice, std::vector<std::vector<bool>> &movedSites, int L, int H)
-{
-    for (int col = 0; col < L; ++col)
-    {
-        int writeRow = H - 1; // Start from the bottom of the column
-        for (int row = H - 1; row >= 0; --row)
-        {
-            if (lattice[row][col] != 0)
-            {
-                if (writeRow != row)
-                {
-                    lattice[writeRow][col] = lattice[row][col];
-                    lattice[row][col] = 0;
-                    movedSites[writeRow][col] = true;
-                }
-                writeRow--;
-            }
-        }
-        // Clear any remaining cells above the last written row
-        for (int row = writeRow; row >= 0; --row)
-        {
-            movedSites[row][col] = false;
-        }
-    }
-}
-
-
 void run(std::ofstream &file, int L, double N_SPECIES, int STEPS_PER_LATTICEPOINT)
 {
-    // Define distributions
-    std::discrete_distribution<> species_dist = createSpeciesDistribution(N_SPECIES);
+    AliasTable species_dist(speciesWeights(N_SPECIES));
     std::uniform_int_distribution<> dis_l(0, L - 1);
 
     int H = STEPS_PER_LATTICEPOINT; // Height of the lattice
-    std::vector<std::vector<int>> lattice(H, std::vector<int>(L, 0));
-    std::vector<std::vector<bool>> movedSites(H, std::vector<bool>(L, false));
+    // periodic columns, hard floor (../puyopuyo/gravityPile.h)
+    GravityPile<2> pile(L, H, true, species_dist.size());
 
     for (int step = 0; step <= STEPS_PER_LATTICEPOINT; ++step)
     {
         // Add L random puyos to random columns
         for (int i = 0; i < L; ++i)
         {
-            placePuyo(lattice, movedSites, dis_l, species_dist, L, H);
-
-            // Annihilation-fall cycle
-            while (true)
-            {
-                annihilatePuyo(lattice, movedSites, L, H);
-                std::vector<std::vector<bool>> newMovedSites(H, std::vector<bool>(L, false));
-                fall(lattice, newMovedSites, L, H);
-
-                if (newMovedSites == movedSites)
-                    break;
-
-                movedSites = newMovedSites;
-            }
-        }
-
-        // Record both the number of filled cells and the max height of any column
-        int filled_cells = 0;
-        int max_height = 0;
-        for (int col = 0; col < L; ++col)
-        {
-            for (int row = 0; row < H; ++row)
-            {
-                if (lattice[row][col] != 0)
-                {
-                    filled_cells++;
-                    max_height = std::max(max_height, H - row);
-                }
-            }
+            int col = dis_l(gen);
+            pile.drop(col, species_dist(gen) + 1);
         }
 
         // Record the number of filled cells and the max height
-        file << step << "\t" << filled_cells << "\t" << max_height << "\n";
+        file << step << "\t" << pile.mass() << "\t" << pile.maxHeight() << "\n";
 
         // Print progress
         std::cout << "Progress: " << std::fixed << std::setprecision(2)
@@ -193,6 +53,7 @@ void run(std::ofstream &file, int L, double N_SPECIES, int STEPS_PER_LATTICEPOIN
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int L = DEFAULT_L;
     double N_SPECIES = DEFAULT_N_SPECIES;
     int STEPS_PER_LATTICEPOINT = DEFAULT_STEPS_PER_LATTICEPOINT;
@@ -202,15 +63,21 @@ int main(int argc, char *argv[])
         N_SPECIES = std::stod(argv[2]);
     if (argc > 3)
         STEPS_PER_LATTICEPOINT = std::stoi(argv[3]);
+    gen = rngArgs.rng();
 
-    std::string exePath = argv[0];
-    std::string exeDir = std::filesystem::path(exePath).parent_path().string();
-    std::ostringstream filePathStream;
-    filePathStream << exeDir << "\\outputs\\gravity2D\\L_" << L << "_N_" << N_SPECIES << "_steps_" << STEPS_PER_LATTICEPOINT << ".tsv";
-    std::string filePath = filePathStream.str();
+    std::filesystem::path exeDir = std::filesystem::path(argv[0]).parent_path();
+    std::ostringstream fileNameStream;
+    fileNameStream << "L_" << L << "_N_" << N_SPECIES << "_steps_" << STEPS_PER_LATTICEPOINT << rngArgs.keySuffix(false) << ".tsv";
+    std::filesystem::path filePath = exeDir / "outputs" / "gravity2D" / fileNameStream.str();
+    std::filesystem::create_directories(filePath.parent_path());
 
     std::ofstream file;
     file.open(filePath);
+    if (!file.is_open())
+    {
+        std::cerr << "Failed to open output file: " << filePath.string() << "\n";
+        return 1;
+    }
     file << "step\tmass\theight\n";
 
     run(file, L, N_SPECIES, STEPS_PER_LATTICEPOINT);
@@ -218,4 +85,4 @@ int main(int argc, char *argv[])
     file.close();
 
     return 0;
-}
\ No newline at end of file
+}
@@ -0,0 +1,107 @@
+"""Emit argument lines for the probabilityPuyoPuyo sweeps (replaces the .ps1 launchers).
+
+    python run_sweep.py SWEEP [--seed S] | xargs -P 16 -L 1 ./ENGINE > /dev/null
+    python run_sweep.py SWEEP [--seed S] --run [--cores 16] [--mem 48G]   # ../puyoRoughnessScaling/scheduler.py
+
+SWEEP (engine):
+
+    gravity        gravityMassVsTime2D         drift vs N, N = 5, 8..11
+    onlyAvalanche  onlyAvalanche2D             avalanche sizes for N just above 5
+    avalanche      onlyAvalanche2D             6 sims at N = 6
+    randomProbs    randomProbabilities2D       drift vs entropy, VECTORS weight vectors per N
+
+Sim 0 of a point passes no --stream, so it runs on the engine's default stream
+(a hash of its positional arguments, streamRng.h) and keeps the old file name.
+Every other job carries `--stream K` with K numbered through the whole sweep,
+so no two jobs of a sweep share draws and any one of them can be rerun
+exactly; those outputs get "_stream_K".  The random-probability engines draw
+their weight vector from the head of the stream, so stream K IS weight vector
+K and a sweep over thousands of vectors is just thousands of job lines (a run
+at L = 256, 2048 steps takes about 50 ms).  --seed S is passed to every job
+and tags every output "_seed_S".
+
+--run skips jobs whose output already exists.  The random-probability outputs
+are named after the drawn probabilities, so those are matched to their jobs
+by key suffix and species count.
+"""
+import glob
+import os
+import re
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUT = os.path.join(HERE, "outputs")
+
+RANDOM_NS = [6, 7, 8, 9]
+VECTORS = 1000
+
+SWEEPS = {
+    "gravity": dict(exe="gravityMassVsTime2D", L=256, steps=2048, Ns=[5, 8, 9, 10, 11], sims=1),
+    "onlyAvalanche": dict(exe="onlyAvalanche2D", L=64, steps=32768,
+                          Ns=[5.01, 5.05, 5.06, 5.08, 5.1, 5.2, 5.3, 5.5, 5.9], sims=1),
+    "avalanche": dict(exe="onlyAvalanche2D", L=68, steps=32768, Ns=[6], sims=6),
+    # stream 0 carries no suffix to glob for, so the vectors are streams 1..VECTORS
+    "randomProbs": dict(exe="randomProbabilities2D", L=256, steps=2048, Ns=RANDOM_NS, sims=VECTORS, first=1),
+}
+
+
+def _key(seed, sim):
+    return (f"_seed_{seed}" if seed else "") + (f"_stream_{sim}" if sim else "")
+
+
+def _random_outputs(L):
+    """Existing random-probability outputs at width L, by (species count, key suffix)."""
+    found = {}
+    for f in glob.glob(os.path.join(OUT, "randomProbabilities2D", f"L_{L}_P_*.tsv")):
+        m = re.search(r"_P_([0-9.]+(?:-[0-9.]+)*)((?:_seed_\d+)?(?:_stream_\d+)?)\.tsv$", f)
+        if m:
+            found[(m.group(1).count("-") + 1, m.group(2))] = f
+    return found
+
+
+def jobs(name, seed=0):
+    """(args, output file) per run, in emission order."""
+    cfg = SWEEPS[name]
+    L, steps, first = cfg["L"], cfg["steps"], cfg.get("first", 0)
+    found = _random_outputs(L) if cfg["exe"] == "randomProbabilities2D" else {}
+    out = []
+    for i, N in enumerate(cfg["Ns"]):
+        for sim in range(first, first + cfg["sims"]):
+            # streams numbered through the sweep, so other points never reuse them
+            stream = sim and i * cfg["sims"] + sim
+            args = [L, N, steps] + (["--stream", stream] if stream else []) + (["--seed", seed] if seed else [])
+            suffix = _key(seed, stream)
+            if cfg["exe"] == "gravityMassVsTime2D":
+                path = os.path.join(OUT, "gravity2D", f"L_{L}_N_{N}_steps_{steps}{suffix}.tsv")
+            elif cfg["exe"] == "onlyAvalanche2D":
+                path = os.path.join(OUT, "avalanche2D", "onlyAvalanche", f"L_{L}_N_{N}{suffix}.tsv")
+            else:
+                # a name that does not exist yet, so the job runs
+                path = found.get((N, suffix), os.path.join(OUT, "randomProbabilities2D", f"L_{L}_N_{N}{suffix}.pending"))
+            out.append((args, path))
+    return out
+
+
+def main():
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in SWEEPS:
+        sys.exit(f"usage: run_sweep.py {{{','.join(SWEEPS)}}} [--seed S] [--run ...]")
+    name, rest = argv[0], argv[1:]
+    seed = 0
+    if "--seed" in rest:
+        i = rest.index("--seed")
+        seed = int(rest[i + 1])
+        del rest[i:i + 2]
+    if "--run" in rest:
+        sys.path.insert(0, os.path.join(os.path.dirname(HERE), "puyoRoughnessScaling"))
+        from scheduler import Job, cli, engine_bytes
+        cfg = SWEEPS[name]
+        todo = [Job(args, [path], engine_bytes(args[0], rows=cfg["steps"])) for args, path in jobs(name, seed)]
+        cli(os.path.join(HERE, cfg["exe"]), todo, [a for a in rest if a != "--run"],
+            log=os.path.join(OUT, f"scheduler_{name}.jsonl"))
+        return
+    print("\n".join(" ".join(str(x) for x in args) for args, _ in jobs(name, seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#pragma once
+// Species weights and the per-drop species draw of the probabilityPuyoPuyo
+// engines.
+//
+// The engines built a std::discrete_distribution from the weights and drew
+// every block's species from it: two generator words per draw for the
+// canonical double, then a binary search over the cumulative weights.  An
+// AliasTable (Walker's alias method, built as in Vose, "A linear algorithm for
+// generating random numbers with a given distribution", IEEE TSE 1991) makes
+// the draw O(1) whatever N, from ONE 32-bit word w:
+//
+//   m = w * n           (64-bit product)
+//   i = m >> 32         the bucket, uniform on 0..n-1
+//   u = m mod 2^32      uniform within the bucket, independent of i
+//   species = u < threshold[i] ? i : alias[i]
+//
+// Every probability is reproduced to within n * 2^-32.  Building the table is
+// O(n), so the random-probability engines can afford a fresh one per weight
+// vector.  The species drawn from a given stream differ from the
+// discrete_distribution ones, so outputs are the same ensemble as before, not
+// the same realisations.
+//
+//     AliasTable draw(speciesWeights(5.5));          // N = 5.5: five 1s and 0.5
+//     AliasTable draw(randomSpeciesWeights(6, gen)); // sorted random simplex point
+//     int species = draw(gen) + 1;                   // 1-indexed
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <functional>
+#include <limits>
+#include <random>
+#include <stdexcept>
+#include <vector>
+
+class AliasTable
+{
+public:
+    explicit AliasTable(const std::vector<double> &weights)
+        : threshold(weights.size()), alias(weights.size())
+    {
+        int n = static_cast<int>(weights.size());
+        double sum = 0.0;
+        for (double w : weights)
+            sum += w;
+        if (n == 0 || !(sum > 0.0))
+            throw std::invalid_argument("AliasTable: weights must have a positive sum");
+
+        // scaled[i] = n p_i; buckets below 1 are topped up from those above
+        std::vector<double> scaled(n);
+        std::vector<int> small, large;
+        for (int i = 0; i < n; ++i)
+        {
+            scaled[i] = weights[i] * n / sum;
+            (scaled[i] < 1.0 ? small : large).push_back(i);
+        }
+        while (!small.empty() && !large.empty())
+        {
+            int s = small.back(), l = large.back();
+            small.pop_back();
+            setBucket(s, scaled[s], l);
+            scaled[l] -= 1.0 - scaled[s];
+            if (scaled[l] < 1.0)
+            {
+                large.pop_back();
+                small.push_back(l);
+            }
+        }
+        // what is left is 1 up to rounding
+        for (int i : large)
+            setBucket(i, 1.0, i);
+        for (int i : small)
+            setBucket(i, 1.0, i);
+    }
+
+    int size() const { return static_cast<int>(alias.size()); }
+
+    // a species index in 0..size()-1, from one 32-bit draw of g
+    template <class URBG>
+    int operator()(URBG &g) const
+    {
+        static_assert(URBG::min() == 0 && URBG::max() == std::numeric_limits<uint32_t>::max(),
+                      "AliasTable: needs a full-range 32-bit generator");
+        uint64_t m = static_cast<uint64_t>(g()) * alias.size();
+        int i = static_cast<int>(m >> 32);
+        return static_cast<uint32_t>(m) < threshold[i] ? i : alias[i];
+    }
+
+private:
+    std::vector<uint64_t> threshold; // acceptance in units of 2^-32; 2^32 = always
+    std::vector<int> alias;
+
+    void setBucket(int i, double accept, int other)
+    {
+        threshold[i] = static_cast<uint64_t>(std::llround(std::clamp(accept, 0.0, 1.0) * 4294967296.0));
+        alias[i] = other;
+    }
+};
+
+// Continuous N (readme.md): floor(N) species of weight 1 plus, if N is not an
+// integer, one of weight N - floor(N).
+inline std::vector<double> speciesWeights(double N_SPECIES)
+{
+    int n_int = static_cast<int>(std::floor(N_SPECIES));
+    double frac = N_SPECIES - n_int;
+    std::vector<double> weights(n_int, 1.0);
+    if (frac > 0)
+        weights.push_back(frac);
+    return weights;
+}
+
+// N i.i.d. uniform(0, 1) weights, normalised and sorted in descending order --
+// the random probability vector of the *RandomProbs / randomProbabilities
+// engines, drawn from g exactly as before.
+template <class URBG>
+std::vector<double> randomSpeciesWeights(int N_SPECIES, URBG &g)
+{
+    std::vector<double> weights(N_SPECIES);
+    std::uniform_real_distribution<> dis(0.0, 1.0);
+    double sum = 0.0;
+    for (int i = 0; i < N_SPECIES; ++i)
+    {
+        weights[i] = dis(g);
+        sum += weights[i];
+    }
+    for (int i = 0; i < N_SPECIES; ++i)
+        weights[i] /= sum;
+    std::sort(weights.begin(), weights.end(), std::greater<>());
+    return weights;
+}
@@ -153,7 +153,7 @@ def main():
 
     files = glob.glob(f"{data_dir}/L_{L}_P_*.tsv")
     for file in tqdm(files):
-        match = re.search(r'_P_([0-9\.\-]+)\.tsv$', file)
+        match = re.search(r'_P_([0-9\.\-]+)(?:_seed_\d+)?(?:_stream_\d+)?\.tsv$', file)
         if not match:
             print(f"Warning: could not parse probabilities from {file}")
             continue
@@ -291,7 +291,7 @@ def mainOnlyAvalancheRandomProbs():
 
     files = glob.glob(f"{data_dir}/L_{L}_P_*.tsv")
     for file in tqdm(files):
-        match = re.search(r'_P_([0-9\.\-]+)\.tsv$', file)
+        match = re.search(r'_P_([0-9\.\-]+)(?:_seed_\d+)?(?:_stream_\d+)?\.tsv$', file)
         if not match:
             print(f"Warning: could not parse probabilities from {file}")
             continue
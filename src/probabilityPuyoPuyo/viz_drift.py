@@ -269,7 +269,7 @@ def drift_vs_invEntropy_randomProbs():
 
     for file in files:
         # Extract probabilities from filename using regex
-        match = re.search(r'_P_([0-9\.\-]+)\.tsv$', file)
+        match = re.search(r'_P_([0-9\.\-]+)(?:_seed_\d+)?(?:_stream_\d+)?\.tsv$', file)
         if not match:
             continue
         prob_str = match.group(1)
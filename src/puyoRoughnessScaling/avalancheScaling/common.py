@@ -25,7 +25,6 @@ THE PHYSICS (see readme.md):
     BTW sandpile, where dissipation is only at the boundary so <s> ~ L^2 is
     FORCED to diverge.  Puyo dissipates in the bulk, so nothing forces it.
 """
-import glob
 import os
 import re
 import numpy as np
@@ -100,27 +99,13 @@ def steps_of(L=None):
     return STEPS
 
 
-def box_H(N, steps=STEPS):
-    """Box height, sized from the measured growth velocity v(N) with margin.
-
-    v is ~0 at N_c and rises steeply past N=6.5, so a single ratio would either
-    waste memory at low N or hit the ceiling at high N.  Every run reports
-    ceiling_hits, which must be 0.
-    """
-    if N <= 5.5:
-        r = 0.10      # v <= 0.05 here
-    elif N <= 6.5:
-        r = 0.30      # v(6) ~ 0.061
-    else:
-        r = 0.55      # v(7) ~ 0.216
-    return int(np.ceil(r * steps)) + 512
-
-
 def jobs():
-    """Every (L, N, steps, sim, H, warmup) in the sweep, biggest box first.
+    """Every (L, N, steps, sim, warmup) in the sweep, widest first.
 
-    Biggest-first keeps the tall/wide (high memory) jobs from all landing at the
-    end, and lets xargs backfill with cheap ones.
+    There is no box height: the engine keeps a rolling window of live rows
+    (../rollingLattice.h), so memory no longer depends on v(N).  Widest-first
+    keeps the long (cost ~ L) jobs from all landing at the end, and lets xargs
+    backfill with cheap ones.  Every run reports floor_hits, which must be 0.
     """
     out = []
     seen = set()
@@ -131,7 +116,7 @@ def jobs():
             if key in seen:
                 continue
             seen.add(key)
-            out.append((L, nfmt(N), STEPS, sim, box_H(N), int(WARMUP_FRAC * STEPS)))
+            out.append((L, nfmt(N), STEPS, sim, int(WARMUP_FRAC * STEPS)))
 
     for L in LS:
         add(L, MAIN_N, NSIMS[L])
@@ -145,7 +130,7 @@ def jobs():
             add(L, N, NSCAN_SIMS)
     for N in NSAW:
         add(NSAW_L, N, NSAW_SIMS)
-    out.sort(key=lambda j: -j[0] * j[4])
+    out.sort(key=lambda j: -j[0])
     return out
 
 
@@ -172,6 +157,165 @@ def load_sim(path):
     return meta, a[:, 0], dict(mass=a[:, 1], clusters=a[:, 2], duration=a[:, 3])
 
 
+# ---------------------------------------------------------------------------
+# Pooled store: one compact file per (L, N) instead of re-parsing every sim.
+#
+# With up to 1024 sims per N, and figures.py asking for the same (L, N) several
+# times, parsing the per-sim .tsv files dominated every figure run.  Everything
+# the loaders below need is a SUM over sims, so it is pooled once into
+# outputs/pooled/L_<L>_N_<N>_steps_<STEPS>.npz together with a manifest of the
+# (mtime, size) of every sim file that went in.  On each call the sim folders
+# are re-listed and stat()ed (cheap): new sims are parsed and ADDED to the
+# pool, and any sim that changed or disappeared forces a rebuild from scratch
+# (sums cannot be un-added).  Within one process the pool is also memoised.
+# ---------------------------------------------------------------------------
+POOL = f"{HERE}/outputs/pooled"
+_SOURCES = (("dist", DATA), ("mom", MOM), ("slope", SLOPE))
+_MEMO = {}
+
+
+def _sim_files(L, N):
+    """{(kind, basename): (path, (mtime_ns, size))} for every sim file of (L, N)."""
+    prefix = f"L_{L}_N_{nfmt(N)}_steps_{STEPS}_sim_"
+    out = {}
+    for kind, folder in _SOURCES:
+        if not os.path.isdir(folder):
+            continue
+        with os.scandir(folder) as it:
+            for e in it:
+                if e.name.startswith(prefix) and e.name.endswith(".tsv"):
+                    st = e.stat()
+                    out[(kind, e.name)] = (e.path, (st.st_mtime_ns, st.st_size))
+    return out
+
+
+def _empty_pool():
+    return dict(hist=np.zeros((3, 1), np.int64), drops=0, nhist=0,
+                win={}, nmom=0, m={}, w={}, pile=None, nslope=0, manifest={})
+
+
+def _add_dist(P, path):
+    meta, v, h = load_sim(path)
+    if v.size == 0:
+        return
+    if v[-1] >= P["hist"].shape[1]:
+        grown = np.zeros((3, int(v[-1]) + 1), np.int64)
+        grown[:, :P["hist"].shape[1]] = P["hist"]
+        P["hist"] = grown
+    for i, k in enumerate(("mass", "clusters", "duration")):
+        P["hist"][i, v] += h[k]
+    P["drops"] += int(meta.get("drops_counted", 0))
+    P["nhist"] += 1
+
+
+def _add_moments(P, path):
+    # per window: drops, active, sum_s, sum_s2, s_max (max over sims), sum of mean_h, sims
+    for line in open(path):
+        if line.startswith("#") or line.startswith("step_lo"):
+            continue
+        p = line.split()
+        a = P["win"].setdefault((int(p[0]), int(p[1])), [0, 0, 0, 0, 0, 0.0, 0])
+        a[0] += int(p[2]); a[1] += int(p[3]); a[2] += int(p[4]); a[3] += int(p[5])
+        a[4] = max(a[4], int(p[6])); a[5] += float(p[7]); a[6] += 1
+    P["nmom"] += 1
+
+
+def _add_slope(P, path):
+    # m table: drops, active, sum_s, sum_s2; extent table: count, sum_s, sum_s2
+    head, _, tail = open(path).read().partition("# extent")
+    for line in head.strip().split("\n"):
+        if "pile_by_species=" in line:
+            c = np.array([int(x) for x in line.split("pile_by_species=")[1].split(",")], np.int64)
+            P["pile"] = c if P["pile"] is None else P["pile"] + c
+        if line.startswith("#") or line.startswith("m\t"):
+            continue
+        p = [int(x) for x in line.split()]
+        a = P["m"].setdefault(p[0], [0, 0, 0, 0])
+        for i in range(4):
+            a[i] += p[1 + i]
+    for line in tail.strip().split("\n"):
+        if not line or line.startswith("w\t"):
+            continue
+        p = [int(x) for x in line.split()]
+        a = P["w"].setdefault(p[0], [0, 0, 0])
+        for i in range(3):
+            a[i] += p[1 + i]
+    P["nslope"] += 1
+
+
+_ADD = {"dist": _add_dist, "mom": _add_moments, "slope": _add_slope}
+
+
+def _table(d, width, dtype=np.int64):
+    keys = sorted(d)
+    return np.array(keys, np.int64), np.array([d[k] for k in keys], dtype).reshape(len(keys), width)
+
+
+def _save_pool(path, P):
+    wk = sorted(P["win"])
+    man = sorted(P["manifest"])
+    arrays = dict(
+        hist=P["hist"], counts=np.array([P["drops"], P["nhist"], P["nmom"], P["nslope"]], np.int64),
+        win_key=np.array(wk, np.int64).reshape(len(wk), 2),
+        win_int=np.array([P["win"][k][:5] for k in wk], np.int64).reshape(len(wk), 5),
+        win_h=np.array([P["win"][k][5] for k in wk], float),
+        win_n=np.array([P["win"][k][6] for k in wk], np.int64),
+        pile=P["pile"] if P["pile"] is not None else np.zeros(0, np.int64),
+        man_kind=np.array([k for k, _ in man], dtype=str),
+        man_name=np.array([n for _, n in man], dtype=str),
+        man_stat=np.array([P["manifest"][k] for k in man], np.int64).reshape(len(man), 2),
+    )
+    arrays["m_key"], arrays["m_sum"] = _table(P["m"], 4)
+    arrays["w_key"], arrays["w_sum"] = _table(P["w"], 3)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(fh, **arrays)
+    os.replace(tmp, path)
+
+
+def _load_pool(path):
+    with np.load(path) as z:
+        P = _empty_pool()
+        P["hist"] = z["hist"]
+        P["drops"], P["nhist"], P["nmom"], P["nslope"] = (int(x) for x in z["counts"])
+        for k, a, h, n in zip(z["win_key"], z["win_int"], z["win_h"], z["win_n"]):
+            P["win"][(int(k[0]), int(k[1]))] = [int(x) for x in a] + [float(h), int(n)]
+        P["m"] = {int(k): [int(x) for x in a] for k, a in zip(z["m_key"], z["m_sum"])}
+        P["w"] = {int(k): [int(x) for x in a] for k, a in zip(z["w_key"], z["w_sum"])}
+        P["pile"] = z["pile"] if z["pile"].size else None
+        P["manifest"] = {(str(k), str(n)): (int(s[0]), int(s[1]))
+                         for k, n, s in zip(z["man_kind"], z["man_name"], z["man_stat"])}
+    return P
+
+
+def pool(L, N, rebuild=False):
+    """The pooled sums over every sim of (L, N), brought up to date with the
+    sim files on disk.  The loaders below all read from this."""
+    path = f"{POOL}/L_{L}_N_{nfmt(N)}_steps_{STEPS}.npz"
+    files = _sim_files(L, N)
+    stats = {key: st for key, (_, st) in files.items()}
+
+    P = None if rebuild else _MEMO.get(path)
+    if P is None and not rebuild and os.path.exists(path):
+        try:
+            P = _load_pool(path)
+        except (OSError, KeyError, ValueError):
+            P = None     # unreadable or from an older layout: rebuild
+    if P is not None and P["manifest"] == stats:
+        _MEMO[path] = P
+        return P
+    if P is None or any(stats.get(k) != v for k, v in P["manifest"].items()):
+        P = _empty_pool()
+    for key in sorted(set(stats) - set(P["manifest"]), key=lambda k: files[k][0]):
+        _ADD[key[0]](P, files[key][0])
+        P["manifest"][key] = stats[key]
+    if stats:
+        _save_pool(path, P)
+    _MEMO[path] = P
+    return P
+
+
 def pooled(L, N):
     """Pool histograms over all sims of (L, N).
 
@@ -180,25 +324,12 @@ def pooled(L, N):
     an independent sample, so summing bins across sims is just a longer run, and
     the tail bins get the statistics they need.
     """
-    files = sorted(glob.glob(f"{DATA}/L_{L}_N_{nfmt(N)}_steps_{STEPS}_sim_*.tsv"))
-    if not files:
+    P = pool(L, N)
+    if P["nhist"] == 0:
         return None, None, 0
-    vmax, loaded, drops = 0, [], 0
-    for f in files:
-        meta, v, h = load_sim(f)
-        if v.size == 0:
-            continue
-        drops += int(meta.get("drops_counted", 0))
-        vmax = max(vmax, int(v[-1]))
-        loaded.append((v, h))
-    if not loaded:
-        return None, None, 0
-    tot = {k: np.zeros(vmax + 1, dtype=np.int64) for k in ("mass", "clusters", "duration")}
-    for v, h in loaded:
-        for k in tot:
-            tot[k][v] += h[k]
-    value = np.arange(vmax + 1)
-    return value[1:], {k: c[1:] for k, c in tot.items()}, drops
+    hist = P["hist"]
+    value = np.arange(hist.shape[1])
+    return value[1:], {k: hist[i, 1:].copy() for i, k in enumerate(("mass", "clusters", "duration"))}, P["drops"]
 
 
 def pdf(value, counts):
@@ -277,23 +408,14 @@ def moments_vs_t(L, N):
     sits at the ARITHMETIC centre.  Using the geometric centre for h biases late
     wide windows and fakes a decreasing velocity.
     """
-    files = sorted(glob.glob(f"{MOM}/L_{L}_N_{nfmt(N)}_steps_{STEPS}_sim_*.tsv"))
-    if not files:
+    P = pool(L, N)
+    if P["nmom"] == 0:
         return (None,) * 6
-    acc = {}
-    for f in files:
-        for line in open(f):
-            if line.startswith("#") or line.startswith("step_lo"):
-                continue
-            p = line.split()
-            lo, hi = int(p[0]), int(p[1])
-            a = acc.setdefault((lo, hi), [0, 0, 0, 0, 0.0, 0])
-            a[0] += int(p[2]); a[1] += int(p[3]); a[2] += int(p[4]); a[3] += int(p[5])
-            a[4] += float(p[7]); a[5] += 1
+    acc = P["win"]
     keys = sorted(acc)
     tg, m1, m21, af, ta, mh = [], [], [], [], [], []
     for lo, hi in keys:
-        drops, active, s1, s2, hsum, n = acc[(lo, hi)]
+        drops, active, s1, s2, _, hsum, n = acc[(lo, hi)]
         ta.append((lo + hi) / 2.0)
         mh.append(hsum / n)
         if active == 0 or s1 == 0:
@@ -318,24 +440,10 @@ def slope_resolved(L, N):
     <s|m> is over ALL depositions (inactive ones contribute s=0), so it is the
     honest "does slope predict mass" answer.
     """
-    files = sorted(glob.glob(f"{SLOPE}/L_{L}_N_{nfmt(N)}_steps_{STEPS}_sim_*.tsv"))
-    if not files:
+    P = pool(L, N)
+    if P["nslope"] == 0:
         return (None,) * 6
-    macc, wacc = {}, {}
-    for f in files:
-        head, _, tail = open(f).read().partition("# extent")
-        for line in head.strip().split("\n"):
-            if line.startswith("#") or line.startswith("m\t"):
-                continue
-            p = [int(x) for x in line.split()]
-            a = macc.setdefault(p[0], [0, 0, 0])
-            a[0] += p[1]; a[1] += p[2]; a[2] += p[3]
-        for line in tail.strip().split("\n"):
-            if not line or line.startswith("w\t"):
-                continue
-            p = [int(x) for x in line.split()]
-            a = wacc.setdefault(p[0], [0, 0])
-            a[0] += p[1]; a[1] += p[2]
+    macc, wacc = P["m"], P["w"]
     mk = sorted(macc)
     md = np.array([macc[k][0] for k in mk], float)
     ms = np.array([macc[k][2] for k in mk], float)
@@ -353,25 +461,14 @@ def composition(L, N):
     probability f/N but, being rare, seldom finds a partner -- so if it is
     ENRICHED in the pile it is acting as a frozen defect.
     """
-    files = sorted(glob.glob(f"{SLOPE}/L_{L}_N_{nfmt(N)}_steps_{STEPS}_sim_*.tsv"))
-    if not files:
-        return None, None
-    tot = None
-    for f in files:
-        for line in open(f):
-            if line.startswith("# pile_by_species="):
-                pass
-            if "pile_by_species=" in line:
-                c = np.array([int(x) for x in line.split("pile_by_species=")[1].split(",")], float)
-                tot = c if tot is None else tot + c
-                break
+    tot = pool(L, N)["pile"]
     if tot is None:
         return None, None
     n_int = int(np.floor(N))
     frac = N - n_int
     w = [1.0] * n_int + ([frac] if frac > 0 else [])
     dep = np.array(w) / sum(w)
-    return dep, tot / tot.sum()
+    return dep, tot / float(tot.sum())
 
 
 def impurity_enrichment(L, N):
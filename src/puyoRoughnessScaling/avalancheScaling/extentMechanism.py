@@ -44,9 +44,8 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 
-import glob
 from scipy.optimize import minimize
-from common import slope_resolved, PLOTS, SLOPE, nfmt, STEPS
+from common import slope_resolved, pool, PLOTS
 from integerN import load_pooled
 
 plt.rcParams.update({
@@ -145,15 +144,9 @@ def test_ps_prefactor(P, smin=50, cap=6000):
 
 
 def _pool_w(N, cap=3000):
-    acc = {}
-    for f in sorted(glob.glob(f"{SLOPE}/L_{L}_N_{nfmt(N)}_steps_{STEPS}_sim_*.tsv")):
-        for line in open(f).read().partition("# extent")[2].strip().split("\n"):
-            if not line or line.startswith("w\t"):
-                continue
-            p = line.split()
-            acc[int(p[0])] = acc.get(int(p[0]), 0) + int(p[1])
+    acc = pool(L, N)["w"]
     w = np.array(sorted(k for k in acc if k <= cap))
-    return w, np.array([acc[k] for k in w], float)
+    return w, np.array([acc[k][0] for k in w], float)
 
 
 def test_pw_form(wmin=4, cap=3000):
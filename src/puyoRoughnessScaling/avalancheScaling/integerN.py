@@ -55,7 +55,6 @@ SMIN = 50                 # past the even/odd parity band and the near-smin ridg
 CAP = 6000                # discrete support ceiling; s_max <= 1394, model tail dies far below
 SUB = "integerN"
 HERE = os.path.dirname(os.path.abspath(__file__))
-CACHE = os.path.join(HERE, ".integerN_cache.npz")
 
 
 def save(fig, name):
@@ -69,17 +68,11 @@ def save(fig, name):
 
 # --------------------------------------------------------------------- data ---
 def load_pooled():
-    """Pool the s-histograms once (1024 files/N is slow) and cache to disk."""
-    if os.path.exists(CACHE):
-        d = np.load(CACHE)
-        return {N: (d[f"v{N}"], d[f"m{N}"]) for N in NS}
-    out, blob = {}, {}
+    """The pooled s-histogram per N (common.pool keeps it on disk, up to date)."""
+    out = {}
     for N in NS:
         v, h, _ = pooled(L, N)
         out[N] = (v.astype(np.int64), h["mass"].astype(np.int64))
-        blob[f"v{N}"], blob[f"m{N}"] = out[N]
-        print(f"pooled N={N}")
-    np.savez(CACHE, **blob)
     return out
 
 
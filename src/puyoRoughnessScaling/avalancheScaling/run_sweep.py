@@ -1,17 +1,43 @@
-"""Emit the sweep job list, one line per sim: "L N steps sim H warmup".
+"""Emit the sweep job list, one line per sim: "L N steps sim warmup".
 
 Single source of truth = common.jobs().  Piped into xargs for parallel
 execution:
 
     python run_sweep.py | xargs -P 12 -L 1 ./avalancheDist > /dev/null
 
--P is bounded by memory, not cores: a job holds ~5 bytes * H * L (uint8 lattice
-+ int32 BFS stamps), which is ~203 MB for the L=4096 jobs.
+or run under the memory-aware scheduler (../scheduler.py), which packs jobs
+against cores AND a RAM budget and skips sims whose outputs already exist:
+
+    python run_sweep.py --run [--cores 12] [--mem 48G] [--dry-run]
+
+A job holds ~5 bytes * L * (live rows) (uint8 lattice + int32 BFS stamps) in a
+rolling window of a few hundred rows, ~3 MB at L=4096; the scheduler refines
+that from the measured peak RSS.
 """
-from common import jobs
+import os
+import sys
+
+from common import HERE, jobs
+
+
+def outputs(L, N, steps, sim):
+    """The three files avalancheDist writes for one sim."""
+    stem = f"L_{L}_N_{N}_steps_{steps}_sim_{sim}.tsv"
+    return [f"{HERE}/outputs/{d}/{stem}" for d in ("avalancheDist", "moments", "slopeResolved")]
+
+
+def run(job_list, argv):
+    """Hand `job_list` (tuples of avalancheDist arguments) to ../scheduler.py."""
+    sys.path.insert(0, os.path.dirname(HERE))
+    from scheduler import Job, cli, engine_bytes
+    todo = [Job(j, outputs(*j[:4]), engine_bytes(j[0])) for j in job_list]
+    cli(f"{HERE}/avalancheDist", todo, argv, log=f"{HERE}/outputs/scheduler.jsonl")
 
 
 def main():
+    if "--run" in sys.argv[1:]:
+        run(jobs(), [a for a in sys.argv[1:] if a != "--run"])
+        return
     print("\n".join(" ".join(str(x) for x in j) for j in jobs()))
 
 
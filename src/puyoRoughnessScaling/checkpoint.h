@@ -0,0 +1,254 @@
+// Binary checkpoint/restart for the fast Puyo engines.
+//
+// A checkpoint is the complete state after the DYNAMICS of some step s but
+// before that step is recorded: lattice window, colH, frozen species counts,
+// every accumulator, the mt19937 state and s itself.  Resuming re-enters the
+// loop at the recording of step s, so a resumed run is bit-identical to an
+// uninterrupted one.  Because the recording of s is redone with the NEW step
+// count, the same file also EXTENDS a finished run to a larger STEPS: the only
+// STEPS-dependent output, the "final step" row/sample, is not yet in the
+// checkpoint.  (Recording schedules are therefore laid out for the STEPS of the
+// run that started the chain, carried as the REF_STEPS run parameter, not for
+// the current STEPS; see observers.h.)
+//
+// Flags, accepted anywhere on the command line and stripped before the
+// positional arguments are parsed:
+//   --checkpoint K   write outputs/checkpoints/<tag>.ckpt every K steps and
+//                    at the final step (atomically: write .tmp, then rename)
+//   --resume PATH    continue from PATH; STEPS may be larger than the run that
+//                    wrote it (extend), never smaller than its step
+//
+// The format is raw host-endian PODs behind a magic/version word: it is meant
+// to be read back by the same binary on the same cluster, not archived.
+#pragma once
+#include <cstdint>
+#include <filesystem>
+#include <fstream>
+#include <iostream>
+#include <memory>
+#include <random>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include "rollingLattice.h"
+
+constexpr uint64_t CKPT_MAGIC = 0x54504b434f595550ull;   // "PUYOCKPT"
+constexpr uint32_t CKPT_VERSION = 2;   // 2: run parameters + engine/observer state
+
+struct CkptOptions
+{
+    int every = 0;          // 0 = never write
+    std::string resume;     // empty = fresh run
+};
+
+// strip --checkpoint / --resume from argv; returns the remaining positionals,
+// args[0] being the executable as usual
+inline std::vector<std::string> ckptArgs(int argc, char *argv[], CkptOptions &opt)
+{
+    std::vector<std::string> args;
+    for (int i = 0; i < argc; ++i)
+    {
+        std::string a = argv[i];
+        if (a == "--checkpoint" && i + 1 < argc)
+            opt.every = std::stoi(argv[++i]);
+        else if (a == "--resume" && i + 1 < argc)
+            opt.resume = argv[++i];
+        else
+            args.push_back(a);
+    }
+    return args;
+}
+
+struct CkptWriter
+{
+    std::ofstream out;
+    explicit CkptWriter(const std::filesystem::path &p) : out(p, std::ios::binary) {}
+
+    template <class T>
+    void pod(const T &x) { out.write(reinterpret_cast<const char *>(&x), sizeof(T)); }
+
+    template <class T>
+    void vec(const std::vector<T> &v)
+    {
+        pod(static_cast<uint64_t>(v.size()));
+        out.write(reinterpret_cast<const char *>(v.data()), static_cast<std::streamsize>(v.size() * sizeof(T)));
+    }
+
+    void str(const std::string &s)
+    {
+        pod(static_cast<uint64_t>(s.size()));
+        out.write(s.data(), static_cast<std::streamsize>(s.size()));
+    }
+
+    // the standard guarantees operator<< / >> round-trip an engine exactly
+    void rng(const std::mt19937 &g)
+    {
+        std::ostringstream s;
+        s << g;
+        str(s.str());
+    }
+
+    void lattice(const RollingLattice &lt)
+    {
+        pod(lt.rows); pod(lt.base); pod(lt.floorHits); pod(lt.peakRows);
+        vec(lt.lat); vec(lt.colH); vec(lt.frozenSp);
+    }
+};
+
+struct CkptReader
+{
+    std::ifstream in;
+    explicit CkptReader(const std::filesystem::path &p) : in(p, std::ios::binary) {}
+
+    template <class T>
+    void pod(T &x) { in.read(reinterpret_cast<char *>(&x), sizeof(T)); }
+
+    template <class T>
+    void vec(std::vector<T> &v)
+    {
+        uint64_t n = 0;
+        pod(n);
+        v.resize(n);
+        in.read(reinterpret_cast<char *>(v.data()), static_cast<std::streamsize>(n * sizeof(T)));
+    }
+
+    void str(std::string &s)
+    {
+        uint64_t n = 0;
+        pod(n);
+        s.resize(n);
+        in.read(s.data(), static_cast<std::streamsize>(n));
+    }
+
+    void rng(std::mt19937 &g)
+    {
+        std::string s;
+        str(s);
+        std::istringstream is(s);
+        is >> g;
+    }
+
+    void lattice(RollingLattice &lt)
+    {
+        pod(lt.rows); pod(lt.base); pod(lt.floorHits); pod(lt.peakRows);
+        vec(lt.lat); vec(lt.colH); vec(lt.frozenSp);
+        lt.mask = lt.rows - 1;
+        lt.visitedGen.assign(lt.lat.size(), 0);   // stamps are scratch, not state
+    }
+};
+
+// Identity of a run.  A checkpoint may only be resumed by the same engine with
+// the same (L, N, sim); steps is the STEPS of the run that wrote it.
+struct CkptHeader
+{
+    std::string engine;
+    int L = 0;
+    double N = 0;
+    int sim = 0;
+    int step = 0;
+    int steps = 0;
+
+    void write(CkptWriter &w) const
+    {
+        w.pod(CKPT_MAGIC); w.pod(CKPT_VERSION);
+        w.str(engine); w.pod(L); w.pod(N); w.pod(sim); w.pod(step); w.pod(steps);
+    }
+
+    bool read(CkptReader &r)
+    {
+        uint64_t magic = 0;
+        uint32_t version = 0;
+        r.pod(magic); r.pod(version);
+        if (!r.in || magic != CKPT_MAGIC || version != CKPT_VERSION)
+            return false;
+        r.str(engine); r.pod(L); r.pod(N); r.pod(sim); r.pod(step); r.pod(steps);
+        return static_cast<bool>(r.in);
+    }
+
+    // reject resuming somebody else's run; returns false with a message
+    bool matches(const std::string &eng, int L_, double N_, int sim_, int STEPS) const
+    {
+        std::string why;
+        if (engine != eng) why = "engine " + engine;
+        else if (L != L_) why = "L=" + std::to_string(L);
+        else if (N != N_) why = "N=" + std::to_string(N);
+        else if (sim != sim_) why = "sim=" + std::to_string(sim);
+        else if (STEPS < step) why = "step " + std::to_string(step) + " > requested STEPS";
+        if (why.empty())
+            return true;
+        std::cerr << "Checkpoint does not match this run (" << why << ")\n";
+        return false;
+    }
+};
+
+// write via a temp file so a preemption mid-write never destroys the previous
+// checkpoint; `body` appends the engine-specific state
+template <class F>
+void saveCheckpoint(const std::filesystem::path &path, const CkptHeader &h, F body)
+{
+    std::filesystem::path tmp = path;
+    tmp += ".tmp";
+    {
+        CkptWriter w(tmp);
+        h.write(w);
+        body(w);
+    }
+    std::filesystem::rename(tmp, path);
+}
+
+// A run parameter that shapes the recording (WARMUP, REC_INTERVAL, ...).  It is
+// stored in the checkpoint and a resumed run inherits it; giving a different
+// value explicitly on the command line is an error, not a silent re-bin.
+struct RunParam
+{
+    const char *name;
+    int value;
+    bool given;   // set explicitly on this command line
+};
+
+inline void writeParams(CkptWriter &w, const std::vector<RunParam> &params)
+{
+    w.pod(static_cast<uint64_t>(params.size()));
+    for (const RunParam &p : params) w.pod(p.value);
+}
+
+// Handle --resume: open the file, check it belongs to this run, and adopt its
+// run parameters.  On success rd is left positioned at the engine state (null
+// for a fresh run) and hd.step is the checkpointed step; on failure a message
+// has been printed.
+inline bool resumeRun(const CkptOptions &ck, CkptHeader &hd, std::vector<RunParam> &params,
+                      std::unique_ptr<CkptReader> &rd)
+{
+    if (ck.resume.empty())
+        return true;
+    rd = std::make_unique<CkptReader>(ck.resume);
+    CkptHeader old;
+    if (!old.read(*rd))
+    {
+        std::cerr << "Not a readable checkpoint: " << ck.resume << "\n";
+        return false;
+    }
+    if (!old.matches(hd.engine, hd.L, hd.N, hd.sim, hd.steps))
+        return false;
+    uint64_t n = 0;
+    rd->pod(n);
+    if (n != params.size())
+    {
+        std::cerr << "Checkpoint carries " << n << " run parameter(s), expected " << params.size() << "\n";
+        return false;
+    }
+    for (RunParam &p : params)
+    {
+        int v = 0;
+        rd->pod(v);
+        if (p.given && v != p.value)
+        {
+            std::cerr << "Checkpoint was written with " << p.name << "=" << v << "\n";
+            return false;
+        }
+        p.value = v;
+    }
+    hd.step = old.step;
+    return true;
+}
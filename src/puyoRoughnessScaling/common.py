@@ -4,6 +4,13 @@ The simulation (slopeDistFast) writes, per recorded step, the height profile as
 comma-separated list of local slopes m_i = h_{i+1} - h_i.  The interface width is
 W(t) = std of the reconstructed height profile (additive constant irrelevant).
 
+With --binary it writes the same records at fixed width (.slp, layout in
+observers.h) instead; read_slp memory-maps those, and every loader here takes
+either format, preferring .slp where a sim has both.  With --reduce F it writes
+only outputs/roughness: W(t) and the P(m) histogram over steps >= F*steps,
+which is all the W(t) / slope-PDF analysis needs; the loaders fall back to it
+for sims that have no profile.
+
 All data now lives under this folder's outputs/slopeDist (generated by run_sweep.py).
 """
 import glob
@@ -13,27 +20,30 @@ import numpy as np
 
 ROUGH = os.path.dirname(os.path.abspath(__file__))  # this folder (rename-proof)
 DATA = f"{ROUGH}/outputs/slopeDist"
+REDUCED = f"{ROUGH}/outputs/roughness"
+STEADY_FRAC = 0.7   # steady-state slopes: recorded steps >= STEADY_FRAC * steps
 PLOTS = f"{ROUGH}/plots"
 
 # ---------------------------------------------------------------------------
 # Sweep definition (single source of truth for generation AND analysis).
-# steps sized so the largest L saturates; H bounds the pile (v ~ 1 - 5.24/N);
+# steps sized so the largest L saturates (no box height: the engine's lattice
+# is a rolling window, see rollingLattice.h);
 # gw = growth-fit window for beta; Ls = system sizes run for that N.
 # ---------------------------------------------------------------------------
 FSWEEP = {
-    6:  dict(steps=20000,  H=4736,   gw=(5, 80),    Ls=[16, 32, 64, 128, 256]),
-    7:  dict(steps=24000,  H=8400,   gw=(6, 110),   Ls=[16, 32, 64, 128, 256]),
-    8:  dict(steps=34000,  H=14400,  gw=(8, 160),   Ls=[16, 32, 64, 128, 256]),
-    9:  dict(steps=45000,  H=21760,  gw=(9, 220),   Ls=[16, 32, 64, 128]),
-    10: dict(steps=60000,  H=32000,  gw=(10, 300),  Ls=[16, 32, 64, 128]),
-    12: dict(steps=90000,  H=55296,  gw=(12, 450),  Ls=[16, 32, 64, 128]),
-    15: dict(steps=140000, H=97792,  gw=(15, 700),  Ls=[16, 32, 64, 128]),
-    20: dict(steps=200000, H=157184, gw=(20, 1200), Ls=[16, 32, 64, 128]),
+    6:  dict(steps=20000,  gw=(5, 80),    Ls=[16, 32, 64, 128, 256]),
+    7:  dict(steps=24000,  gw=(6, 110),   Ls=[16, 32, 64, 128, 256]),
+    8:  dict(steps=34000,  gw=(8, 160),   Ls=[16, 32, 64, 128, 256]),
+    9:  dict(steps=45000,  gw=(9, 220),   Ls=[16, 32, 64, 128]),
+    10: dict(steps=60000,  gw=(10, 300),  Ls=[16, 32, 64, 128]),
+    12: dict(steps=90000,  gw=(12, 450),  Ls=[16, 32, 64, 128]),
+    15: dict(steps=140000, gw=(15, 700),  Ls=[16, 32, 64, 128]),
+    20: dict(steps=200000, gw=(20, 1200), Ls=[16, 32, 64, 128]),
 }
 # extra large-N at L=64 only, to extend the slope-PDF / growth-exponent family
 LEXTRA = {
-    30: dict(steps=16000, H=16000),
-    40: dict(steps=16000, H=16640),
+    30: dict(steps=16000),
+    40: dict(steps=16000),
 }
 NSIMS = 48
 FIXED_L = 64  # column used for the slope-PDF and growth-exponent families
@@ -45,17 +55,122 @@ def steps_of(N):
     return FSWEEP[N]["steps"] if N in FSWEEP else LEXTRA[N]["steps"]
 
 
-def pattern(L, N):
+def pattern(L, N, ext="tsv"):
     """Glob for all sims of a given (L, N)."""
-    return f"{DATA}/L_{L}_N_{N}_steps_{steps_of(N)}_sim_*.tsv"
+    return f"{DATA}/L_{L}_N_{N}_steps_{steps_of(N)}_sim_*.{ext}"
+
+
+def sim_files(L, N, steps=None):
+    """One file per sim of (L, N): .slp where present, else the .tsv profile,
+    else the --reduce output."""
+    steps = steps_of(N) if steps is None else steps
+    stem = f"L_{L}_N_{N}_steps_{steps}_sim_*"
+    out = {os.path.basename(f)[:-4]: f for f in glob.glob(f"{REDUCED}/{stem}.tsv")}
+    out.update({os.path.basename(f)[:-4]: f for f in glob.glob(f"{DATA}/{stem}.tsv")})
+    out.update({os.path.basename(f)[:-4]: f for f in glob.glob(f"{DATA}/{stem}.slp")})
+    return [out[k] for k in sorted(out)]
 
 
 def parse_slopes(field):
     return np.array(_INT.findall(field), dtype=float)
 
 
+# --- binary profiles (.slp) -------------------------------------------------
+SLP_HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("L", "<i4"), ("N", "<f8"),
+                       ("steps", "<i4"), ("sim", "<i4"), ("rec", "<i4"),
+                       ("floor_margin", "<i4"), ("nrec", "<i8"), ("clipped", "<i8"),
+                       ("index_offset", "<i8")])
+
+
+def slp_record(L):
+    return np.dtype([("step", "<i4"), ("h0", "<i4"), ("slope", "<i2", (L,))])
+
+
+def read_slp(path):
+    """Memory-map a .slp file.  Returns (header dict, records, steps).
+
+    records is a read-only memmap of slp_record(L); steps comes from the index
+    table when the run finished, else from the records (a run cut short is read
+    up to its last whole record).
+    """
+    h = np.fromfile(path, dtype=SLP_HEADER, count=1)[0]
+    if h["magic"] != b"PUYOSLP1":
+        raise ValueError(f"{path}: not a .slp file")
+    hdr = {k: h[k].item() for k in SLP_HEADER.names if k != "magic"}
+    rec = slp_record(hdr["L"])
+    if hdr["index_offset"]:
+        n = hdr["nrec"]
+    else:
+        n = (os.path.getsize(path) - SLP_HEADER.itemsize) // rec.itemsize
+    if hdr["clipped"]:
+        print(f"warning: {path}: {hdr['clipped']} slope(s) saturated at +-32767")
+    recs = np.memmap(path, dtype=rec, mode="r", offset=SLP_HEADER.itemsize, shape=(n,))
+    if hdr["index_offset"]:
+        steps = np.fromfile(path, dtype="<i4", count=n, offset=hdr["index_offset"])
+    else:
+        steps = np.array(recs["step"])
+    return hdr, recs, steps
+
+
+def _width(slopes):
+    """W of each row of an (n, L) slope block, as roughness_series defines it."""
+    h = np.zeros(slopes.shape, dtype=float)
+    np.cumsum(slopes[:, :-1], axis=1, out=h[:, 1:])
+    return h.std(axis=1)
+
+
+def _roughness_slp(path, chunk=4096):
+    _, recs, steps = read_slp(path)
+    W = np.empty(len(steps))
+    for a in range(0, len(steps), chunk):   # bounded memory for long L=1024 runs
+        W[a:a + chunk] = _width(recs["slope"][a:a + chunk])
+    return steps.astype(float), W
+
+
+# --- reduced output (--reduce) ----------------------------------------------
+def _is_reduced(path):
+    return os.path.basename(os.path.dirname(path)) == "roughness"
+
+
+def read_reduced(path):
+    """Parse a --reduce file.  Returns (meta, t, mean_h, W, m, count)."""
+    with open(path) as fh:
+        lines = fh.read().splitlines()
+    meta = dict(kv.split("=") for kv in lines[0][1:].split())
+    cut = lines.index("# slopes")
+    r = np.array([ln.split("\t") for ln in lines[2:cut]], dtype=float).reshape(-1, 3)
+    h = np.array([ln.split("\t") for ln in lines[cut + 2:]], dtype=np.int64).reshape(-1, 2)
+    return meta, r[:, 0], r[:, 1], r[:, 2], h[:, 0], h[:, 1]
+
+
+def steady_slopes_file(path, thr):
+    """All slopes recorded at step >= thr in one file, as a flat float array."""
+    if _is_reduced(path):
+        meta, *_, m, count = read_reduced(path)
+        if int(meta["steady_from"]) != int(np.ceil(thr)):
+            raise ValueError(f"{path}: P(m) was reduced from step {meta['steady_from']}, not {thr:g}")
+        return np.repeat(m, count).astype(float)
+    if path.endswith(".slp"):
+        _, recs, steps = read_slp(path)
+        return recs["slope"][steps >= thr].astype(float).ravel()
+    out = []
+    with open(path) as fh:
+        next(fh)
+        for line in fh:
+            p = line.split("\t")
+            if len(p) < 3 or not p[2].strip() or float(p[0]) < thr:
+                continue
+            out.append(parse_slopes(p[2].strip()))
+    return np.concatenate(out) if out else np.array([])
+
+
 def roughness_series(path):
-    """Return (steps, W(t)) for one simulation file."""
+    """Return (steps, W(t)) for one simulation file (.tsv, .slp or reduced)."""
+    if _is_reduced(path):
+        _, t, _, W, _, _ = read_reduced(path)
+        return t, W
+    if path.endswith(".slp"):
+        return _roughness_slp(path)
     t, W = [], []
     with open(path) as fh:
         next(fh)
@@ -72,7 +187,7 @@ def roughness_series(path):
 
 def stack(L, N):
     """Stack W(t) over all sims for (L, N). Returns (t, W[sim, t]) or (None, None)."""
-    files = sorted(glob.glob(pattern(L, N)))
+    files = sim_files(L, N)
     if not files:
         return None, None
     ref, rows = None, []
@@ -65,11 +65,14 @@ def load(L, N, steps):
                 h_all=np.array(hs), nsims=len(hs))
 
 
-def ceiling_hits(L, N, steps):
+def floor_hits(L, N, steps):
+    """Summed floor_hits over sims (must be 0).  Files from the old fixed-box
+    engine report ceiling_hits instead; either one marks a corrupted run.
+    """
     tot = 0
     for f in glob.glob(fname(L, N, steps, 0).replace("_sim_0", "_sim_*")):
         with open(f) as fh:
-            m = re.search(r"ceiling_hits=(\d+)", fh.readline())
+            m = re.search(r"(?:ceiling|floor)_hits=(\d+)", fh.readline())
             if m:
                 tot += int(m.group(1))
     return tot
@@ -50,10 +50,11 @@ def save(fig, name):
 
 def plateau(N, L, steps=STEPS_MAIN, key="h"):
     """Late-time plateau of <h> or W, averaged over the last stretch of samples.
-    Returns None if the run is absent or was corrupted by a box-ceiling hit --
-    a ceiling caps the pile and fakes an arrest, so those must never be used.
+    Returns None if the run is absent or was corrupted by a floor (or, for old
+    fixed-box runs, ceiling) hit -- either makes the pile wrong and can fake an
+    arrest, so those must never be used.
     """
-    if common.ceiling_hits(L, N, steps) > 0:
+    if common.floor_hits(L, N, steps) > 0:
         return None
     d = common.load(L, N, steps)
     return None if d is None else float(d[key][-40:].mean())
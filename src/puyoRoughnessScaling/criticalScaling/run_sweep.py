@@ -1,46 +1,54 @@
 """Emit the argument lines for the criticalScaling sweep.
 
     python run_sweep.py | xargs -P 12 -L 1 ./criticalScaling > /dev/null
-
-Box height H is the one parameter that must be right: too small and the pile
-hits the ceiling, which caps it and **fakes an arrest** -- the exact artifact
-this study is trying to detect.  H is therefore sized from a measured v(N) with
-a 1.8x margin, and every run reports ceiling_hits (must be 0; the analysis
-refuses contaminated runs).
-
-Parallelism is bounded by memory, not cores: a job holds 5*H*L bytes.
+    python run_sweep.py --run [--cores 12] [--mem 48G]   # ../scheduler.py
+
+There is no box height any more.  It used to be the one parameter that had to
+be right: too small and the pile hit the ceiling, which capped it and **faked an
+arrest** -- the exact artifact this study is trying to detect.  The engine now
+keeps a rolling window of the rows a cascade can still reach (see
+../rollingLattice.h), so no per-N velocity guess is needed.  Every run reports
+floor_hits instead (must be 0; the analysis refuses contaminated runs).
+
+A job holds ~5*L*(roughness + 2*FLOOR_MARGIN) bytes -- a few MB even at
+L=8192 -- so parallelism is bounded by cores again.  --run packs jobs against
+cores and a RAM budget anyway (the estimate is corrected from measured peak RSS
+as jobs finish) and skips sims whose output already exists.
 """
-STEPS = 2000000
+import os
+import sys
 
-# Measured late-time velocity at L=4096; ~0 in the bound phase (N < N_c=5.0765).
-VEL = {5.00: 0, 5.02: 0, 5.04: 0, 5.05: 0, 5.06: 0, 5.065: 0,
-       5.070: 1e-4, 5.072: 2e-4, 5.075: 5e-4,
-       5.078: 1e-3, 5.080: 1.5e-3, 5.085: 3e-3, 5.090: 4.5e-3}
+from common import HERE, fname
+STEPS = 2000000
 
-# main N scan at fixed large L
+# main N scan at fixed large L; bracket N_c=5.0765 on both sides
+NS = [5.00, 5.02, 5.04, 5.05, 5.06, 5.065, 5.070, 5.072, 5.075,
+      5.078, 5.080, 5.085, 5.090]
 MAIN_L, MAIN_NSIMS = 4096, 4
 # finite-size check at one N: the arrest must be shown to survive L -> infinity
 FS_N, FS_LS, FS_NSIMS = 5.075, [512, 1024, 2048, 4096, 8192], 8
 
 
-def box_H(N, L):
-    return int(max(300, VEL[N] * STEPS * 1.8 + 800))
-
-
 def jobs():
-    for N in VEL:
+    for N in NS:
         for s in range(MAIN_NSIMS):
-            yield MAIN_L, N, STEPS, s, box_H(N, MAIN_L)
+            yield MAIN_L, N, STEPS, s
     for L in FS_LS:
         if L == MAIN_L:
             continue
         for s in range(FS_NSIMS):
-            # small L stays above threshold and grows, so it needs a TALLER box
-            # than the same N at large L -- this is what the first run got wrong
-            yield L, FS_N, STEPS, s, int(2500 * 4096 / L) + 500
+            yield L, FS_N, STEPS, s
 
 
 if __name__ == "__main__":
-    # biggest boxes first, so the memory peak happens while the queue is full
-    for L, N, steps, s, H in sorted(jobs(), key=lambda j: -j[4] * j[0]):
-        print(f"{L} {N} {steps} {s} {H}")
+    # widest first: cost is ~L per step, so the long jobs start while the queue is full
+    ordered = sorted(jobs(), key=lambda j: -j[0])
+    if "--run" in sys.argv[1:]:
+        sys.path.insert(0, os.path.dirname(HERE))
+        from scheduler import Job, cli, engine_bytes
+        cli(os.path.join(HERE, "criticalScaling"),
+            [Job(j, [fname(*j)], engine_bytes(j[0])) for j in ordered],
+            [a for a in sys.argv[1:] if a != "--run"], log=os.path.join(HERE, "outputs", "scheduler.jsonl"))
+    else:
+        for L, N, steps, s in ordered:
+            print(f"{L} {N} {steps} {s}")
@@ -9,14 +9,25 @@ and test the Family-Vicsek identity  beta * z = alpha.
 A per-(N,L) saturation check (sim-averaged late/mid W ratio) filters out sizes
 that have not saturated, so they don't corrupt the alpha/z fits.
 
+The bootstrap is batched: a block of replicates is drawn at once as a matrix of
+resample COUNTS (replicate x sim, multinomial -- the same distribution as
+resampling sim indices with replacement), so every replicate's mean W(t) is one
+matrix product, and the log-log fits are closed-form least squares over masked
+rows.  nboot=10000 costs about what a single Python-loop replicate per N used
+to.  Each N has its own seeded stream, so results do not depend on `workers`.
+
 Run directly to print the table; import measure_all()/measure_fv() for figures.
 """
+import argparse
+from multiprocessing import Pool
+
 import numpy as np
 from common import stack, FSWEEP
 
-_rng = np.random.default_rng(1)
+SEED = 1
 CFRAC = 0.75          # crossover threshold as fraction of W_sat
 SAT_THRESH = 1.06     # late/mid W ratio below this => saturated
+CHUNK = 1000          # replicates per batch: bounds RAM at CHUNK * len(t) floats
 
 
 def _load(N):
@@ -39,46 +50,99 @@ def saturated_Ls(stacks):
     return sorted(out), ratios
 
 
-def _bootstrap(N, stacks, satLs, nboot=300):
-    gw = FSWEEP[N]["gw"]
+def _resampled_means(rng, Warr, nrep):
+    """Mean W(t) of `nrep` bootstrap resamples of the sims: (nrep, len(t))."""
+    n = Warr.shape[0]
+    counts = rng.multinomial(n, np.full(n, 1.0 / n), size=nrep)
+    return counts @ Warr / n
+
+
+def _slopes(x, y, w):
+    """Least-squares slope of y on x per row, over the entries where w is True.
+
+    x broadcasts against y (one row per replicate); rows with < 2 points get nan.
+    Same estimate as np.polyfit(x[w], y[w], 1)[0] row by row.
+    """
+    w = np.broadcast_to(w, y.shape)
+    x = np.broadcast_to(x, y.shape)
+    x = np.where(w, x, 0.0)
+    y = np.where(w, y, 0.0)
+    n = w.sum(1)
+    sx, sy = x.sum(1), y.sum(1)
+    sxx, sxy = (x * x).sum(1), (x * y).sum(1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+    return np.where(n >= 2, out, np.nan)
+
+
+def _sat_and_cross(t, Wm, cf):
+    """Per replicate: W_sat (mean over t >= 0.6 T) and the first t where W
+    reaches cf * W_sat (nan if never).  cf is a scalar or one per replicate."""
+    ws = Wm[:, t >= 0.6 * t.max()].mean(1)
+    hit = Wm >= np.reshape(cf, (-1, 1)) * ws[:, None]
+    k = hit.argmax(1)
+    tx = np.where(hit[np.arange(len(k)), k], t[k], np.nan)
+    return ws, tx
+
+
+def _fit_block(stacks, satLs, Lbeta, rng, nrep, cf, wins):
+    """alpha, beta, z for `nrep` replicates.  wins: (nrep, 2) growth windows."""
+    Wsat = np.empty((nrep, len(satLs)))
+    tx = np.empty((nrep, len(satLs)))
+    for i, L in enumerate(satLs):
+        t, Warr = stacks[L]
+        Wsat[:, i], tx[:, i] = _sat_and_cross(t, _resampled_means(rng, Warr, nrep), cf)
+    # beta on largest saturated L
+    t, Warr = stacks[Lbeta]
+    Wm = _resampled_means(rng, Warr, nrep)
+    m = (t >= wins[:, :1]) & (t <= wins[:, 1:]) & (Wm > 0)
+    with np.errstate(divide="ignore"):
+        beta = _slopes(np.log(t), np.log(Wm), m)
+    lLa = np.log(np.array(satLs, float))
+    alpha = _slopes(lLa, np.log(Wsat), np.ones_like(Wsat, bool))
+    mz = np.isfinite(tx) & (tx > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = _slopes(lLa, np.log(tx), mz)
+    return alpha, beta, z
+
+
+def _blocks(nboot):
+    for lo in range(0, nboot, CHUNK):
+        yield min(CHUNK, nboot - lo)
+
+
+def _bootstrap(N, stacks, satLs, nboot=300, rng=None):
+    rng = rng if rng is not None else np.random.default_rng((SEED, N))
+    gw = np.array(FSWEEP[N]["gw"], float)
     Lbeta = satLs[-1] if satLs else max(stacks)   # largest saturated L for beta
-    La = np.array(satLs, float)
-    a_s, b_s, z_s = [], [], []
-    for _ in range(nboot):
-        Wsat, tx = [], []
-        for L in satLs:
-            t, Warr = stacks[L]
-            Wm = Warr[_rng.integers(0, Warr.shape[0], Warr.shape[0])].mean(0)
-            ws = Wm[t >= 0.6 * t.max()].mean()
-            Wsat.append(ws)
-            k = np.argmax(Wm >= CFRAC * ws)
-            tx.append(t[k] if Wm[k] >= CFRAC * ws else np.nan)
-        # beta on largest saturated L
-        t, Warr = stacks[Lbeta]
-        Wm = Warr[_rng.integers(0, Warr.shape[0], Warr.shape[0])].mean(0)
-        m = (t >= gw[0]) & (t <= gw[1]) & (Wm > 0)
-        b_s.append(np.polyfit(np.log(t[m]), np.log(Wm[m]), 1)[0])
-        Wsat = np.array(Wsat); tx = np.array(tx)
-        a_s.append(np.polyfit(np.log(La), np.log(Wsat), 1)[0])
-        mz = np.isfinite(tx) & (tx > 0)
-        z_s.append(np.polyfit(np.log(La[mz]), np.log(tx[mz]), 1)[0] if mz.sum() >= 2 else np.nan)
-    return np.array(a_s), np.array(b_s), np.array(z_s)
-
-
-def measure_all(nboot=300):
-    res = {}
-    for N in FSWEEP:
-        stacks = _load(N)
-        satLs, ratios = saturated_Ls(stacks)
-        Wsat = np.array([stacks[L][1].mean(0)[stacks[L][0] >= 0.6 * stacks[L][0].max()].mean()
-                         for L in FSWEEP[N]["Ls"]])
-        if len(satLs) >= 3:
-            a_s, b_s, z_s = _bootstrap(N, stacks, satLs, nboot)
-        else:
-            a_s = b_s = z_s = np.array([np.nan])
-        res[N] = dict(alpha=a_s, beta=b_s, z=z_s, Wsat=Wsat, ratios=ratios,
-                      Ls=FSWEEP[N]["Ls"], satLs=satLs)
-    return res
+    out = [_fit_block(stacks, satLs, Lbeta, rng, n, CFRAC, np.tile(gw, (n, 1)))
+           for n in _blocks(nboot)]
+    return tuple(np.concatenate(x) for x in zip(*out))
+
+
+def _measure_one(args):
+    N, nboot = args
+    stacks = _load(N)
+    satLs, ratios = saturated_Ls(stacks)
+    Wsat = np.array([stacks[L][1].mean(0)[stacks[L][0] >= 0.6 * stacks[L][0].max()].mean()
+                     for L in FSWEEP[N]["Ls"]])
+    if len(satLs) >= 3:
+        a_s, b_s, z_s = _bootstrap(N, stacks, satLs, nboot)
+    else:
+        a_s = b_s = z_s = np.array([np.nan])
+    return dict(alpha=a_s, beta=b_s, z=z_s, Wsat=Wsat, ratios=ratios,
+                Ls=FSWEEP[N]["Ls"], satLs=satLs)
+
+
+def measure_all(nboot=300, workers=1):
+    """Bootstrap every N of FSWEEP; workers > 1 runs the N in parallel."""
+    todo = [(N, nboot) for N in FSWEEP]
+    if workers > 1:
+        with Pool(workers) as pool:
+            out = pool.map(_measure_one, todo)
+    else:
+        out = [_measure_one(a) for a in todo]
+    return dict(zip(FSWEEP, out))
 
 
 # --- Family-Vicsek inputs with SYSTEMATIC (window/threshold) uncertainty -------
@@ -91,35 +155,22 @@ def _beta_windows(N):
 
 
 def measure_fv(N, nboot=600):
+    """alpha and beta*z per replicate, each replicate also drawing its growth
+    window and crossover threshold, so the spread includes those choices."""
     stacks = _load(N)
     satLs, _ = saturated_Ls(stacks)
     if len(satLs) < 3:
         return np.array([np.nan]), np.array([np.nan])
-    Lbeta = satLs[-1]
-    La = np.array(satLs, float)
-    wins = _beta_windows(N)
+    rng = np.random.default_rng((SEED, N, 1))
+    wins = np.array(_beta_windows(N), float)
+    thr = np.array(_Z_THRESH)
     a_s, bz_s = [], []
-    for _ in range(nboot):
-        lo, hi = wins[_rng.integers(len(wins))]
-        cf = _Z_THRESH[_rng.integers(len(_Z_THRESH))]
-        Wsat, tx = [], []
-        for L in satLs:
-            t, Warr = stacks[L]
-            Wm = Warr[_rng.integers(0, Warr.shape[0], Warr.shape[0])].mean(0)
-            ws = Wm[t >= 0.6 * t.max()].mean()
-            Wsat.append(ws)
-            k = np.argmax(Wm >= cf * ws)
-            tx.append(t[k] if Wm[k] >= cf * ws else np.nan)
-        t, Warr = stacks[Lbeta]
-        Wm = Warr[_rng.integers(0, Warr.shape[0], Warr.shape[0])].mean(0)
-        m = (t >= lo) & (t <= hi) & (Wm > 0)
-        beta = np.polyfit(np.log(t[m]), np.log(Wm[m]), 1)[0]
-        Wsat = np.array(Wsat); tx = np.array(tx)
-        alpha = np.polyfit(np.log(La), np.log(Wsat), 1)[0]
-        mz = np.isfinite(tx) & (tx > 0)
-        z = np.polyfit(np.log(La[mz]), np.log(tx[mz]), 1)[0] if mz.sum() >= 2 else np.nan
+    for n in _blocks(nboot):
+        w = wins[rng.integers(len(wins), size=n)]
+        cf = thr[rng.integers(len(thr), size=n)]
+        alpha, beta, z = _fit_block(stacks, satLs, satLs[-1], rng, n, cf, w)
         a_s.append(alpha); bz_s.append(beta * z)
-    return np.array(a_s), np.array(bz_s)
+    return np.concatenate(a_s), np.concatenate(bz_s)
 
 
 def _pm(x):
@@ -127,7 +178,11 @@ def _pm(x):
 
 
 if __name__ == "__main__":
-    res = measure_all()
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--nboot", type=int, default=300)
+    ap.add_argument("--workers", type=int, default=1, help="N values bootstrapped in parallel")
+    a = ap.parse_args()
+    res = measure_all(a.nboot, a.workers)
     hdr = f"{'N':>3} | {'alpha':>11} | {'beta':>11} | {'z':>11} | {'beta*z':>11} | saturated L / all"
     print(hdr); print("-" * len(hdr))
     for N, r in res.items():
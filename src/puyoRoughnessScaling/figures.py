@@ -8,12 +8,11 @@
   family_vicsek   test of the identity  alpha = beta * z
   growth_anatomy  W(t) log-log showing the transient is not a single power law
 """
-import glob
 import numpy as np
 import matplotlib.pyplot as plt
 
-from common import (mean_W, stack, parse_slopes, pattern, steps_of,
-                    PLOTS, FSWEEP, FIXED_L, all_N_at_fixed_L)
+from common import (mean_W, stack, sim_files, steady_slopes_file, steps_of,
+                    STEADY_FRAC, PLOTS, FSWEEP, FIXED_L, all_N_at_fixed_L)
 from exponents import measure_all, measure_fv, saturated_Ls, SAT_THRESH
 
 plt.rcParams.update({
@@ -58,16 +57,8 @@ def fig_beta_eff():
 
 # --------------------------------------------------------------------------
 def _steady_slopes(N):
-    thr = 0.7 * steps_of(N)
-    out = []
-    for f in sorted(glob.glob(pattern(FIXED_L, N))):
-        with open(f) as fh:
-            next(fh)
-            for line in fh:
-                p = line.split("\t")
-                if len(p) < 3 or not p[2].strip() or float(p[0]) < thr:
-                    continue
-                out.append(parse_slopes(p[2].strip()))
+    thr = STEADY_FRAC * steps_of(N)
+    out = [steady_slopes_file(f, thr) for f in sim_files(FIXED_L, N)]
     return np.concatenate(out) if out else np.array([])
 
 
@@ -262,9 +253,8 @@ LARGE_L_SPEC = {
 
 
 def _meanW_spec(L, N, spec):
-    import glob as _g
-    from common import roughness_series, DATA
-    fs = sorted(_g.glob(f"{DATA}/L_{L}_N_{N}_steps_{spec[L]}_sim_*.tsv"))
+    from common import roughness_series
+    fs = sim_files(L, N, spec[L])
     rows, ref = [], None
     for f in fs:
         tt, ww = roughness_series(f)
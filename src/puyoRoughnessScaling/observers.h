@@ -0,0 +1,791 @@
+// What the Puyo engine (puyoEngine.h) can record.  Each observer writes the
+// file one of the old single-purpose engines wrote, byte for byte, into
+// <root>/outputs/<subdir>/, so the per-study analysis code reads it unchanged:
+//
+//   name           subdir          old engine / study
+//   avalanche      avalancheDist   avalancheScaling: P(s), P(n), P(d) after warmup
+//   moments        moments         avalancheScaling: log-windowed moments, all t
+//   slopeResolved  slopeResolved   avalancheScaling: <s|m>, <s|w>, pile composition
+//   growth         growth          criticalScaling: h(t), W(t) at log-spaced t
+//   velocity       velocity        probabilityPuyo: linear h(t), pile/elim by species
+//   profile        slopeDist       slopeDistFast: full slope profile per record
+//                                  (.tsv, or the binary .slp with RunInfo::binary)
+//   roughness      roughness       slopeDistFast --reduce: W(t), <h>(t) and the
+//                                  steady-state P(m), without the profiles
+//
+// Recording schedules never depend on STEPS except through "STEPS is the last
+// step", so a checkpointed run can be extended (checkpoint.h); each schedule is
+// laid out for RunInfo::refSteps instead, the STEPS of the run that started the
+// checkpoint chain (a RunParam, so an extended run inherits it).
+#pragma once
+#include <vector>
+#include <string>
+#include <sstream>
+#include <fstream>
+#include <iomanip>
+#include <filesystem>
+#include <memory>
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+
+#include "puyoEngine.h"
+
+// what every observer needs to know about the run
+struct RunInfo
+{
+    int L;
+    double N;
+    int steps;
+    int sim;
+    int warmup;         // steps excluded from steady-state statistics
+    int rec;            // profile: record every rec-th step after the first 256
+    bool binary;        // profile: write .slp (see ProfileObserver) instead of .tsv
+    int steadyFrom;     // roughness: P(m) accumulates over recorded steps >= this
+    int refSteps;       // moments/growth/velocity: schedules are laid out for this many steps
+};
+
+// N appears in filenames; fix the format so globs are predictable.  The
+// avalanche study has always used 3 decimals, the later studies 4.
+inline std::string fmtN(double N, int prec)
+{
+    std::ostringstream s;
+    s << std::fixed << std::setprecision(prec) << N;
+    return s.str();
+}
+
+inline std::string runStem(const RunInfo &r, const std::string &n)
+{
+    return "L_" + std::to_string(r.L) + "_N_" + n + "_steps_" + std::to_string(r.steps) +
+           "_sim_" + std::to_string(r.sim);
+}
+
+// open <root>/outputs/<subdir>/<stem><ext>, creating the directory
+inline bool openOutput(std::ofstream &f, const std::filesystem::path &root, const char *subdir,
+                       const std::string &stem, std::ios::openmode mode = std::ios::out,
+                       const char *ext = ".tsv")
+{
+    std::filesystem::path p = root / "outputs" / subdir / (stem + ext);
+    std::filesystem::create_directories(p.parent_path());
+    f.open(p, mode);
+    if (!f.is_open())
+        std::cerr << "Failed to open " << p.string() << "\n";
+    return f.is_open();
+}
+
+// grow-on-demand histogram: bump(h, v) increments the bin for value v
+static inline void bump(std::vector<long long> &h, size_t v)
+{
+    if (v >= h.size())
+        h.resize(v + 1, 0);
+    ++h[v];
+}
+
+// the "# L=... warmup=..." line every avalancheScaling file starts with
+inline void avalancheHeader(std::ostream &f, const RunInfo &r)
+{
+    f << "# L=" << r.L << " N=" << r.N << " steps=" << r.steps
+      << " floor_margin=" << FLOOR_MARGIN << " warmup=" << r.warmup << "\n";
+}
+
+// One "avalanche" = the entire cascade triggered by a single deposition:
+//   mass     s : total number of blocks eliminated before the pile is quiet again
+//   clusters n : number of maximal same-species components eliminated
+//   duration d : number of chain generations that eliminated at least one block
+// Depositions that eliminate nothing (s = 0) are counted but not histogrammed.
+// Histograms accumulate in RAM and are dumped once: output is O(s_max).
+class AvalancheObserver : public Observer
+{
+public:
+    AvalancheObserver(const RunInfo &r, std::filesystem::path root) : run(r), root(std::move(root)) {}
+    const char *name() const override { return "avalanche"; }
+
+    bool begin() override { return openOutput(file, root, "avalancheDist", runStem(run, fmtN(run.N, 3))); }
+
+    void cascade(int step, const Cascade &c) override
+    {
+        if (step < run.warmup)
+            return;
+        ++drops_counted;
+        if (c.mass > 0)
+        {
+            ++drops_active;
+            bump(histMass, static_cast<size_t>(c.mass));
+            bump(histClusters, static_cast<size_t>(c.clusters));
+            bump(histDuration, static_cast<size_t>(c.duration));
+        }
+    }
+
+    void finish(const PuyoEngine &e) override
+    {
+        // metadata as comments, then one row per value; a value's bins are 0 where
+        // that observable never took it (the three histograms share a value axis).
+        avalancheHeader(file, run);
+        // steps_recorded is the meaningful measure of run length; drops_counted is
+        // only here because P(s) must be normalized per deposition.
+        file << "# steps_recorded=" << (run.steps - run.warmup + 1)
+             << " drops_counted=" << drops_counted << " drops_active=" << drops_active
+             << " floor_hits=" << e.lt.floorHits << " peak_rows=" << e.lt.peakRows << "\n";
+        file << "value\tmass\tclusters\tduration\n";
+        size_t vmax = std::max({histMass.size(), histClusters.size(), histDuration.size()});
+        for (size_t v = 1; v < vmax; ++v)
+        {
+            long long m = v < histMass.size() ? histMass[v] : 0;
+            long long c = v < histClusters.size() ? histClusters[v] : 0;
+            long long d = v < histDuration.size() ? histDuration[v] : 0;
+            if (m == 0 && c == 0 && d == 0)
+                continue;
+            file << v << "\t" << m << "\t" << c << "\t" << d << "\n";
+        }
+        file.close();
+    }
+
+    void save(CkptWriter &w) override { io(w); }
+    void load(CkptReader &r) override { io(r); }
+
+private:
+    RunInfo run;
+    std::filesystem::path root;
+    std::ofstream file;
+    long long drops_counted = 0;   // depositions after warmup (normalization)
+    long long drops_active = 0;    // of those, ones that triggered an elimination
+    std::vector<long long> histMass, histClusters, histDuration;
+
+    template <class IO> void io(IO &s)
+    {
+        s.pod(drops_counted); s.pod(drops_active);
+        s.vec(histMass); s.vec(histClusters); s.vec(histDuration);
+    }
+};
+
+// Per-time-window moments over ALL t, including the transient.  These exist
+// to *verify* steady state rather than assume it: <s^2>/<s> vs t must plateau
+// well before WARMUP.  Windows are log spaced, since the approach to steady
+// state is a power law in t.  The mean pile height per window gives the
+// growth velocity v = d<h>/dt, the order parameter of the arrest at N_c.
+class MomentsObserver : public Observer
+{
+public:
+    static constexpr int NWIN = 64;   // log-spaced time windows per run.refSteps
+
+    MomentsObserver(const RunInfo &r, std::filesystem::path root) : run(r), root(std::move(root))
+    {
+        // step -> window index, precomputed so the hot loop does one array lookup.
+        // The log grid is anchored at refSteps rather than STEPS, so extending a
+        // run never re-bins what is already accumulated; at STEPS == refSteps it
+        // is exactly NWIN windows, the last ending at STEPS.
+        winOf.assign(run.steps + 1, 0);
+        winEdge = {edgeAt(0), edgeAt(1)};
+        for (int s = 0, w = 0; s <= run.steps; ++s)
+        {
+            while (s + 1 > winEdge[w + 1])
+            {
+                ++w;
+                if (w + 1 >= static_cast<int>(winEdge.size()))
+                    winEdge.push_back(edgeAt(w + 1));
+            }
+            winOf[s] = w;
+        }
+        nwin = static_cast<size_t>(winOf.back()) + 1;
+        resize();
+    }
+    const char *name() const override { return "moments"; }
+
+    bool begin() override { return openOutput(file, root, "moments", runStem(run, fmtN(run.N, 3))); }
+
+    void cascade(int step, const Cascade &c) override
+    {
+        int w = winOf[step];
+        ++wDrops[w];
+        if (c.mass > 0)
+        {
+            ++wActive[w];
+            wS[w] += c.mass;
+            wS2[w] += c.mass * c.mass;
+            if (c.mass > wMax[w]) wMax[w] = c.mass;
+        }
+    }
+
+    void record(int step, const PuyoEngine &e) override
+    {
+        int w = winOf[step];   // O(L) per step, negligible against the L depositions
+        wH[w] += e.meanHeight();
+        ++wHn[w];
+    }
+
+    void finish(const PuyoEngine &) override
+    {
+        avalancheHeader(file, run);
+        file << "step_lo\tstep_hi\tdrops\tactive\tsum_s\tsum_s2\ts_max\tmean_h\n";
+        for (size_t w = 0; w < nwin; ++w)
+        {
+            if (wDrops[w] == 0)
+                continue;
+            long long lo = static_cast<long long>(std::floor(winEdge[w])) - 1;
+            long long hi = std::min(static_cast<long long>(std::floor(winEdge[w + 1])) - 1,
+                                    static_cast<long long>(run.steps));
+            file << lo << "\t" << hi << "\t" << wDrops[w] << "\t" << wActive[w] << "\t"
+                 << wS[w] << "\t" << wS2[w] << "\t" << wMax[w] << "\t"
+                 << std::fixed << std::setprecision(4)
+                 << (wHn[w] ? wH[w] / wHn[w] : 0.0) << "\n";
+        }
+        file.close();
+    }
+
+    void save(CkptWriter &w) override { io(w); }
+    void load(CkptReader &r) override { io(r); resize(); }   // windows past the old STEPS start empty
+
+private:
+    RunInfo run;
+    std::filesystem::path root;
+    std::ofstream file;
+    std::vector<int> winOf;
+    std::vector<double> winEdge;
+    size_t nwin = 0;
+    std::vector<long long> wDrops, wActive, wS, wS2, wMax, wHn;
+    std::vector<double> wH;
+
+    // refSteps >= 1 keeps the grid growing; at refSteps 0 only window 0 is used anyway
+    double edgeAt(int w) const
+    { return std::pow(static_cast<double>(std::max(run.refSteps, 1) + 1), static_cast<double>(w) / NWIN); }
+
+    void resize()
+    {
+        for (auto *v : {&wDrops, &wActive, &wS, &wS2, &wMax, &wHn}) v->resize(nwin, 0);
+        wH.resize(nwin, 0.0);
+    }
+
+    template <class IO> void io(IO &s)
+    {
+        s.vec(wDrops); s.vec(wActive); s.vec(wS); s.vec(wS2); s.vec(wMax); s.vec(wH); s.vec(wHn);
+    }
+};
+
+// Slope-resolved cascade mass: <s|m> vs m, a DIRECT test of the mechanism
+// P(m) ~ exp(-lambda m) & s ~ m^d  =>  P(s) is Weibull with shape 1/d, where m
+// is the local slope at the deposition column before the block lands.  The
+// extent w (distinct columns eliminated in) gets the same treatment, being a
+// variable that actually correlates with mass.  The final species composition
+// tests the sawtooth mechanism: a fractional ("impurity") species enriched in
+// the pile relative to its deposition rate is a frozen defect that fragments
+// clusters.  Rows below the rolling floor count through frozenSp.
+class SlopeResolvedObserver : public Observer
+{
+public:
+    static constexpr int MRANGE = 48;   // m is binned over [-MRANGE, MRANGE]
+
+    SlopeResolvedObserver(const RunInfo &r, std::filesystem::path root)
+        : run(r), root(std::move(root)), mCount(2 * MRANGE + 1, 0), mSum(2 * MRANGE + 1, 0),
+          mSum2(2 * MRANGE + 1, 0), mAct(2 * MRANGE + 1, 0) {}
+    const char *name() const override { return "slopeResolved"; }
+
+    bool begin() override { return openOutput(file, root, "slopeResolved", runStem(run, fmtN(run.N, 3))); }
+
+    void cascade(int step, const Cascade &c) override
+    {
+        if (step < run.warmup)
+            return;
+        int mi = std::clamp(c.slope, -MRANGE, MRANGE) + MRANGE;
+        ++mCount[mi];
+        mSum[mi] += c.mass;
+        mSum2[mi] += c.mass * c.mass;
+        if (c.mass > 0)
+        {
+            ++mAct[mi];
+            size_t wi = static_cast<size_t>(c.width);
+            if (wi >= wCount.size())
+            {
+                wCount.resize(wi + 1, 0); wSum.resize(wi + 1, 0); wSum2.resize(wi + 1, 0);
+            }
+            ++wCount[wi]; wSum[wi] += c.mass; wSum2[wi] += c.mass * c.mass;
+        }
+    }
+
+    void finish(const PuyoEngine &e) override
+    {
+        int nsp = e.nSpecies;
+        std::vector<long long> pileSp = e.lt.pileBySpecies();
+        long long pileTot = 0;
+        for (int i = 1; i <= nsp; ++i) pileTot += pileSp[i];
+
+        avalancheHeader(file, run);
+        file << "# pile_total=" << pileTot << " pile_by_species=";
+        for (int i = 1; i <= nsp; ++i)
+            file << pileSp[i] << (i < nsp ? "," : "");
+        file << "\n";
+        file << "m\tdrops\tactive\tsum_s\tsum_s2\n";
+        for (int i = 0; i <= 2 * MRANGE; ++i)
+        {
+            if (mCount[i] == 0)
+                continue;
+            file << (i - MRANGE) << "\t" << mCount[i] << "\t" << mAct[i] << "\t"
+                 << mSum[i] << "\t" << mSum2[i] << "\n";
+        }
+        file << "# extent\n";
+        file << "w\tcount\tsum_s\tsum_s2\n";
+        for (size_t i = 1; i < wCount.size(); ++i)
+        {
+            if (wCount[i] == 0)
+                continue;
+            file << i << "\t" << wCount[i] << "\t" << wSum[i] << "\t" << wSum2[i] << "\n";
+        }
+        file.close();
+    }
+
+    void save(CkptWriter &w) override { io(w); }
+    void load(CkptReader &r) override { io(r); }
+
+private:
+    RunInfo run;
+    std::filesystem::path root;
+    std::ofstream file;
+    std::vector<long long> mCount, mSum, mSum2, mAct;
+    std::vector<long long> wCount, wSum, wSum2;
+
+    template <class IO> void io(IO &s)
+    {
+        s.vec(mCount); s.vec(mSum); s.vec(mSum2); s.vec(mAct);
+        s.vec(wCount); s.vec(wSum); s.vec(wSum2);
+    }
+};
+
+// h(t) and W(t) at log-spaced times, for the finite-size scaling of v at N_c
+// (criticalScaling/readme.md).  Activity is accumulated per segment between
+// samples, so each reported value is local in time rather than a running
+// average over the whole transient.
+class GrowthObserver : public Observer
+{
+public:
+    static constexpr int NSAMPLE = 400;   // log-spaced time samples per run.refSteps
+
+    GrowthObserver(const RunInfo &r, std::filesystem::path root) : run(r), root(std::move(root))
+    {
+        // deduplicated (small t has fewer distinct integers than samples, so the
+        // early schedule collapses onto every step).  Anchored at refSteps, so an
+        // extended run keeps every sample it already took; STEPS itself is always
+        // sampled last.  At STEPS == refSteps this is exactly NSAMPLE points.
+        // (refSteps >= 2 keeps the schedule growing; below that it is just step 1.)
+        for (int k = 0;; ++k)
+        {
+            long long s = std::llround(std::pow(static_cast<double>(std::max(run.refSteps, 2)),
+                                                static_cast<double>(k) / (NSAMPLE - 1)));
+            if (s > run.steps)
+                break;
+            if (sampleAt.empty() || s > sampleAt.back())
+                sampleAt.push_back(static_cast<int>(s));
+        }
+        if (sampleAt.back() != run.steps)
+            sampleAt.push_back(run.steps);
+    }
+    const char *name() const override { return "growth"; }
+
+    bool begin() override { return openOutput(file, root, "growth", runStem(run, fmtN(run.N, 4))); }
+
+    void cascade(int, const Cascade &c) override
+    {
+        ++segDrops;
+        if (c.mass > 0) { ++segActive; segMass += c.mass; }
+    }
+
+    void record(int step, const PuyoEngine &e) override
+    {
+        while (nextSample < sampleAt.size() && sampleAt[nextSample] < step) ++nextSample;   // resumed run
+        if (nextSample >= sampleAt.size() || step != sampleAt[nextSample])
+            return;
+        const std::vector<int> &colH = e.lt.colH;
+        double mean = e.meanHeight();
+        double var = 0;
+        for (int c = 0; c < e.L; ++c) { double d = colH[c] - mean; var += d * d; }
+        outStep.push_back(step);
+        outH.push_back(mean);
+        outW.push_back(std::sqrt(var / e.L));
+        outActive.push_back(segDrops ? static_cast<double>(segActive) / segDrops : 0.0);
+        outMeanS.push_back(segActive ? static_cast<double>(segMass) / segActive : 0.0);
+        segDrops = segActive = segMass = 0;
+        ++nextSample;
+    }
+
+    void finish(const PuyoEngine &e) override
+    {
+        file << "# L=" << run.L << " N=" << std::setprecision(6) << run.N
+             << " steps=" << run.steps << " floor_margin=" << FLOOR_MARGIN
+             << " floor_hits=" << e.lt.floorHits << " peak_rows=" << e.lt.peakRows << "\n";
+        file << "step\tmean_h\twidth\tactive_frac\tmean_s\n";
+        for (size_t i = 0; i < outStep.size(); ++i)
+            file << outStep[i] << "\t" << std::fixed << std::setprecision(6)
+                 << outH[i] << "\t" << outW[i] << "\t" << outActive[i] << "\t" << outMeanS[i] << "\n";
+        file.close();
+    }
+
+    void save(CkptWriter &w) override { io(w); }
+    void load(CkptReader &r) override { io(r); }
+
+private:
+    RunInfo run;
+    std::filesystem::path root;
+    std::ofstream file;
+    std::vector<int> sampleAt;
+    size_t nextSample = 0;
+    std::vector<int> outStep;
+    std::vector<double> outH, outW, outActive, outMeanS;
+    long long segDrops = 0, segActive = 0, segMass = 0;
+
+    template <class IO> void io(IO &s)
+    {
+        s.vec(outStep); s.vec(outH); s.vec(outW); s.vec(outActive); s.vec(outMeanS);
+        s.pod(segDrops); s.pod(segActive); s.pod(segMass);
+    }
+};
+
+// Growth velocity and the species balance behind it (probabilityPuyo/readme.md).
+// h(t) at LINEARLY spaced post-warmup times, since v is a straight-line fit;
+// r_i, the blocks of species i eliminated after warmup, which the steady-state
+// balance p_i - r_i = v*rho_i needs (measured directly beats a closure); and the
+// final pile composition, because the dynamics collides PILE blocks, so
+// sum_i rho_i^2 may be the operative collision probability, not sum_i p_i^2.
+class VelocityObserver : public Observer
+{
+public:
+    static constexpr int NSAMPLE = 200;   // samples over [WARMUP, run.refSteps]
+
+    VelocityObserver(const RunInfo &r, std::filesystem::path root)
+        : run(r), root(std::move(root)), w(speciesWeights(r.N)), elimSp(w.size() + 1, 0),
+          // spacing fixed by refSteps rather than STEPS, so extending a run
+          // continues the same grid instead of implying a different one
+          sampleEvery(std::max(1, (r.refSteps - r.warmup) / NSAMPLE)) {}
+    const char *name() const override { return "velocity"; }
+
+    bool begin() override { return openOutput(file, root, "velocity", runStem(run, fmtN(run.N, 4))); }
+
+    void component(int step, int sp, long long size) override
+    {
+        if (step >= run.warmup) elimSp[sp] += size;
+    }
+
+    void cascade(int step, const Cascade &) override
+    {
+        if (step >= run.warmup) ++elimDrops;
+    }
+
+    void record(int step, const PuyoEngine &e) override
+    {
+        if (step >= run.warmup && (step - run.warmup) % sampleEvery == 0)
+        {
+            outStep.push_back(step);
+            outH.push_back(e.meanHeight());   // = mass/L exactly: gravity leaves no holes
+        }
+    }
+
+    void finish(const PuyoEngine &e) override
+    {
+        int nsp = static_cast<int>(w.size());
+        std::vector<long long> pileSp = e.lt.pileBySpecies();
+        long long pileTot = 0;
+        for (int i = 1; i <= nsp; ++i) pileTot += pileSp[i];
+
+        file << "# L=" << run.L << " N=" << std::setprecision(6) << run.N
+             << " steps=" << run.steps << " floor_margin=" << FLOOR_MARGIN << " warmup=" << run.warmup
+             << " floor_hits=" << e.lt.floorHits << "\n";
+        file << "# pile_total=" << pileTot << " pile_by_species=";
+        for (int i = 1; i <= nsp; ++i)
+            file << pileSp[i] << (i < nsp ? "," : "");
+        file << "\n";
+        file << "# elim_drops=" << elimDrops << " elim_by_species=";
+        for (int i = 1; i <= nsp; ++i)
+            file << elimSp[i] << (i < nsp ? "," : "");
+        file << "\n";
+        file << "# deposition_weights=";
+        for (int i = 0; i < nsp; ++i)
+            file << w[i] << (i + 1 < nsp ? "," : "");
+        file << "\n";
+        file << "step\tmean_h\n";
+        for (size_t i = 0; i < outStep.size(); ++i)
+            file << outStep[i] << "\t" << std::fixed << std::setprecision(6) << outH[i] << "\n";
+        file.close();
+    }
+
+    void save(CkptWriter &wr) override { io(wr); }
+    void load(CkptReader &r) override { io(r); }
+
+private:
+    RunInfo run;
+    std::filesystem::path root;
+    std::ofstream file;
+    std::vector<double> w;
+    std::vector<long long> elimSp;
+    long long elimDrops = 0;
+    int sampleEvery;
+    std::vector<int> outStep;
+    std::vector<double> outH;
+
+    template <class IO> void io(IO &s)
+    {
+        s.vec(elimSp); s.pod(elimDrops);
+        s.vec(outStep); s.vec(outH);
+    }
+};
+
+// The full slope profile h[c+1]-h[c] plus h[0], every step for step < 256 and
+// then every rec-th step (and the final one): slopeDistFast's output, which
+// the roughness / slope-distribution analysis in this folder reads.  It is the
+// only streaming observer, so a checkpoint stores the byte offset reached and a
+// resumed run copies that prefix of the old file into its own.
+//
+// Text (.tsv) re-parses L integers per line on every analysis pass, which for
+// the full sweep dominates both analysis time and disk.  The binary .slp holds
+// the same records at fixed width so common.py can np.memmap it:
+//   header (64 B) : SlpHeader below
+//   records       : int32 step, int32 h[0], int16 slope[L]    (nrec of them)
+//   index         : int32 step[nrec] at index_offset, so the step axis is read
+//                   without touching the slope pages
+// The header is rewritten at the end with nrec and index_offset; a file cut
+// short (both 0) is still readable up to its last whole record.  A slope with
+// |m| > 32767 would not fit: it is saturated and counted in `clipped`, which
+// the loader reports.
+struct SlpHeader
+{
+    char magic[8] = {'P', 'U', 'Y', 'O', 'S', 'L', 'P', '1'};
+    uint32_t version = 1;
+    int32_t L = 0;
+    double N = 0;
+    int32_t steps = 0;
+    int32_t sim = 0;
+    int32_t rec = 0;
+    int32_t floor_margin = FLOOR_MARGIN;
+    int64_t nrec = 0;
+    int64_t clipped = 0;
+    int64_t index_offset = 0;
+};
+static_assert(sizeof(SlpHeader) == 64, "SlpHeader layout is read by common.py");
+
+class ProfileObserver : public Observer
+{
+public:
+    ProfileObserver(const RunInfo &r, std::filesystem::path root) : run(r), root(std::move(root))
+    {
+        double ip;
+        nName = std::modf(run.N, &ip) == 0.0 ? std::to_string(static_cast<int>(ip)) : fmtN(run.N, 4);
+    }
+    const char *name() const override { return "profile"; }
+
+    bool begin() override
+    {
+        if (!missing.empty())
+        {
+            std::cerr << "Output of the checkpointed run is missing or short: " << missing << "\n";
+            return false;
+        }
+        if (!openOutput(file, root, "slopeDist", runStem(run, nName), std::ios::out | std::ios::binary, ext()))
+            return false;
+        if (resumed)
+            file << prefix;
+        else if (run.binary)
+        {
+            SlpHeader h = header();
+            file.write(reinterpret_cast<const char *>(&h), sizeof h);
+        }
+        else
+            file << "step\tfirst_col_height\tslope_distribution\n";
+        prefix.clear();
+        return true;
+    }
+
+    void record(int step, const PuyoEngine &e) override
+    {
+        if (!(step < 256 || step % run.rec == 0 || step == run.steps))
+            return;
+        const std::vector<int> &colH = e.lt.colH;
+        int L = e.L;
+        if (run.binary)
+        {
+            buf.resize(static_cast<size_t>(L));
+            for (int c = 0; c < L; ++c)
+            {
+                int m = colH[(c + 1) % L] - colH[c];
+                if (m > INT16_MAX || m < -INT16_MAX) { ++clipped; m = std::clamp(m, -INT16_MAX, static_cast<int>(INT16_MAX)); }
+                buf[c] = static_cast<int16_t>(m);
+            }
+            int32_t head[2] = {step, colH[0]};
+            file.write(reinterpret_cast<const char *>(head), sizeof head);
+            file.write(reinterpret_cast<const char *>(buf.data()), static_cast<std::streamsize>(L * sizeof(int16_t)));
+            recSteps.push_back(step);
+            return;
+        }
+        file << std::fixed << std::setprecision(6) << static_cast<double>(step) << "\t" << colH[0] << "\t";
+        for (int c = 0; c < L; ++c)
+        {
+            file << colH[(c + 1) % L] - colH[c];
+            if (c < L - 1)
+                file << ",";
+        }
+        file << "\n";
+    }
+
+    void finish(const PuyoEngine &) override
+    {
+        if (run.binary)
+        {
+            int64_t indexOffset = static_cast<int64_t>(file.tellp());
+            file.write(reinterpret_cast<const char *>(recSteps.data()),
+                       static_cast<std::streamsize>(recSteps.size() * sizeof(int32_t)));
+            SlpHeader h = header();   // rewritten whole: an extended run inherited the old steps
+            h.nrec = static_cast<int64_t>(recSteps.size());
+            h.clipped = clipped;
+            h.index_offset = indexOffset;
+            file.seekp(0);
+            file.write(reinterpret_cast<const char *>(&h), sizeof h);
+            if (clipped > 0)
+                std::cerr << "WARNING: " << clipped << " slope(s) saturated at +-32767 in the .slp output\n";
+        }
+        file.close();
+    }
+
+    void save(CkptWriter &w) override
+    {
+        file.flush();
+        w.str((root / "outputs" / "slopeDist" / (runStem(run, nName) + ext())).string());
+        w.pod(static_cast<uint64_t>(file.tellp()));
+        w.vec(recSteps); w.pod(clipped);
+    }
+
+    void load(CkptReader &r) override
+    {
+        std::string oldOut;
+        uint64_t offset = 0;
+        r.str(oldOut); r.pod(offset);
+        r.vec(recSteps); r.pod(clipped);
+        std::ifstream in(oldOut, std::ios::binary);
+        prefix.resize(offset);
+        if (!in.read(prefix.data(), static_cast<std::streamsize>(offset)))
+            missing = oldOut;
+        resumed = true;
+    }
+
+private:
+    RunInfo run;
+    std::filesystem::path root;
+    std::string nName;
+    std::ofstream file;
+    std::string prefix;    // output written before the checkpoint
+    bool resumed = false;
+    std::string missing;   // set by load if the old output cannot supply the prefix
+    std::vector<int16_t> buf;
+    std::vector<int32_t> recSteps;   // .slp step index, written at the end
+    int64_t clipped = 0;
+
+    const char *ext() const { return run.binary ? ".slp" : ".tsv"; }
+
+    SlpHeader header() const
+    {
+        SlpHeader h;
+        h.L = run.L; h.N = run.N; h.steps = run.steps; h.sim = run.sim; h.rec = run.rec;
+        return h;
+    }
+};
+
+// The reduction of the profile that the roughness analysis actually uses:
+// W(t) and <h>(t) at every step the profile would record, and the histogram
+// of local slopes m over recorded steps >= steadyFrom (common.STEADY_FRAC of
+// STEPS by default).  W is the population std of the heights, exactly what
+// common.roughness_series reconstructs from a profile, so the two paths agree;
+// the output is O(records + range of m) instead of O(L * records).
+//
+// When a run is extended, F*STEPS moves.  If the resume step has not reached
+// the new threshold yet, P(m) restarts from it exactly; otherwise the old
+// threshold is kept (it is in the header, and common.py checks it).
+inline int steadyThreshold(double frac, int STEPS, int inherited, bool resumed, int resumeStep)
+{
+    int want = static_cast<int>(std::ceil(frac * STEPS));   // same float as the Python side
+    return (!resumed || resumeStep <= want) ? want : inherited;
+}
+
+class RoughnessObserver : public Observer
+{
+public:
+    RoughnessObserver(const RunInfo &r, std::filesystem::path root) : run(r), root(std::move(root))
+    {
+        double ip;
+        nName = std::modf(run.N, &ip) == 0.0 ? std::to_string(static_cast<int>(ip)) : fmtN(run.N, 4);
+    }
+    const char *name() const override { return "roughness"; }
+
+    bool begin() override { return openOutput(file, root, "roughness", runStem(run, nName)); }
+
+    void record(int step, const PuyoEngine &e) override
+    {
+        if (!(step < 256 || step % run.rec == 0 || step == run.steps))
+            return;
+        const std::vector<int> &colH = e.lt.colH;
+        double mean = e.meanHeight();
+        double var = 0;
+        for (int c = 0; c < e.L; ++c) { double d = colH[c] - mean; var += d * d; }
+        outStep.push_back(step);
+        outH.push_back(mean);
+        outW.push_back(std::sqrt(var / e.L));
+        if (step < run.steadyFrom)
+            return;
+        for (int c = 0; c < e.L; ++c)
+        {
+            int m = colH[(c + 1) % e.L] - colH[c];
+            if (hist.empty()) { mLo = m; hist.assign(1, 0); }
+            if (m < mLo) { hist.insert(hist.begin(), static_cast<size_t>(mLo - m), 0); mLo = m; }
+            if (m - mLo >= static_cast<int>(hist.size())) hist.resize(static_cast<size_t>(m - mLo) + 1, 0);
+            ++hist[m - mLo];
+        }
+    }
+
+    void finish(const PuyoEngine &e) override
+    {
+        file << "# L=" << run.L << " N=" << std::setprecision(6) << run.N << " steps=" << run.steps
+             << " rec=" << run.rec << " steady_from=" << run.steadyFrom << " floor_margin=" << FLOOR_MARGIN
+             << " floor_hits=" << e.lt.floorHits << "\n";
+        file << "step\tmean_h\twidth\n";
+        for (size_t i = 0; i < outStep.size(); ++i)
+            file << outStep[i] << "\t" << std::fixed << std::setprecision(9) << outH[i] << "\t" << outW[i] << "\n";
+        file << "# slopes\n";
+        file << "m\tcount\n";
+        for (size_t i = 0; i < hist.size(); ++i)
+            if (hist[i] > 0)
+                file << mLo + static_cast<int>(i) << "\t" << hist[i] << "\n";
+        file.close();
+    }
+
+    void save(CkptWriter &w) override { io(w); }
+    void load(CkptReader &r) override
+    {
+        io(r);
+        // the caller only moves the threshold when it is still ahead of the
+        // resume step (steadyThreshold), so nothing of P(m) is lost by restarting
+        if (histFrom != run.steadyFrom) { hist.clear(); histFrom = run.steadyFrom; }
+    }
+
+private:
+    RunInfo run;
+    std::filesystem::path root;
+    std::string nName;
+    std::ofstream file;
+    std::vector<int> outStep;
+    std::vector<double> outH, outW;
+    std::vector<long long> hist;   // P(m) counts, m = mLo + index
+    int mLo = 0;
+    int histFrom = run.steadyFrom;
+
+    template <class IO> void io(IO &s)
+    {
+        s.vec(outStep); s.vec(outH); s.vec(outW); s.vec(hist); s.pod(mLo); s.pod(histFrom);
+    }
+};
+
+// by name, for puyoRun's --observe; nullptr if unknown
+inline std::unique_ptr<Observer> makeObserver(const std::string &name, const RunInfo &r,
+                                              const std::filesystem::path &root)
+{
+    if (name == "avalanche") return std::make_unique<AvalancheObserver>(r, root);
+    if (name == "moments") return std::make_unique<MomentsObserver>(r, root);
+    if (name == "slopeResolved") return std::make_unique<SlopeResolvedObserver>(r, root);
+    if (name == "growth") return std::make_unique<GrowthObserver>(r, root);
+    if (name == "velocity") return std::make_unique<VelocityObserver>(r, root);
+    if (name == "profile") return std::make_unique<ProfileObserver>(r, root);
+    if (name == "roughness") return std::make_unique<RoughnessObserver>(r, root);
+    return nullptr;
+}
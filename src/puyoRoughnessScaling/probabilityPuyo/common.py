@@ -35,7 +35,7 @@ def _files(N):
     return sorted(glob.glob(os.path.join(OUT, f"L_{L}_N_{N:.4f}_steps_{STEPS}_sim_*.tsv")))
 
 
-HEADER_LINES = 5   # ceiling/pile / elim / weights / column names
+HEADER_LINES = 5   # meta+hits / pile / elim / weights / column names
 
 
 def load(N):
@@ -50,10 +50,10 @@ def load(N):
     window.  It is what closes the exact balance p_i - r_i = v*rho_i, so it is
     measured rather than guessed (see closure.py).
     """
-    vs, rho, r, ceil = [], None, None, 0
+    vs, rho, r, hits = [], None, None, 0
     for f in _files(N):
         head = open(f).readlines()[:4]
-        ceil += int(re.search(r"ceiling_hits=(\d+)", head[0]).group(1))
+        hits += int(re.search(r"(?:ceiling|floor)_hits=(\d+)", head[0]).group(1))
         d = np.loadtxt(f, skiprows=HEADER_LINES, ndmin=2)
         vs.append(np.polyfit(d[:, 0], d[:, 1], 1)[0])
         sp = np.array([float(x) for x in
@@ -66,7 +66,7 @@ def load(N):
     if not vs:
         return None
     return dict(v=float(np.mean(vs)), err=float(np.std(vs) / np.sqrt(len(vs))),
-                rho=rho / len(vs), r=r / len(vs), nsims=len(vs), ceiling_hits=ceil)
+                rho=rho / len(vs), r=r / len(vs), nsims=len(vs), floor_hits=hits)
 
 
 def weights(N):
@@ -114,11 +114,11 @@ def linearity(xs, ys):
 
 
 def table():
-    """N -> dict(v, err, rho, candidate values). Skips ceiling-contaminated N."""
+    """N -> dict(v, err, rho, candidate values). Skips floor/ceiling-contaminated N."""
     out = {}
     for N in NS:
         d = load(N)
-        if d is None or d["ceiling_hits"] > 0:
+        if d is None or d["floor_hits"] > 0:
             continue
         d["cands"] = candidates(N, d["rho"])
         out[N] = d
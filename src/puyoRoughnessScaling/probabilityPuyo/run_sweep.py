@@ -1,17 +1,26 @@
 """Emit argument lines for the v(N) sweep.
 
     python run_sweep.py | xargs -P 16 -L 1 ./velocity > /dev/null
+    python run_sweep.py --run [--cores 16] [--mem 48G]   # ../scheduler.py
+
+--run packs jobs against cores and a RAM budget and skips sims whose output
+already exists.
 
 N is sampled finely THROUGH the integer intervals, because the whole question is
 what happens between integers: at integer N the species are uniform and every
 candidate variable coincides, so only the interiors of the intervals can
 discriminate them.
 
-Box height must cover v*steps with margin; a ceiling hit caps the pile and
-corrupts v.  Every run reports ceiling_hits (must be 0).
+No box height is needed: the engine's rolling-window lattice follows the pile
+(../rollingLattice.h).  Every run reports floor_hits (must be 0).
 """
+import os
+import sys
+
 import numpy as np
 
+from common import HERE, OUT
+
 L = 1024
 STEPS = 50000
 WARMUP = 10000
@@ -21,16 +30,18 @@ NSIMS = 16
 NS = [round(x, 3) for x in np.arange(5.5, 10.0 + 1e-9, 0.1)]
 
 
-def v_upper(N):
-    """Generous upper bound on v, for sizing the box only."""
-    return max(0.02, 1.0 - 4.9 / N)
-
-
-def box_H(N):
-    return int(v_upper(N) * STEPS * 1.35 + 500)
+def jobs():
+    return [(L, N, STEPS, s, WARMUP) for N in NS for s in range(NSIMS)]
 
 
 if __name__ == "__main__":
-    for L_, N, s in sorted(((L, N, s) for N in NS for s in range(NSIMS)),
-                           key=lambda j: -box_H(j[1])):
-        print(f"{L_} {N} {STEPS} {s} {box_H(N)} {WARMUP}")
+    if "--run" in sys.argv[1:]:
+        sys.path.insert(0, os.path.dirname(HERE))
+        from scheduler import Job, cli, engine_bytes
+        cli(os.path.join(HERE, "velocity"),
+            [Job(j, [os.path.join(OUT, f"L_{j[0]}_N_{j[1]:.4f}_steps_{j[2]}_sim_{j[3]}.tsv")], engine_bytes(j[0]))
+             for j in jobs()],
+            [a for a in sys.argv[1:] if a != "--run"], log=os.path.join(HERE, "outputs", "scheduler.jsonl"))
+    else:
+        for j in jobs():
+            print(" ".join(str(x) for x in j))
@@ -27,19 +27,23 @@
 // can decide which one linearises v.
 //
 // DYNAMICS IDENTICAL to ../criticalScaling/criticalScaling.cpp and
-// ../avalancheScaling/avalancheDist.cpp; only the recording differs.
+// ../avalancheScaling/avalancheDist.cpp: all three are the shared engine of
+// ../puyoEngine.h, and only the recording (the "velocity" observer of
+// ../observers.h) differs.  The lattice is the rolling window of
+// ../rollingLattice.h, so the pile composition includes the frozen rows
+// through their species counts.
 //
-// CLI:  L  N_SPECIES  STEPS  SIM_NO  H_BOX  [WARMUP]
-#include <random>
-#include <vector>
+// CLI:  L  N_SPECIES  STEPS  SIM_NO  [WARMUP]  [--checkpoint K]  [--resume PATH]
+//   The flags write periodic binary snapshots and resume or extend a run to a
+//   larger STEPS bit-identically (../checkpoint.h).  A resumed run keeps the
+//   checkpoint's WARMUP.
+//   --threads T: deposit on T threads (L >= 1024; ../puyoEngine.h), same output.
 #include <iostream>
-#include <fstream>
-#include <sstream>
-#include <iomanip>
 #include <filesystem>
-#include <cstdint>
-#include <algorithm>
-#include <cmath>
+#include <memory>
+
+#include "../puyoEngine.h"
+#include "../observers.h"
 
 #pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
 #pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
@@ -47,215 +51,46 @@
 static auto _ = []()
 { std::ios_base::sync_with_stdio(false); std::cin.tie(nullptr); std::cout.tie(nullptr); return 0; }();
 
-std::mt19937 gen;
-
-constexpr int NSAMPLE = 200;   // LINEARLY spaced samples: v is a straight-line fit of h vs t
-
-std::vector<double> speciesWeights(double N_SPECIES)
-{
-    int n_int = static_cast<int>(std::floor(N_SPECIES));
-    double frac = N_SPECIES - n_int;
-    std::vector<double> w(n_int, 1.0);
-    if (frac > 0)
-        w.push_back(frac);
-    return w;
-}
-
-std::string fmtN(double N)
-{
-    std::ostringstream s;
-    s << std::fixed << std::setprecision(4) << N;
-    return s.str();
-}
-
-void run(std::ofstream &file, int L, double N_SPECIES, int STEPS, int H, int WARMUP)
-{
-    std::uniform_int_distribution<> dis_l(0, L - 1);
-    std::vector<double> w = speciesWeights(N_SPECIES);
-    std::discrete_distribution<> dis_species(w.begin(), w.end());
-
-    long long ceiling_hits = 0;
-    // r_i: blocks of species i eliminated, counted only after warmup.  This is
-    // the quantity the steady-state balance p_i - r_i = v*rho_i needs, and
-    // measuring it directly beats guessing a closure for it.
-    std::vector<long long> elimSp(w.size() + 1, 0);
-    long long elimDrops = 0;
-    bool recording = false;
-    std::vector<uint8_t> lat(static_cast<size_t>(H) * L, 0);
-    std::vector<int> colH(L, 0);
-    std::vector<int> visitedGen(static_cast<size_t>(H) * L, 0);
-    std::vector<int> colDirtyGen(L, 0);
-    std::vector<int> lowestElim(L, 0);
-    int stamp = 0;
-
-    std::vector<int> movedList, newMovedList, dirtyCols, component, bfs;
-    movedList.reserve(1024); newMovedList.reserve(1024);
-    dirtyCols.reserve(256); component.reserve(1024); bfs.reserve(1024);
-
-    std::vector<int> outStep;
-    std::vector<double> outH;
-
-    auto annihilate = [&]()
-    {
-        int g = ++stamp;
-        dirtyCols.clear();
-        for (int s : movedList)
-        {
-            if (lat[s] == 0 || visitedGen[s] == g)
-                continue;
-            uint8_t sp = lat[s];
-            component.clear();
-            bfs.clear();
-            bfs.push_back(s);
-            visitedGen[s] = g;
-            size_t head = 0;
-            while (head < bfs.size())
-            {
-                int cur = bfs[head++];
-                component.push_back(cur);
-                int r = cur / L, c = cur % L;
-                if (r > 0) { int nb = cur - L; if (lat[nb] == sp && visitedGen[nb] != g) { visitedGen[nb] = g; bfs.push_back(nb); } }
-                if (r + 1 < H) { int nb = cur + L; if (lat[nb] == sp && visitedGen[nb] != g) { visitedGen[nb] = g; bfs.push_back(nb); } }
-                { int nc = (c - 1 + L) % L; int nb = r * L + nc; if (lat[nb] == sp && visitedGen[nb] != g) { visitedGen[nb] = g; bfs.push_back(nb); } }
-                { int nc = (c + 1) % L; int nb = r * L + nc; if (lat[nb] == sp && visitedGen[nb] != g) { visitedGen[nb] = g; bfs.push_back(nb); } }
-            }
-            if (component.size() > 1)
-            {
-                if (recording) elimSp[sp] += static_cast<long long>(component.size());
-                for (int id : component)
-                {
-                    lat[id] = 0;
-                    int c = id % L, r = id / L;
-                    if (colDirtyGen[c] != g) { colDirtyGen[c] = g; lowestElim[c] = r; dirtyCols.push_back(c); }
-                    else if (r > lowestElim[c]) lowestElim[c] = r;
-                }
-            }
-        }
-    };
-
-    auto fallDirty = [&]()
-    {
-        newMovedList.clear();
-        for (int c : dirtyCols)
-        {
-            int Le = lowestElim[c];
-            int topRow = H - colH[c];
-            int write = Le;
-            for (int r = Le - 1; r >= topRow; --r)
-            {
-                int id = r * L + c;
-                if (lat[id] != 0)
-                {
-                    int dst = write * L + c;
-                    lat[dst] = lat[id];
-                    lat[id] = 0;
-                    newMovedList.push_back(dst);
-                    --write;
-                }
-            }
-            colH[c] = H - 1 - write;
-        }
-    };
-
-    int sampleEvery = std::max(1, (STEPS - WARMUP) / NSAMPLE);
-
-    for (int step = 0; step <= STEPS; ++step)
-    {
-        recording = (step >= WARMUP);
-        for (int i = 0; i < L; ++i)
-        {
-            if (recording) ++elimDrops;
-            int col = dis_l(gen);
-            int species = dis_species(gen) + 1;
-
-            if (colH[col] >= H) { ++ceiling_hits; continue; }
-
-            int pos = (H - 1 - colH[col]) * L + col;
-            lat[pos] = static_cast<uint8_t>(species);
-            ++colH[col];
-
-            movedList.clear();
-            movedList.push_back(pos);
-            while (true)
-            {
-                annihilate();
-                fallDirty();
-                if (newMovedList.empty())
-                    break;
-                movedList.swap(newMovedList);
-            }
-        }
-
-        if (step >= WARMUP && (step - WARMUP) % sampleEvery == 0)
-        {
-            double sum = 0;
-            for (int c = 0; c < L; ++c) sum += colH[c];
-            outStep.push_back(step);
-            outH.push_back(sum / L);   // = mass/L exactly: gravity leaves no holes
-        }
-    }
-
-    // Pile composition at the end: the dynamics collides PILE blocks, not
-    // freshly deposited ones, so sum_i rho_i^2 may be the operative collision
-    // probability rather than sum_i p_i^2.
-    int nsp = static_cast<int>(w.size());
-    std::vector<long long> pileSp(nsp + 1, 0);
-    for (size_t i = 0; i < lat.size(); ++i)
-        if (lat[i]) ++pileSp[lat[i]];
-    long long pileTot = 0;
-    for (int i = 1; i <= nsp; ++i) pileTot += pileSp[i];
-
-    file << "# L=" << L << " N=" << std::setprecision(6) << N_SPECIES
-         << " steps=" << STEPS << " H=" << H << " warmup=" << WARMUP
-         << " ceiling_hits=" << ceiling_hits << "\n";
-    file << "# pile_total=" << pileTot << " pile_by_species=";
-    for (int i = 1; i <= nsp; ++i)
-        file << pileSp[i] << (i < nsp ? "," : "");
-    file << "\n";
-    file << "# elim_drops=" << elimDrops << " elim_by_species=";
-    for (size_t i = 1; i <= w.size(); ++i)
-        file << elimSp[i] << (i < w.size() ? "," : "");
-    file << "\n";
-    file << "# deposition_weights=";
-    for (int i = 0; i < nsp; ++i)
-        file << w[i] << (i + 1 < nsp ? "," : "");
-    file << "\n";
-    file << "step\tmean_h\n";
-    for (size_t i = 0; i < outStep.size(); ++i)
-        file << outStep[i] << "\t" << std::fixed << std::setprecision(6) << outH[i] << "\n";
-
-    if (ceiling_hits > 0)
-        std::cerr << "WARNING: " << ceiling_hits << " deposition(s) hit ceiling H=" << H
-                  << " (L=" << L << ", N=" << N_SPECIES << "). Increase H.\n";
-}
-
 int main(int argc, char *argv[])
 {
+    CkptOptions ck;
+    std::vector<std::string> args = ckptArgs(argc, argv, ck);
+    int threads = threadsArg(args);
     int L = 512;
     double N_SPECIES = 6.0;
     int STEPS = 30000;
     int SIM_NO = 0;
-    int H_BOX = -1, WARMUP = -1;
-    if (argc > 1) L = std::stoi(argv[1]);
-    if (argc > 2) N_SPECIES = std::stod(argv[2]);
-    if (argc > 3) STEPS = std::stoi(argv[3]);
-    if (argc > 4) SIM_NO = std::stoi(argv[4]);
-    if (argc > 5) H_BOX = std::stoi(argv[5]);
-    if (argc > 6) WARMUP = std::stoi(argv[6]);
-    if (H_BOX <= 0) H_BOX = STEPS;
+    int WARMUP = -1;
+    if (args.size() > 1) L = std::stoi(args[1]);
+    if (args.size() > 2) N_SPECIES = std::stod(args[2]);
+    if (args.size() > 3) STEPS = std::stoi(args[3]);
+    if (args.size() > 4) SIM_NO = std::stoi(args[4]);
+    if (args.size() > 5) WARMUP = std::stoi(args[5]);
+    bool warmupGiven = WARMUP >= 0;
     if (WARMUP < 0) WARMUP = STEPS / 4;
 
-    gen.seed(2654435761u * static_cast<unsigned>(SIM_NO + 1));
-
-    std::string tag = "L_" + std::to_string(L) + "_N_" + fmtN(N_SPECIES) +
-                      "_steps_" + std::to_string(STEPS) + "_sim_" + std::to_string(SIM_NO) + ".tsv";
-    std::filesystem::path exeDir = std::filesystem::path(argv[0]).parent_path();
-    std::filesystem::path filePath = exeDir / "outputs" / "velocity" / tag;
-    std::filesystem::create_directories(filePath.parent_path());
-
-    std::ofstream file(filePath);
-    if (!file.is_open()) { std::cerr << "Failed to open " << filePath.string() << "\n"; return 1; }
-    run(file, L, N_SPECIES, STEPS, H_BOX, WARMUP);
-    file.close();
+    std::filesystem::path exeDir = std::filesystem::path(args[0]).parent_path();
+    RunInfo run{L, N_SPECIES, STEPS, SIM_NO, WARMUP, 1, false, 0, STEPS};
+    std::filesystem::path ckptPath = exeDir / "outputs" / "checkpoints" / (runStem(run, fmtN(N_SPECIES, 4)) + ".ckpt");
+    if (ck.every > 0)
+        std::filesystem::create_directories(ckptPath.parent_path());
+
+    CkptHeader hd{"velocity", L, N_SPECIES, SIM_NO, 0, STEPS};
+    std::vector<RunParam> params{{"WARMUP", WARMUP, warmupGiven}, {"REF_STEPS", STEPS, false}};
+    std::unique_ptr<CkptReader> rd;
+    if (!resumeRun(ck, hd, params, rd))
+        return 1;
+    run.warmup = params[0].value;
+    run.refSteps = params[1].value;
+
+    PuyoEngine engine(L, N_SPECIES, SIM_NO);
+    engine.setThreads(threads);
+    VelocityObserver velocity(run, exeDir);
+    engine.observers = {&velocity};
+    if (rd)
+        engine.load(*rd);
+    if (!velocity.begin())
+        return 1;
+    runEngine(engine, STEPS, ck, hd, ckptPath, params, rd != nullptr);
     return 0;
 }
@@ -0,0 +1,593 @@
+// The Puyo deposition dynamics, once, with pluggable observers.
+//
+// slopeDistFast.cpp, avalancheScaling/avalancheDist.cpp,
+// criticalScaling/criticalScaling.cpp and probabilityPuyo/velocity.cpp used to
+// carry four copies of the same placement / annihilate / fallDirty core and
+// differ only in what they recorded, so getting avalanche histograms, h(t) and
+// v for one (L, N, sim) meant simulating it three times.  The core now lives
+// here and everything that RECORDS is an Observer (observers.h).  Each old
+// program is a thin main that attaches its observers; puyoRun.cpp attaches any
+// combination, so one pass produces every study's output for that point.
+//
+// The dynamics are exactly those of the old engines (and bit-identical outputs
+// are checked against them): a block of a random species lands on a random
+// column; every maximal same-species component of size > 1 containing a moved
+// site is eliminated; gravity compacts the dirty columns; repeat until quiet.
+//   colH[c]        : column heights           -> O(1) placement
+//   movedList      : sites that just moved    -> annihilation seeds, no scan
+//   visitedGen     : generation-stamped BFS   -> no per-seed alloc/clear
+//   dirtyCols      : only these are compacted by gravity
+//   RollingLattice : only rows a cascade can still reach (rollingLattice.h)
+//
+// Parallel mode (setThreads(T > 1), the engines' --threads T): at large L most
+// cascades stay within a few columns of where they land (P(extent >= 12) ~
+// 1e-4), so drops far apart commute.  A step's drops are drawn up front, in
+// the serial order, and cut into batches.  Each drop gets a window of
+// +-WINDOW columns; a drop's wave is one more than that of the latest earlier
+// drop in the batch whose window overlaps its own, so the drops of one wave
+// are pairwise disjoint and everything a drop depends on ran in an earlier
+// wave.  A wave runs on all threads, each cascade CONFINED to its window and
+// logging undo records; one that would read outside it "escapes": it and every
+// later drop already run are rolled back, the earlier ones are committed, the
+// escaped drop is redone serially without a window, and the rest of the batch
+// reruns through the same waves.  That execution order is serial-equivalent,
+// so the lattice, the RNG stream and every observer event (buffered per drop,
+// emitted in drop order) are BIT-IDENTICAL to the serial run -- the thread
+// count is not a parameter of the output.  The draws themselves cannot be
+// split without changing the realisation, so one extra thread makes the next
+// step's while this one is deposited; what stays serial is that thread's
+// ~45 ns/drop and the scheduling and event replay on the main thread, which
+// bounds the speedup at a few-fold however many cores there are.
+
+// Species are drawn one of two ways, which consume the generator differently:
+//   continuous N (default): the first floor(N) species get weight 1 and a final
+//     partial species the fractional part (probabilityPuyoPuyo/onlyAvalanche2D)
+//   uniform: std::uniform_int_distribution over 1..N, integer N only -- the
+//     draw slopeDist.cpp uses, kept so slopeDistFast stays bit-identical to it
+// Both give the same ensemble at integer N, but not the same realisation.
+#pragma once
+#include <random>
+#include <vector>
+#include <string>
+#include <cstdint>
+#include <cmath>
+#include <algorithm>
+#include <atomic>
+#include <memory>
+
+#include "rollingLattice.h"
+#include "checkpoint.h"
+#include "spinPool.h"
+
+// deposition weights for continuous N; total weight N, full species 1/N each
+inline std::vector<double> speciesWeights(double N)
+{
+    int n_int = static_cast<int>(std::floor(N));
+    double frac = N - n_int;
+    std::vector<double> w(n_int, 1.0);
+    if (frac > 0)
+        w.push_back(frac);
+    return w;
+}
+
+// the same per-sim seed every engine has always used
+inline unsigned simSeed(int sim) { return 2654435761u * static_cast<unsigned>(sim + 1); }
+
+// removes "--threads T" from args (the engines' parallel mode); 1 if absent
+inline int threadsArg(std::vector<std::string> &args)
+{
+    int T = 1;
+    for (size_t i = 0; i + 1 < args.size(); ++i)
+        if (args[i] == "--threads")
+        {
+            T = std::stoi(args[i + 1]);
+            args.erase(args.begin() + i, args.begin() + i + 2);
+            break;
+        }
+    return T;
+}
+
+// one deposition and everything it set off
+struct Cascade
+{
+    int col;            // landing column
+    int slope;          // colH[col+1] - colH[col], read BEFORE the block landed
+    long long mass;     // blocks eliminated
+    int clusters;       // maximal same-species components eliminated
+    int duration;       // chain generations that eliminated >= 1 block
+    int width;          // distinct columns eliminated in
+};
+
+class PuyoEngine;
+
+// Hooks are called in this order within a step: component/cascade during the
+// step's L depositions, then (after any checkpoint) record.  Everything an
+// observer accumulates must go through save/load, or a resumed run diverges.
+struct Observer
+{
+    virtual ~Observer() = default;
+    virtual const char *name() const = 0;
+    virtual bool begin() { return true; }   // open outputs; false on failure
+    virtual void component(int /*step*/, int /*species*/, long long /*size*/) {}
+    virtual void cascade(int /*step*/, const Cascade &) {}
+    virtual void record(int /*step*/, const PuyoEngine &) {}
+    virtual void finish(const PuyoEngine &) {}
+    virtual void save(CkptWriter &) {}
+    virtual void load(CkptReader &) {}
+};
+
+class PuyoEngine
+{
+public:
+    int L;
+    int nSpecies;
+    std::mt19937 gen;
+    RollingLattice lt;
+    std::vector<Observer *> observers;
+
+    static constexpr int WINDOW = 12;      // parallel mode: cascade confinement, columns each side
+    static constexpr int BATCH = 1024;     // parallel mode: drops scheduled together
+    static constexpr int PAR_MIN_L = 1024; // below this the waves are too small to pay
+
+    PuyoEngine(int L_, double N, int sim, bool uniformSpecies = false)
+        : L(L_), nSpecies(uniformSpecies ? static_cast<int>(N) : static_cast<int>(speciesWeights(N).size())),
+          gen(simSeed(sim)), lt(L_, nSpecies), uniform(uniformSpecies), disL(0, L_ - 1),
+          disUniform(1, std::max(1, nSpecies)), colDirtyGen(L_, 0), lowestElim(L_, 0), colTouch(L_, 0),
+          scratch(1)
+    {
+        std::vector<double> w = speciesWeights(N);
+        disWeighted = std::discrete_distribution<>(w.begin(), w.end());
+    }
+
+    // T > 1 deposits independent drops concurrently (see the header); the
+    // output does not depend on T.  Ignored below PAR_MIN_L.
+    void setThreads(int T)
+    {
+        if (T <= 1 || L < PAR_MIN_L)
+            return;
+        pool = std::make_unique<SpinPool>(T);
+        scratch.resize(T);
+        drops.resize(BATCH);
+        blockLevel.assign((L + BLOCK - 1) / BLOCK, 0);
+        blockStamp.assign(blockLevel.size(), 0);
+        drawer = std::make_unique<BackgroundTask>();
+    }
+
+    // the L depositions of one step, then the floor advance
+    void advance(int step)
+    {
+        curStep = step;
+        if (pool)
+            advanceParallel(step);
+        else
+            for (int i = 0; i < L; ++i)
+            {
+                int col = disL(gen);   // column first, then species: the draw order is part of the output
+                int species = drawSpecies();
+                deposit<false>(scratch[0], nullptr, col, species);
+            }
+        lt.advanceFloor();
+    }
+
+    double meanHeight() const
+    {
+        double sum = 0;
+        for (int c = 0; c < L; ++c) sum += lt.colH[c];
+        return sum / L;
+    }
+
+    void save(CkptWriter &w)
+    {
+        w.lattice(lt);
+        w.rng(gen);
+        for (Observer *o : observers) o->save(w);
+    }
+
+    void load(CkptReader &r)
+    {
+        if (drawer) drawer->wait();
+        aheadStep = -1;   // the look-ahead came from the old generator
+        r.lattice(lt);
+        r.rng(gen);
+        for (Observer *o : observers) o->load(r);
+    }
+
+private:
+    bool uniform;
+    std::uniform_int_distribution<> disL, disUniform;
+    std::discrete_distribution<> disWeighted;
+
+    std::vector<int> colDirtyGen;   // dirty-column stamp
+    std::vector<int> lowestElim;    // per dirty col
+    std::vector<int> colTouch;      // per-cascade stamp, for Cascade::width
+    int curStep = 0;
+    Cascade cas{};                  // the serial path's cascade
+
+    // per-thread cascade scratch.  Stamps must be unique across threads, so
+    // thread t hands out t+1, t+1+T, ... past the last stamp used (`inc` = T).
+    struct Scratch
+    {
+        std::vector<int> movedList, newMovedList, dirtyCols, component, bfs;
+        int stamp = 1, casStamp = 1, inc = 1;
+        int center = 0;   // parallel: the window's column
+        Scratch()
+        {
+            movedList.reserve(1024); newMovedList.reserve(1024);
+            dirtyCols.reserve(256); component.reserve(1024); bfs.reserve(1024);
+        }
+    };
+    std::vector<Scratch> scratch;
+
+    // one drop of a parallel batch: its draw, its buffered observer events and
+    // the undo log that can take it back out of the lattice
+    struct Drop
+    {
+        int col, species, wave;
+        int state;   // 0 not run, 1 done, 2 escaped (already undone)
+        Cascade cas;
+        long long floorHits;
+        std::vector<std::pair<int, long long>> events;   // (species, size)
+        std::vector<std::pair<int, uint8_t>> undoLat;
+        std::vector<std::pair<int, int>> undoH;
+    };
+    static constexpr int BLOCK = 8;       // wave scheduling resolution, columns
+    static constexpr int TOP_SLACK = 8;   // rows ensured above a round's highest landing column
+    std::unique_ptr<SpinPool> pool;
+    std::vector<Drop> drops;
+    std::vector<int> stepCols, stepSpecies, blockLevel, blockStamp;
+    std::vector<std::vector<int>> waves;
+    int batchId = 0;
+    int parTop = 0;   // highest row a parallel drop may land on this round
+
+    // the next step's draws, made on `drawer` from genAhead while this step
+    // runs; gen itself only ever holds the serial state, so checkpoints do too.
+    // Declared last so it is joined before anything it writes is destroyed.
+    std::mt19937 genAhead;
+    std::vector<int> aheadCols, aheadSpecies;
+    int aheadStep = -1;
+    std::unique_ptr<BackgroundTask> drawer;
+
+    int drawSpecies() { return uniform ? disUniform(gen) : disWeighted(gen) + 1; }   // 0 means empty
+
+    // place one block and run its cascade to quiet.  Par: confined to the
+    // window around `col`, logged into d; returns false if it escaped (and
+    // has then already been undone).
+    template <bool Par>
+    bool deposit(Scratch &s, Drop *d, int col, int species)
+    {
+        std::vector<int> &colH = lt.colH;
+        Cascade &c = Par ? d->cas : cas;
+        c = Cascade{col, colH[(col + 1) % L] - colH[col], 0, 0, 0, 0};
+
+        if constexpr (!Par)
+            lt.ensure(colH[col]);   // parallel rounds ensure() up front: it may move the ring
+        else
+        {
+            d->floorHits = 0;
+            d->events.clear(); d->undoLat.clear(); d->undoH.clear();
+            if (colH[col] > parTop)   // a pile-up of this round's drops; rare
+                return false;
+        }
+        int pos = lt.idx(colH[col], col);
+        if constexpr (Par)
+        {
+            s.center = col;
+            d->undoLat.push_back({pos, lt.lat[pos]});
+            d->undoH.push_back({col, colH[col]});
+        }
+        lt.lat[pos] = static_cast<uint8_t>(species);
+        ++colH[col];
+
+        int cs = s.casStamp;   // per-cascade column stamp, distinct from the BFS stamp
+        s.casStamp += s.inc;
+        s.movedList.clear();
+        s.movedList.push_back(pos);
+        while (true)
+        {
+            if (!annihilate<Par>(s, d, c, cs))
+            {
+                if constexpr (Par) undo(*d);
+                return false;
+            }
+            fallDirty<Par>(s, d);
+            if (s.newMovedList.empty())
+                break;
+            s.movedList.swap(s.newMovedList);
+        }
+
+        if constexpr (!Par)
+            for (Observer *o : observers)
+                o->cascade(curStep, c);
+        return true;
+    }
+
+    // eliminates every maximal same-species connected component that contains
+    // >=1 moved seed and has size > 1; records dirty columns + lowest elim height.
+    // Par: false as soon as a BFS site sits on the window's edge (its side
+    // neighbour is outside), before anything outside is read.
+    template <bool Par>
+    bool annihilate(Scratch &s, Drop *d, Cascade &c, int cs)
+    {
+        uint8_t *lat = lt.lat.data();
+        int *visitedGen = lt.visitedGen.data();
+        int g = s.stamp;
+        s.stamp += s.inc;
+        s.dirtyCols.clear();
+        long long genMass = 0;
+        for (int seed : s.movedList)
+        {
+            if (lat[seed] == 0 || visitedGen[seed] == g)
+                continue;
+            uint8_t sp = lat[seed];
+            s.component.clear();
+            s.bfs.clear();
+            s.bfs.push_back(seed);
+            visitedGen[seed] = g;
+            size_t head = 0;
+            while (head < s.bfs.size())
+            {
+                int cur = s.bfs[head++];
+                s.component.push_back(cur);
+                int col = cur % L, row = cur - col, y = lt.heightOf(cur);
+                if constexpr (Par)
+                {
+                    int dist = col - s.center;
+                    if (dist < 0) dist = -dist;
+                    if (dist > L - dist) dist = L - dist;
+                    if (dist >= WINDOW)
+                        return false;
+                }
+                if (y > lt.base) { int nb = lt.idx(y - 1, col); if (lat[nb] == sp && visitedGen[nb] != g) { visitedGen[nb] = g; s.bfs.push_back(nb); } }
+                else if (lt.base > 0) { if constexpr (Par) ++d->floorHits; else ++lt.floorHits; }
+                { int nb = lt.idx(y + 1, col); if (lat[nb] == sp && visitedGen[nb] != g) { visitedGen[nb] = g; s.bfs.push_back(nb); } }
+                { int nb = row + (col - 1 + L) % L; if (lat[nb] == sp && visitedGen[nb] != g) { visitedGen[nb] = g; s.bfs.push_back(nb); } }
+                { int nb = row + (col + 1) % L; if (lat[nb] == sp && visitedGen[nb] != g) { visitedGen[nb] = g; s.bfs.push_back(nb); } }
+            }
+            if (s.component.size() > 1)
+            {
+                for (int id : s.component)
+                {
+                    if constexpr (Par) d->undoLat.push_back({id, lat[id]});
+                    lat[id] = 0;
+                    int col = id % L, y = lt.heightOf(id);
+                    if (colDirtyGen[col] != g) { colDirtyGen[col] = g; lowestElim[col] = y; s.dirtyCols.push_back(col); }
+                    else if (y < lowestElim[col]) lowestElim[col] = y;
+                    if (colTouch[col] != cs) { colTouch[col] = cs; ++c.width; }
+                }
+                long long size = static_cast<long long>(s.component.size());
+                genMass += size;
+                ++c.clusters;
+                if constexpr (Par)
+                    d->events.push_back({sp, size});
+                else
+                    for (Observer *o : observers)
+                        o->component(curStep, sp, size);
+            }
+        }
+        if (genMass > 0)
+        {
+            c.mass += genMass;
+            ++c.duration;
+        }
+        return true;
+    }
+
+    // compact each dirty column above its lowest gap; blocks below are inert.
+    template <bool Par>
+    void fallDirty(Scratch &s, Drop *d)
+    {
+        uint8_t *lat = lt.lat.data();
+        std::vector<int> &colH = lt.colH;
+        s.newMovedList.clear();
+        for (int c : s.dirtyCols)
+        {
+            int write = lowestElim[c];     // lowest eliminated height -> now empty
+            int top = colH[c];             // pre-elimination top (upper bound on filled heights)
+            for (int y = write + 1; y < top; ++y)
+            {
+                int id = lt.idx(y, c);
+                if (lat[id] != 0)
+                {
+                    int dst = lt.idx(write, c);   // write < y always here, so it moved
+                    if constexpr (Par)
+                    {
+                        d->undoLat.push_back({dst, lat[dst]});
+                        d->undoLat.push_back({id, lat[id]});
+                    }
+                    lat[dst] = lat[id];
+                    lat[id] = 0;
+                    s.newMovedList.push_back(dst);
+                    ++write;
+                }
+            }
+            if constexpr (Par) d->undoH.push_back({c, colH[c]});
+            colH[c] = write;
+        }
+    }
+
+    void undo(Drop &d)
+    {
+        for (auto it = d.undoLat.rbegin(); it != d.undoLat.rend(); ++it)
+            lt.lat[it->first] = it->second;
+        for (auto it = d.undoH.rbegin(); it != d.undoH.rend(); ++it)
+            lt.colH[it->first] = it->second;
+    }
+
+    // hand thread t fresh stamps t+1, t+1+T, ... (or back to one serial stream)
+    void spreadStamps(int T)
+    {
+        int st = 0, cs = 0;
+        for (Scratch &s : scratch) { st = std::max(st, s.stamp); cs = std::max(cs, s.casStamp); }
+        for (int t = 0; t < static_cast<int>(scratch.size()); ++t)
+        {
+            scratch[t].stamp = st + (T > 1 ? t : 0);
+            scratch[t].casStamp = cs + (T > 1 ? t : 0);
+            scratch[t].inc = T > 1 ? T : 1;
+        }
+    }
+
+    // assign drops[0, K) to waves; returns the number of waves.  Batch
+    // boundaries are fixed, so this depends on the draws alone.
+    int scheduleBatch(int first, int K)
+    {
+        ++batchId;
+        int nBlocks = static_cast<int>(blockLevel.size()), nWaves = 0;
+        for (int j = 0; j < K; ++j)
+        {
+            Drop &d = drops[j];
+            d.col = stepCols[first + j];
+            d.species = stepSpecies[first + j];
+            // the blocks holding columns col-WINDOW .. col+WINDOW, cyclically
+            int lo = d.col - WINDOW, hi = d.col + WINDOW;
+            if (lo < 0) lo += L;
+            if (hi >= L) hi -= L;
+            int bLo = lo / BLOCK, bHi = hi / BLOCK, w = 0;
+            for (int b = bLo;; b = (b + 1 == nBlocks ? 0 : b + 1))
+            {
+                if (blockStamp[b] == batchId) w = std::max(w, blockLevel[b]);
+                if (b == bHi) break;
+            }
+            for (int b = bLo;; b = (b + 1 == nBlocks ? 0 : b + 1))
+            {
+                blockStamp[b] = batchId;
+                blockLevel[b] = w + 1;
+                if (b == bHi) break;
+            }
+            d.wave = w;
+            nWaves = std::max(nWaves, w + 1);
+        }
+        if (static_cast<int>(waves.size()) < nWaves) waves.resize(nWaves);
+        for (int w = 0; w < nWaves; ++w) waves[w].clear();
+        for (int j = 0; j < K; ++j) waves[drops[j].wave].push_back(j);
+        return nWaves;
+    }
+
+    void drawStep(std::mt19937 &g, std::vector<int> &cols, std::vector<int> &species)
+    {
+        cols.resize(L);
+        species.resize(L);
+        for (int i = 0; i < L; ++i)
+        {
+            cols[i] = disL(g);
+            species[i] = uniform ? disUniform(g) : disWeighted(g) + 1;
+        }
+    }
+
+    void advanceParallel(int step)
+    {
+        // the draws, in exactly the serial order: usually made on the drawer
+        // thread while the previous step ran, from a copy of the generator
+        if (aheadStep == step)
+        {
+            drawer->wait();
+            stepCols.swap(aheadCols);
+            stepSpecies.swap(aheadSpecies);
+            gen = genAhead;
+        }
+        else
+            drawStep(gen, stepCols, stepSpecies);
+        genAhead = gen;
+        aheadStep = step + 1;
+        drawer->start([this] { drawStep(genAhead, aheadCols, aheadSpecies); });
+
+        int T = pool->size;
+        for (int first = 0; first < L; first += BATCH)
+        {
+            int K = std::min(BATCH, L - first);
+            int nWaves = scheduleBatch(first, K);
+            for (int j = 0; j < K; ++j) drops[j].state = 0;
+            // rounds: drops < from are committed.  After an escape the rest of
+            // the batch reruns through the same waves, which still order every
+            // overlapping pair.
+            for (int from = 0; from < K;)
+            {
+                // landing height bound: ensure() must not move the ring mid-round
+                int top = 0;
+                for (int j = from; j < K; ++j) top = std::max(top, lt.colH[drops[j].col]);
+                parTop = top + TOP_SLACK;
+                lt.ensure(parTop);
+                spreadStamps(T);
+                int limit = K;   // only drops < limit still count; the first escape lowers it
+                for (int w = 0; w < nWaves; ++w)
+                {
+                    const std::vector<int> &wave = waves[w];   // ascending drop order
+                    if (wave.back() < from || wave.front() >= limit)
+                        continue;
+                    std::atomic<int> next{0};
+                    pool->run([&](int tid) {
+                        Scratch &s = scratch[tid];
+                        for (int k; (k = next.fetch_add(1, std::memory_order_relaxed)) < static_cast<int>(wave.size());)
+                        {
+                            int j = wave[k];
+                            if (j < from || j >= limit)
+                                continue;
+                            Drop &d = drops[j];
+                            d.state = deposit<true>(s, &d, d.col, d.species) ? 1 : 2;
+                        }
+                    });
+                    int esc = limit;
+                    for (int j : wave)
+                        if (j >= from && j < limit && drops[j].state == 2) esc = std::min(esc, j);
+                    if (esc < limit)
+                    {
+                        // everything after the escape is void; take it back out, latest wave first
+                        for (int v = w; v >= 0; --v)
+                            for (int j : waves[v])
+                                if (j > esc && j < limit && drops[j].state == 1) { undo(drops[j]); drops[j].state = 0; }
+                        limit = esc;
+                    }
+                }
+                spreadStamps(1);
+                for (int j = from; j < limit; ++j)
+                {
+                    Drop &d = drops[j];
+                    for (auto &e : d.events)
+                        for (Observer *o : observers)
+                            o->component(step, e.first, e.second);
+                    for (Observer *o : observers)
+                        o->cascade(step, d.cas);
+                    lt.floorHits += d.floorHits;
+                }
+                if (limit < K)
+                {
+                    deposit<false>(scratch[0], nullptr, drops[limit].col, drops[limit].species);
+                    ++limit;
+                }
+                from = limit;
+            }
+        }
+    }
+};
+
+// Steps [start, STEPS] with checkpointing, then every observer's finish.  A
+// resumed run re-enters with step `start` simulated but not yet recorded.
+// `params` are the run parameters the checkpoint must carry (see resumeRun).
+inline void runEngine(PuyoEngine &e, int STEPS, const CkptOptions &ck, CkptHeader hd,
+                      const std::filesystem::path &ckptPath, const std::vector<RunParam> &params,
+                      bool resumed)
+{
+    int start = resumed ? hd.step : 0;
+    for (int step = start; step <= STEPS; ++step)
+    {
+        if (step > start || !resumed)
+            e.advance(step);
+
+        if (ck.every > 0 && step > start && (step % ck.every == 0 || step == STEPS))
+        {
+            hd.step = step;
+            saveCheckpoint(ckptPath, hd, [&](CkptWriter &w) { writeParams(w, params); e.save(w); });
+        }
+
+        for (Observer *o : e.observers)
+            o->record(step, e);
+
+        if (step % std::max(1, STEPS / 100) == 0)
+            std::cout << "Progress: " << static_cast<double>(step) / STEPS * 100 << "%\r" << std::flush;
+    }
+    for (Observer *o : e.observers)
+        o->finish(e);
+
+    if (e.lt.floorHits > 0)
+        std::cerr << "WARNING: " << e.lt.floorHits << " BFS probe(s) reached the frozen floor"
+                  << " (L=" << e.L << ", N=" << hd.N << "). Increase FLOOR_MARGIN.\n";
+}
@@ -0,0 +1,155 @@
+// One simulation, every study's output.
+//
+// avalancheScaling, criticalScaling and probabilityPuyo all simulate the same
+// continuous-N Puyo dynamics and differ only in what they record, so a
+// parameter point that all three need used to be simulated three times.  This
+// runs the shared engine (puyoEngine.h) once and attaches whichever observers
+// (observers.h) are asked for; each writes exactly the file the corresponding
+// single-purpose engine writes, into that study's outputs/ folder, so every
+// analysis script reads it unchanged.
+//
+// CLI:  L  N_SPECIES  STEPS  SIM_NO  [--observe LIST]  [--warmup W]  [--rec R]
+//                                    [--binary]  [--steady F]
+//                                    [--checkpoint K]  [--resume PATH]  [--threads T]
+//   LIST: comma-separated observer names, each optionally NAME:DIR to write
+//     under DIR/outputs/ instead of the default study folder (relative DIRs are
+//     taken from this executable's folder):
+//       avalanche, moments, slopeResolved  -> avalancheScaling/
+//       growth                             -> criticalScaling/
+//       velocity                           -> probabilityPuyo/
+//       profile                            -> ./  (slopeDist, big: off by default)
+//       roughness                          -> ./  (W(t) and P(m) reduction of profile)
+//     Default: avalanche,moments,slopeResolved,growth,velocity.
+//   W: warmup for avalanche/slopeResolved/velocity (default STEPS/4).
+//   R: profile/roughness record interval (default 1).
+//   F: roughness accumulates P(m) over recorded steps >= F*STEPS (default 0.7).
+//   --binary: profile writes the fixed-width .slp instead of .tsv (observers.h).
+//   --checkpoint / --resume as in checkpoint.h; the observer set is part of the
+//   run's identity, so a checkpoint only resumes with the same LIST.
+//   --threads T: deposit on T threads (L >= 1024; puyoEngine.h), same output.
+//
+// Output is bit-identical to the single-purpose engine for the same arguments,
+// with one exception: profile uses the continuous-N species draw here, while
+// slopeDistFast keeps slopeDist.cpp's uniform draw.  At integer N the two are
+// the same ensemble but not the same realisation, so do not mix their files
+// expecting identical runs.
+#include <iostream>
+#include <filesystem>
+#include <memory>
+#include <map>
+
+#include "puyoEngine.h"
+#include "observers.h"
+
+#pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
+#pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
+
+static auto _ = []()
+{ std::ios_base::sync_with_stdio(false); std::cin.tie(nullptr); std::cout.tie(nullptr); return 0; }();
+
+// canonical order: the checkpoint stores observer states in this order
+const std::vector<std::pair<std::string, std::string>> OBSERVERS = {
+    {"avalanche", "avalancheScaling"},
+    {"moments", "avalancheScaling"},
+    {"slopeResolved", "avalancheScaling"},
+    {"growth", "criticalScaling"},
+    {"velocity", "probabilityPuyo"},
+    {"profile", "."},
+    {"roughness", "."},
+};
+
+int main(int argc, char *argv[])
+{
+    CkptOptions ck;
+    std::vector<std::string> raw = ckptArgs(argc, argv, ck);
+    int threads = threadsArg(raw);
+    std::vector<std::string> args;
+    std::string list = "avalanche,moments,slopeResolved,growth,velocity";
+    int WARMUP = -1, REC_INTERVAL = 1;
+    double steadyFrac = 0.7;
+    bool recGiven = false, binary = false;
+    for (size_t i = 0; i < raw.size(); ++i)
+    {
+        if (raw[i] == "--observe" && i + 1 < raw.size()) list = raw[++i];
+        else if (raw[i] == "--warmup" && i + 1 < raw.size()) WARMUP = std::stoi(raw[++i]);
+        else if (raw[i] == "--binary") binary = true;
+        else if (raw[i] == "--steady" && i + 1 < raw.size()) steadyFrac = std::stod(raw[++i]);
+        else if (raw[i] == "--rec" && i + 1 < raw.size()) { REC_INTERVAL = std::stoi(raw[++i]); recGiven = true; }
+        else args.push_back(raw[i]);
+    }
+    if (args.size() < 5)
+    {
+        std::cerr << "usage: " << args[0] << " L N STEPS SIM [--observe LIST] [--warmup W] [--rec R]"
+                  << " [--binary] [--steady F] [--checkpoint K] [--resume PATH] [--threads T]\n";
+        return 1;
+    }
+    int L = std::stoi(args[1]);
+    double N_SPECIES = std::stod(args[2]);
+    int STEPS = std::stoi(args[3]);
+    int SIM_NO = std::stoi(args[4]);
+    bool warmupGiven = WARMUP >= 0;
+    if (WARMUP < 0) WARMUP = STEPS / 4;
+    if (REC_INTERVAL <= 0) REC_INTERVAL = 1;
+
+    std::filesystem::path exeDir = std::filesystem::path(args[0]).parent_path();
+    std::map<std::string, std::filesystem::path> wanted;
+    for (size_t a = 0; a <= list.size();)
+    {
+        size_t b = list.find(',', a);
+        if (b == std::string::npos) b = list.size();
+        std::string item = list.substr(a, b - a), dir;
+        a = b + 1;
+        if (item.empty())
+            continue;
+        size_t colon = item.find(':');
+        if (colon != std::string::npos) { dir = item.substr(colon + 1); item = item.substr(0, colon); }
+        auto it = std::find_if(OBSERVERS.begin(), OBSERVERS.end(), [&](auto &o) { return o.first == item; });
+        if (it == OBSERVERS.end())
+        {
+            std::cerr << "Unknown observer: " << item << "\n";
+            return 1;
+        }
+        std::filesystem::path root = dir.empty() ? std::filesystem::path(it->second) : std::filesystem::path(dir);
+        wanted[item] = root.is_absolute() ? root : exeDir / root;
+    }
+    std::string engineName = "puyoRun";
+    for (auto &o : OBSERVERS)
+        if (wanted.count(o.first)) engineName += ":" + o.first;
+
+    int steadyFrom = steadyThreshold(steadyFrac, STEPS, 0, false, 0);
+    RunInfo run{L, N_SPECIES, STEPS, SIM_NO, WARMUP, REC_INTERVAL, binary, steadyFrom, STEPS};
+    std::filesystem::path ckptPath = exeDir / "outputs" / "checkpoints" / (runStem(run, fmtN(N_SPECIES, 4)) + ".ckpt");
+    if (ck.every > 0)
+        std::filesystem::create_directories(ckptPath.parent_path());
+
+    CkptHeader hd{engineName, L, N_SPECIES, SIM_NO, 0, STEPS};
+    std::vector<RunParam> params{{"WARMUP", WARMUP, warmupGiven}, {"REC_INTERVAL", REC_INTERVAL, recGiven},
+                                 {"BINARY", binary, binary}, {"STEADY_FROM", steadyFrom, false},
+                                 {"REF_STEPS", STEPS, false}};
+    std::unique_ptr<CkptReader> rd;
+    if (!resumeRun(ck, hd, params, rd))
+        return 1;
+    run.warmup = params[0].value;
+    run.rec = params[1].value;
+    run.binary = params[2].value != 0;
+    run.steadyFrom = steadyThreshold(steadyFrac, STEPS, params[3].value, rd != nullptr, hd.step);
+    params[3].value = run.steadyFrom;
+    run.refSteps = params[4].value;
+
+    PuyoEngine engine(L, N_SPECIES, SIM_NO);
+    engine.setThreads(threads);
+    std::vector<std::unique_ptr<Observer>> owned;
+    for (auto &o : OBSERVERS)
+        if (wanted.count(o.first))
+        {
+            owned.push_back(makeObserver(o.first, run, wanted[o.first]));
+            engine.observers.push_back(owned.back().get());
+        }
+    if (rd)
+        engine.load(*rd);
+    for (Observer *o : engine.observers)
+        if (!o->begin())
+            return 1;
+    runEngine(engine, STEPS, ck, hd, ckptPath, params, rd != nullptr);
+    return 0;
+}
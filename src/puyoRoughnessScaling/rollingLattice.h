@@ -0,0 +1,112 @@
+// Rolling-window lattice shared by the fast Puyo engines.
+//
+// The full H*L box of the earlier engines held the whole pile, but almost all of
+// it is dead: a quiet pile has no two adjacent blocks of the same species (every
+// such pair contains a moved site, so it was eliminated when it formed).  Hence
+// a cascade's component is its moved sites plus their DIRECT neighbours, and
+// each chain generation can reach at most one row below the previous one.  A
+// cascade that starts at height >= min(colH) can therefore only reach rows
+// >= min(colH) - duration.
+//
+// So only the band [base, max(colH)] is stored, in a ring buffer of `rows` rows
+// (a power of two, so height -> ring row is a mask).  Rows below
+//     base = min(colH) - FLOOR_MARGIN
+// are FROZEN: they are full (gravity leaves no holes), never touched again, and
+// are reduced to per-species counts in frozenSp so the pile composition is
+// still exact.  Memory is O(L * (roughness + FLOOR_MARGIN)) instead of
+// O(L * v * steps), and there is no box ceiling to size or to hit.
+//
+// Heights run UP from the floor here (y = 0 is the bottom row), unlike the
+// top-down rows of slopeDist.cpp; the dynamics do not depend on the labelling.
+//
+// floorHits counts BFS probes into a frozen row.  It must be 0 -- a nonzero
+// value means a cascade ran > FLOOR_MARGIN generations deep and the run is not
+// exact.  It plays the role ceiling_hits used to, but needs no tuning.
+#pragma once
+#include <vector>
+#include <cstdint>
+#include <cstddef>
+#include <algorithm>
+
+constexpr int FLOOR_MARGIN = 256;   // rows kept live below the lowest column
+
+struct RollingLattice
+{
+    int L;
+    int rows;           // ring capacity, power of two
+    int mask;           // rows - 1
+    int base = 0;       // lowest live height; heights < base are frozen
+    long long floorHits = 0;
+    int peakRows = 0;   // largest live band seen (memory diagnostic)
+
+    std::vector<uint8_t> lat;      // species (0 = empty), ring-indexed
+    std::vector<int> visitedGen;   // BFS stamp, ring-indexed
+    std::vector<int> colH;         // absolute column heights
+    std::vector<long long> frozenSp;   // per-species counts of frozen blocks
+
+    RollingLattice(int L_, int nSpecies) : L(L_), colH(L_, 0), frozenSp(nSpecies + 1, 0)
+    {
+        rows = 1;
+        while (rows < 2 * FLOOR_MARGIN) rows <<= 1;
+        mask = rows - 1;
+        lat.assign(static_cast<size_t>(rows) * L, 0);
+        visitedGen.assign(static_cast<size_t>(rows) * L, 0);
+    }
+
+    int idx(int y, int c) const { return (y & mask) * L + c; }
+
+    // absolute height of a ring index (inverse of idx in y)
+    int heightOf(int id) const { return base + (((id / L) - base) & mask); }
+
+    // make room for a block landing at height y.  The row above the top block
+    // must stay distinct from `base` in the ring, so the upward BFS neighbour
+    // of a top block is always a genuinely empty site.
+    void ensure(int y)
+    {
+        if (y + 1 - base < rows)
+            return;
+        int newRows = rows;
+        while (y + 1 - base >= newRows) newRows <<= 1;
+        int newMask = newRows - 1;
+        std::vector<uint8_t> nlat(static_cast<size_t>(newRows) * L, 0);
+        for (int c = 0; c < L; ++c)
+            for (int h = base; h < colH[c]; ++h)
+                nlat[(h & newMask) * L + c] = lat[idx(h, c)];
+        lat.swap(nlat);
+        visitedGen.assign(static_cast<size_t>(newRows) * L, 0);   // stale stamps are harmless, but the layout moved
+        rows = newRows;
+        mask = newMask;
+    }
+
+    // freeze every full row more than FLOOR_MARGIN below the lowest column.
+    // O(L) for the min; the freezing itself is amortized O(1) per deposit.
+    void advanceFloor()
+    {
+        int lo = *std::min_element(colH.begin(), colH.end());
+        int hi = *std::max_element(colH.begin(), colH.end());
+        peakRows = std::max(peakRows, hi - base + 1);
+        int newBase = lo - FLOOR_MARGIN;
+        for (; base < newBase; ++base)
+        {
+            int row = (base & mask) * L;
+            for (int c = 0; c < L; ++c)
+            {
+                ++frozenSp[lat[row + c]];
+                lat[row + c] = 0;
+            }
+        }
+    }
+
+    // pile composition: frozen counts plus whatever is still live
+    std::vector<long long> pileBySpecies() const
+    {
+        std::vector<long long> sp(frozenSp);
+        for (int c = 0; c < L; ++c)
+            for (int h = base; h < colH[c]; ++h)
+                ++sp[lat[idx(h, c)]];
+        return sp;
+    }
+
+    // bytes held by the live band (lat + visitedGen), for reporting
+    size_t bytes() const { return static_cast<size_t>(rows) * L * (sizeof(uint8_t) + sizeof(int)); }
+};
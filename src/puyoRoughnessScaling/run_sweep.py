@@ -1,23 +1,58 @@
-"""Emit the sweep job list (one line per sim: "L N steps sim H rec").
+"""Emit the sweep job list (one line per sim: "L N steps sim rec").
 
 Single source of truth = common.FSWEEP / LEXTRA / NSIMS.  Piped into xargs for
-execution (see the shell command that launches the sweep).
+execution (see the shell command that launches the sweep), or run directly
+under the memory-aware scheduler (scheduler.py), which also skips sims whose
+output already exists:
+
+    python run_sweep.py --run [--cores 16] [--mem 48G] [--dry-run]
+
+`--binary` adds the flag to every job, so the engine writes memory-mappable
+.slp files that common.py reads in place of the .tsv; `--reduce` instead has
+the engine write only W(t) and the steady-state P(m) (outputs/roughness),
+~L-fold smaller.
 """
-from common import FSWEEP, LEXTRA, NSIMS, FIXED_L
+import os
+import sys
 
+from common import FSWEEP, LEXTRA, NSIMS, FIXED_L, STEADY_FRAC, DATA, REDUCED, ROUGH
+
+
+def jobs(binary=False, reduce=False):
+    """(args, output file) per sim, in emission order."""
+    flag = []
+    if binary:
+        flag.append("--binary")
+    if reduce:
+        flag += ["--reduce", str(STEADY_FRAC)]
+    out = []
+
+    def add(L, N, steps, sim):
+        rec = max(1, steps // 2500)
+        stem = f"L_{L}_N_{N}_steps_{steps}_sim_{sim}"
+        path = f"{REDUCED}/{stem}.tsv" if reduce else f"{DATA}/{stem}.{'slp' if binary else 'tsv'}"
+        out.append(([L, N, steps, sim, rec] + flag, path))
 
-def main():
-    lines = []
     for N, cfg in FSWEEP.items():
-        rec = max(1, cfg["steps"] // 2500)
         for L in cfg["Ls"]:
             for sim in range(NSIMS):
-                lines.append(f"{L} {N} {cfg['steps']} {sim} {cfg['H']} {rec}")
+                add(L, N, cfg["steps"], sim)
     for N, cfg in LEXTRA.items():
-        rec = max(1, cfg["steps"] // 2500)
         for sim in range(NSIMS):
-            lines.append(f"{FIXED_L} {N} {cfg['steps']} {sim} {cfg['H']} {rec}")
-    print("\n".join(lines))
+            add(FIXED_L, N, cfg["steps"], sim)
+    return out
+
+
+def main():
+    argv = sys.argv[1:]
+    binary, reduce = "--binary" in argv, "--reduce" in argv
+    if "--run" in argv:
+        from scheduler import Job, cli, engine_bytes
+        rest = [a for a in argv if a not in ("--run", "--binary", "--reduce")]
+        todo = [Job(args, [path], engine_bytes(args[0])) for args, path in jobs(binary, reduce)]
+        cli(os.path.join(ROUGH, "slopeDistFast"), todo, rest, log=f"{ROUGH}/outputs/scheduler.jsonl")
+        return
+    print("\n".join(" ".join(str(x) for x in args) for args, _ in jobs(binary, reduce)))
 
 
 if __name__ == "__main__":
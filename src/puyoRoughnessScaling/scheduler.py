@@ -0,0 +1,197 @@
+"""Memory-aware job runner for the sweeps, replacing `run_sweep.py | xargs -P`.
+
+xargs can only be told a process count, so -P was hand-picked per sweep from a
+guess at what fits in RAM: too low under-fills the node, too high OOMs it.
+This packs jobs against BOTH a core count and a memory budget, using a per-job
+RAM estimate that is replaced by the measured peak RSS as soon as a job of the
+same width has finished.
+
+Each study's run_sweep.py builds the Job list from its own jobs() (so the sweep
+definition stays the single source of truth) and hands it over with --run:
+
+    python run_sweep.py --run [--cores 16] [--mem 48G] [--retries 1] [--dry-run]
+
+  * jobs whose outputs all exist (non-empty) are skipped -- unless the log shows
+    they were started and never finished, or last ended with a nonzero exit,
+    i.e. the outputs may be partial;
+  * a failed job (nonzero exit) is retried up to --retries times;
+  * every start/end is appended to outputs/scheduler.jsonl with wall time, peak
+    RSS, the estimate it was scheduled with and the tail of its stderr (the
+    engines' floor_hits warnings land there).
+
+Jobs are started in the order given (the sweeps emit widest first); when the
+next job does not fit, a later smaller one may backfill.  A job larger than the
+whole budget runs alone rather than never.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+# args: the command-line arguments after the executable; outputs: files that
+# exist once the job has finished; mem: estimated peak bytes
+Job = namedtuple("Job", "args outputs mem")
+
+MiB = 1 << 20
+BASE_RSS = 12 * MiB   # measured floor: ru_maxrss includes the spawning interpreter
+LIVE_ROWS = 1024      # rolling-window rows: >= 2*FLOOR_MARGIN, plus the roughness band
+
+
+def engine_bytes(L, extra=0, rows=LIVE_ROWS):
+    """Peak RAM of one deposition run: uint8 lattice + int32 BFS stamps over the
+    live rows (../rollingLattice.h), plus whatever the observers hold."""
+    return BASE_RSS + 5 * L * rows + extra
+
+
+def parse_size(s):
+    """'48G', '512M', '1.5T' or plain bytes -> bytes."""
+    s = str(s).strip().upper().rstrip("B")
+    mult = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    if s and s[-1] in mult:
+        return int(float(s[:-1]) * mult[s[-1]])
+    return int(float(s))
+
+
+def available_memory():
+    """90% of MemAvailable, the default budget."""
+    try:
+        with open("/proc/meminfo") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024 * 9 // 10
+    except OSError:
+        pass
+    return 8 << 30
+
+
+def _key(args):
+    return " ".join(str(a) for a in args)
+
+
+def _unfinished(log):
+    """Jobs whose last log record is not a clean end: started and never ended
+    (scheduler was killed), or ended with a nonzero exit (the engines write as
+    they go, so a failed job can leave a partial, non-empty output)."""
+    if not os.path.exists(log):
+        return set()
+    last = {}
+    with open(log) as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            last[rec.get("job")] = rec
+    return {job for job, rec in last.items() if rec.get("event") != "end" or rec.get("rc") != 0}
+
+
+def _done(job, unfinished):
+    if _key(job.args) in unfinished:
+        return False
+    return bool(job.outputs) and all(os.path.exists(f) and os.path.getsize(f) > 0 for f in job.outputs)
+
+
+def _mb(b):
+    return round(b / MiB, 1)
+
+
+def schedule(exe, jobs, cores=None, mem=None, retries=1, log="scheduler.jsonl", dry_run=False):
+    """Run `exe *job.args` for every job not already done.  Returns the number
+    of jobs that failed for good."""
+    cores = cores or os.cpu_count() or 1
+    mem = mem or available_memory()
+    unfinished = _unfinished(log)
+    pending = [(j, 0) for j in jobs if not _done(j, unfinished)]
+    skipped = len(jobs) - len(pending)
+    print(f"{len(pending)} job(s) to run, {skipped} already done; "
+          f"{cores} cores, {_mb(mem):.0f} MiB budget")
+    if dry_run:
+        for j, _ in pending:
+            print(f"  {_key(j.args)}  ~{_mb(j.mem)} MiB")
+        return 0
+    if os.path.dirname(log):
+        os.makedirs(os.path.dirname(log), exist_ok=True)
+
+    measured = {}        # job width (first arg, L) -> largest peak RSS seen
+    running = {}         # pid -> (job, attempt, estimate, t0, stderr file)
+    used = 0
+    failed = 0
+    finished = 0
+    total = len(pending)
+
+    def estimate(job):
+        m = measured.get(job.args[0])
+        return int(m * 1.15) if m else job.mem
+
+    with open(log, "a") as lf:
+        def write(rec):
+            lf.write(json.dumps(rec) + "\n")
+            lf.flush()
+
+        while pending or running:
+            while len(running) < cores and pending:
+                pick = None
+                for i, (job, _) in enumerate(pending):
+                    if used + estimate(job) <= mem or not running:
+                        pick = i
+                        break
+                if pick is None:
+                    break
+                job, attempt = pending.pop(pick)
+                est = estimate(job)
+                if est > mem:
+                    print(f"warning: {_key(job.args)} needs ~{_mb(est)} MiB > budget; running it alone")
+                err = tempfile.TemporaryFile()
+                # posix_spawn, not subprocess: wait4 below must be the only
+                # reaper, and a forked interpreter would inflate ru_maxrss
+                pid = os.posix_spawn(exe, [exe] + [str(a) for a in job.args], os.environ,
+                                     file_actions=[(os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+                                                   (os.POSIX_SPAWN_DUP2, err.fileno(), 2)])
+                running[pid] = (job, attempt, est, time.time(), err)
+                used += est
+                write({"event": "start", "job": _key(job.args), "attempt": attempt,
+                       "est_mb": _mb(est), "time": time.time()})
+
+            pid, status, ru = os.wait4(-1, 0)
+            if pid not in running:
+                continue
+            job, attempt, est, t0, err = running.pop(pid)
+            used -= est
+            rc = os.waitstatus_to_exitcode(status)
+            rss = ru.ru_maxrss * 1024   # KiB on Linux
+            err.seek(0)
+            tail = err.read()[-2000:].decode(errors="replace").strip()
+            err.close()
+            measured[job.args[0]] = max(measured.get(job.args[0], 0), rss)
+            wall = time.time() - t0
+            write({"event": "end", "job": _key(job.args), "attempt": attempt, "rc": rc,
+                   "wall_s": round(wall, 2), "peak_rss_mb": _mb(rss), "est_mb": _mb(est),
+                   "stderr": tail})
+            if rc != 0 and attempt < retries:
+                pending.append((job, attempt + 1))
+                print(f"retry {attempt + 1}/{retries}: {_key(job.args)} (exit {rc})")
+                continue
+            finished += 1
+            failed += rc != 0
+            print(f"[{finished}/{total}] {_key(job.args)}  {wall:.1f}s  {_mb(rss)} MiB"
+                  + (f"  FAILED (exit {rc})" if rc else ""))
+    if failed:
+        print(f"{failed} job(s) failed; see {log}")
+    return failed
+
+
+def cli(exe, jobs, argv=None, log=None):
+    """The --run entry point of a run_sweep.py: parse scheduler options and go."""
+    ap = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]) + " --run")
+    ap.add_argument("--cores", type=int, default=None, help="concurrent jobs (default: all cores)")
+    ap.add_argument("--mem", type=parse_size, default=None, help="RAM budget, e.g. 48G (default: 90%% of available)")
+    ap.add_argument("--retries", type=int, default=1)
+    ap.add_argument("--log", default=log or "outputs/scheduler.jsonl")
+    ap.add_argument("--dry-run", action="store_true", help="list what would run")
+    a = ap.parse_args(argv)
+    if not a.dry_run and not os.path.exists(exe):
+        sys.exit(f"{exe} not found; build it first (see readme)")
+    sys.exit(1 if schedule(exe, jobs, a.cores, a.mem, a.retries, a.log, a.dry_run) else 0)
@@ -4,22 +4,13 @@ The current figure rescales by N (assuming the Laplace scale lambda ~ N). Test
 that assumption: measure lambda(N) directly and search for the scaling that
 actually collapses the family.
 """
-import glob
 import numpy as np
-from common import parse_slopes, pattern, steps_of, FIXED_L, all_N_at_fixed_L
+from common import steady_slopes_file, sim_files, steps_of, FIXED_L, STEADY_FRAC, all_N_at_fixed_L
 
 
 def steady_slopes(N):
-    thr = 0.7 * steps_of(N)
-    out = []
-    for f in sorted(glob.glob(pattern(FIXED_L, N))):
-        with open(f) as fh:
-            next(fh)
-            for line in fh:
-                p = line.split("\t")
-                if len(p) < 3 or not p[2].strip() or float(p[0]) < thr:
-                    continue
-                out.append(parse_slopes(p[2].strip()))
+    thr = STEADY_FRAC * steps_of(N)
+    out = [steady_slopes_file(f, thr) for f in sim_files(FIXED_L, N)]
     return np.concatenate(out)
 
 
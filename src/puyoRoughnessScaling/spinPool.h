@@ -0,0 +1,148 @@
+// A fixed set of threads that run one short job together, many times a second.
+//
+// The parallel deposition mode of puyoEngine.h hands out a "wave" of a few
+// hundred independent drops at a time -- microseconds of work -- so starting
+// threads per wave, or waking them through the kernel every time, would cost
+// more than the wave.  Workers therefore spin on a generation counter for a
+// while before falling back to a condition variable, so back-to-back waves are
+// handed over without a syscall while an idle pool (checkpoints, observer
+// output) sleeps instead of burning its cores.
+//
+// run(f) calls f(tid) on every thread, the caller being tid 0, and returns
+// once all of them have finished; everything written inside f is visible to
+// the caller afterwards (release/acquire on `pending`).
+#pragma once
+#include <atomic>
+#include <condition_variable>
+#include <functional>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+class SpinPool
+{
+public:
+    explicit SpinPool(int n) : size(n)
+    {
+        for (int t = 1; t < n; ++t)
+            workers.emplace_back([this, t] { loop(t); });
+    }
+
+    ~SpinPool()
+    {
+        {
+            std::lock_guard<std::mutex> lk(m);
+            quit = true;
+            gen.fetch_add(1, std::memory_order_release);
+        }
+        cv.notify_all();
+        for (std::thread &w : workers) w.join();
+    }
+
+    int size;
+
+    void run(const std::function<void(int)> &f)
+    {
+        job = &f;
+        pending.store(size - 1, std::memory_order_relaxed);
+        {
+            std::lock_guard<std::mutex> lk(m);
+            gen.fetch_add(1, std::memory_order_release);
+        }
+        cv.notify_all();
+        f(0);
+        for (int spin = 0; pending.load(std::memory_order_acquire) != 0; ++spin)
+            if (spin > SPINS) std::this_thread::yield();
+    }
+
+private:
+    static constexpr int SPINS = 4000;
+
+    std::vector<std::thread> workers;
+    std::atomic<unsigned> gen{0};
+    std::atomic<int> pending{0};
+    const std::function<void(int)> *job = nullptr;
+    bool quit = false;
+    std::mutex m;
+    std::condition_variable cv;
+
+    void loop(int tid)
+    {
+        unsigned seen = 0;
+        while (true)
+        {
+            int spin = 0;
+            while (gen.load(std::memory_order_acquire) == seen && spin < SPINS)
+                ++spin;
+            if (gen.load(std::memory_order_acquire) == seen)
+            {
+                std::unique_lock<std::mutex> lk(m);
+                cv.wait(lk, [&] { return gen.load(std::memory_order_acquire) != seen; });
+            }
+            seen = gen.load(std::memory_order_acquire);
+            if (quit)
+                return;
+            (*job)(tid);
+            pending.fetch_sub(1, std::memory_order_release);
+        }
+    }
+};
+
+// One background job at a time on a thread of its own: start(f) hands f over,
+// wait() returns once it has finished (and its writes are visible).  Used to
+// draw the next step's random numbers while the current step is deposited.
+class BackgroundTask
+{
+public:
+    BackgroundTask() : worker([this] { loop(); }) {}
+
+    ~BackgroundTask()
+    {
+        wait();
+        {
+            std::lock_guard<std::mutex> lk(m);
+            quit = true;
+        }
+        cv.notify_all();
+        worker.join();
+    }
+
+    void start(std::function<void()> f)
+    {
+        {
+            std::lock_guard<std::mutex> lk(m);
+            job = std::move(f);
+            busy = true;
+        }
+        cv.notify_all();
+    }
+
+    void wait()
+    {
+        std::unique_lock<std::mutex> lk(m);
+        cv.wait(lk, [&] { return !busy; });
+    }
+
+private:
+    std::mutex m;
+    std::condition_variable cv;
+    std::function<void()> job;
+    bool busy = false, quit = false;
+    std::thread worker;   // last: started once the rest is initialised
+
+    void loop()
+    {
+        std::unique_lock<std::mutex> lk(m);
+        while (true)
+        {
+            cv.wait(lk, [&] { return busy || quit; });
+            if (quit)
+                return;
+            lk.unlock();
+            job();
+            lk.lock();
+            busy = false;
+            cv.notify_all();
+        }
+    }
+};
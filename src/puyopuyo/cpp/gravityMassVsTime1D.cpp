@@ -6,12 +6,14 @@
 #include <sstream>
 #include <filesystem>
 
+#include "../../streamRng.h"
+
 // Define constants
 constexpr int DEFAULT_STEPS_PER_LATTICEPOINT = 1024; // Height of the 1D lattice (number of puyos)
 constexpr int DEFAULT_N_SPECIES = 6; // Number of species
 
-std::random_device rd;
-std::mt19937 gen(rd());
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
 
 void placePuyo(std::vector<int> &lattice, std::uniform_int_distribution<> &dis_species, int N_PUYOS)
 {
@@ -57,17 +59,19 @@ void run(std::ofstream &file, int N_PUYOS, int N_SPECIES)
 
 int main(int argc, char *argv[])
 {
+    RngArgs rngArgs = takeRngArgs(argc, argv);
     int N_SPECIES = DEFAULT_N_SPECIES;
     int STEPS_PER_LATTICEPOINT = DEFAULT_STEPS_PER_LATTICEPOINT;
     if (argc > 1)
         N_SPECIES = std::stoi(argv[1]);
     if (argc > 2)
         STEPS_PER_LATTICEPOINT = std::stoi(argv[2]);
+    gen = rngArgs.rng();
 
     std::string exePath = argv[0];
     std::string exeDir = std::filesystem::path(exePath).parent_path().string();
     std::ostringstream filePathStream;
-    filePathStream << exeDir << "\\outputs\\gravity1D\\N_" << N_SPECIES << "_steps_" << STEPS_PER_LATTICEPOINT << ".tsv";
+    filePathStream << exeDir << "\\outputs\\gravity1D\\N_" << N_SPECIES << "_steps_" << STEPS_PER_LATTICEPOINT << rngArgs.keySuffix(false) << ".tsv";
     std::string filePath = filePathStream.str();
 
     std::ofstream file;
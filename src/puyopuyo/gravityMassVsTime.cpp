@@ -0,0 +1,104 @@
+#include <random>
+#include <vector>
+#include <iostream>
+#include <iomanip>
+#include <fstream>
+#include <sstream>
+#include <filesystem>
+#include <string>
+#include <cstring>
+
+#include "../streamRng.h"
+#include "gravityPile.h"
+
+#pragma GCC optimize("inline", "unroll-loops", "no-stack-protector")
+#pragma GCC target("sse,sse2,sse3,ssse3,sse4,popcnt,abm,mmx,avx,avx2,tune=native", "f16c")
+
+static auto _ = []()
+{std::ios_base::sync_with_stdio(false);std::cin.tie(nullptr);std::cout.tie(nullptr);return 0; }();
+
+// The 1D-4D gravity mass-vs-time runs from one binary:
+//
+//     gravityMassVsTime D [L] [N_SPECIES] [STEPS] [--periodic] [--seed S] [--stream K]
+//
+// Each dimension is the same GravityPile (gravityPile.h) and the same draws as
+// cpp/gravityMassVsTime{D}D (hard walls) or, with --periodic,
+// periodicCpp/gravityMassVsTime{D}D, and the output goes where that binary
+// writes it (cpp/outputs/gravity{D}D/ or periodicCpp/outputs/gravity{D}D/
+// next to this one), so the viz scripts of both directories read it as is.
+// L is ignored for D = 1, which has no horizontal axes.
+
+// keyed in main from --seed / --stream (streamRng.h)
+StreamRng gen;
+
+constexpr int DEFAULT_L[5] = {0, 1, 128, 24, 8};
+constexpr int DEFAULT_N_SPECIES = 6;
+constexpr int DEFAULT_STEPS_PER_LATTICEPOINT = 128;
+
+int main(int argc, char *argv[])
+{
+    RngArgs rngArgs = takeRngArgs(argc, argv);
+    bool periodic = false;
+    int out = 1;
+    for (int i = 1; i < argc; ++i)
+    {
+        if (std::strcmp(argv[i], "--periodic") == 0)
+            periodic = true;
+        else
+            argv[out++] = argv[i];
+    }
+    argc = out;
+
+    if (argc < 2)
+    {
+        std::cerr << "usage: " << argv[0] << " D [L] [N_SPECIES] [STEPS] [--periodic] [--seed S] [--stream K]\n";
+        return 1;
+    }
+    int D = std::stoi(argv[1]);
+    if (D < 1 || D > 4)
+    {
+        std::cerr << "D must be 1, 2, 3 or 4\n";
+        return 1;
+    }
+    int L = DEFAULT_L[D];
+    int N_SPECIES = DEFAULT_N_SPECIES;
+    int STEPS_PER_LATTICEPOINT = D == 1 ? 1024 : DEFAULT_STEPS_PER_LATTICEPOINT;
+    if (argc > 2)
+        L = std::stoi(argv[2]);
+    if (argc > 3)
+        N_SPECIES = std::stoi(argv[3]);
+    if (argc > 4)
+        STEPS_PER_LATTICEPOINT = std::stoi(argv[4]);
+    gen = rngArgs.rng();
+
+    std::filesystem::path exeDir = std::filesystem::path(argv[0]).parent_path();
+    std::ostringstream fileNameStream;
+    if (D > 1)
+        fileNameStream << "L_" << L << "_";
+    fileNameStream << "N_" << N_SPECIES << "_steps_" << STEPS_PER_LATTICEPOINT << rngArgs.keySuffix(false) << ".tsv";
+    std::filesystem::path filePath = exeDir / (periodic && D > 1 ? "periodicCpp" : "cpp") / "outputs" /
+                                     ("gravity" + std::to_string(D) + "D") / fileNameStream.str();
+    std::filesystem::create_directories(filePath.parent_path());
+
+    std::ofstream file;
+    file.open(filePath);
+    if (!file.is_open())
+    {
+        std::cerr << "Failed to open output file: " << filePath.string() << "\n";
+        return 1;
+    }
+    file << (D == 1 ? "step\tmass\n" : "step\tmass\theight\n");
+
+    if (D == 1)
+        runGravityMassVsTime<1>(file, 1, N_SPECIES, STEPS_PER_LATTICEPOINT, periodic, gen);
+    else if (D == 2)
+        runGravityMassVsTime<2>(file, L, N_SPECIES, STEPS_PER_LATTICEPOINT, periodic, gen);
+    else if (D == 3)
+        runGravityMassVsTime<3>(file, L, N_SPECIES, STEPS_PER_LATTICEPOINT, periodic, gen);
+    else
+        runGravityMassVsTime<4>(file, L, N_SPECIES, STEPS_PER_LATTICEPOINT, periodic, gen);
+
+    file.close();
+
+    return 0;
+}
@@ -0,0 +1,253 @@
+#pragma once
+// The gravity Puyo pile in any dimension D (D-1 horizontal axes of side L and
+// one vertical axis of height H), for gravityMassVsTime{2,3,4}D in cpp/ (hard
+// walls) and periodicCpp/ (periodic horizontal axes), for the one-binary
+// comparison gravityMassVsTime.cpp, and (D = 2, periodic) for the
+// probabilityPuyoPuyo engines.
+//
+// The old engines stored the lattice as D nested vectors, allocated an equally
+// nested visited array on every annihilation pass, scanned all H*L^(D-1) sites
+// for moved ones, ran every column through fall() and compared two nested
+// moved arrays per cascade generation -- which is what held 4D at L = 8.  This
+// is the slopeDistFast layout (puyoRoughnessScaling/puyoEngine.h) for any D:
+//
+//   site z*C + col : flat storage, C = L^(D-1) columns in row-major order of
+//                    the coordinates as they are drawn (x, then y, then w)
+//   side[col]      : the 2(D-1) horizontal neighbour columns, precomputed for
+//                    either boundary (-1 past a hard wall)
+//   colH[col]      : column heights (columns are always compact) -> O(1)
+//                    placement, mass and height
+//   movedList      : sites that just landed or fell -> the BFS seeds
+//   visitedGen     : generation-stamped BFS, the component is the queue
+//   dirtyCols      : only columns something was eliminated from are compacted,
+//                    and only above their lowest hole
+//
+// Every same-species component of size > 1 that contains a moved site is
+// eliminated, then gravity, until nothing falls.  The old loop stopped when the
+// sites that fell equalled the previous moved set (eliminated sites included,
+// their flags were never cleared); in a column that lost a block the sites
+// that fall run contiguously from its lowest hole to its new, strictly lower,
+// top, while the previous moved sites there ran to the old top, so the two
+// sets can only agree when both are empty.  The old outputs are therefore
+// reproduced exactly from the same draws.  D = 1 is a single column, i.e. the
+// stack of gravityMassVsTime1D.cpp.  Species are bytes: the constructor
+// rejects more than 255.
+//
+//     GravityPile<3> pile(L, H, periodic, nSpecies);
+//     GravityPile<3>::Chain ch;
+//     pile.drop(col, species);              // or drop(col, species, ch): ch.clusters, ch.eliminated
+//     pile.mass(), pile.maxHeight(), pile.height(col)
+#include <algorithm>
+#include <cstdint>
+#include <iomanip>
+#include <iostream>
+#include <random>
+#include <stdexcept>
+#include <vector>
+
+template <int D>
+class GravityPile
+{
+    static_assert(D >= 1, "GravityPile: at least the vertical axis");
+
+public:
+    struct Chain
+    {
+        int clusters = 0;   // clusters eliminated, summed over the cascade
+        int eliminated = 0; // sites eliminated
+    };
+
+    static constexpr int SIDES = 2 * (D - 1);
+
+    int L, H, C;
+
+    GravityPile(int L_, int H_, bool periodic, int nSpecies)
+        : L(L_), H(H_), C(columns(L_)), lat(static_cast<size_t>(C) * H_, 0), visitedGen(static_cast<size_t>(C) * H_, 0),
+          colH(C, 0), colDirtyGen(C, 0), lowestElim(C, 0), side(static_cast<size_t>(C) * SIDES)
+    {
+        if (nSpecies > 255)
+            throw std::invalid_argument("GravityPile: at most 255 species");
+        for (int col = 0; col < C; ++col)
+        {
+            int k = col * SIDES, stride = 1;
+            // axes from the fastest (last drawn) to the slowest
+            for (int a = 0; a < D - 1; ++a, stride *= L)
+            {
+                int coord = (col / stride) % L;
+                for (int d : {-1, 1})
+                {
+                    int nc = coord + d;
+                    if (periodic)
+                        nc = (nc + L) % L;
+                    side[k++] = (nc < 0 || nc >= L) ? -1 : col + (nc - coord) * stride;
+                }
+            }
+        }
+    }
+
+    static int columns(int L)
+    {
+        int c = 1;
+        for (int a = 0; a < D - 1; ++a)
+            c *= L;
+        return c;
+    }
+
+    // one block onto column `col` and its cascade to rest; false if the column is full
+    bool drop(int col, int species)
+    {
+        Chain ch;
+        return drop(col, species, ch);
+    }
+
+    bool drop(int col, int species, Chain &ch)
+    {
+        ch = Chain{};
+        if (colH[col] >= H)
+            return false;
+        int pos = colH[col] * C + col;
+        lat[pos] = static_cast<uint8_t>(species);
+        ++colH[col];
+
+        movedList.clear();
+        movedList.push_back(pos);
+        while (true)
+        {
+            annihilate(ch);
+            fallDirty();
+            if (newMovedList.empty())
+                break;
+            movedList.swap(newMovedList);
+        }
+        return true;
+    }
+
+    long long mass() const
+    {
+        long long m = 0;
+        for (int h : colH)
+            m += h;
+        return m;
+    }
+
+    int maxHeight() const { return *std::max_element(colH.begin(), colH.end()); }
+
+    int height(int col) const { return colH[col]; }
+
+private:
+    std::vector<uint8_t> lat;
+    std::vector<int> visitedGen, colH, colDirtyGen, lowestElim, side;
+    std::vector<int> movedList, newMovedList, dirtyCols, component;
+    int stamp = 0;
+
+    void visit(int nb, uint8_t species, int g)
+    {
+        if (lat[nb] == species && visitedGen[nb] != g)
+        {
+            visitedGen[nb] = g;
+            component.push_back(nb);
+        }
+    }
+
+    void annihilate(Chain &ch)
+    {
+        int g = ++stamp;
+        dirtyCols.clear();
+        for (int seed : movedList)
+        {
+            if (lat[seed] == 0 || visitedGen[seed] == g)
+                continue;
+            uint8_t species = lat[seed];
+            component.clear();
+            component.push_back(seed);
+            visitedGen[seed] = g;
+            for (size_t head = 0; head < component.size(); ++head)
+            {
+                int cur = component[head];
+                int z = cur / C, col = cur - z * C, base = z * C;
+                if (z > 0)
+                    visit(cur - C, species, g);
+                if (z + 1 < H)
+                    visit(cur + C, species, g);
+                for (int k = col * SIDES; k < (col + 1) * SIDES; ++k)
+                    if (side[k] >= 0)
+                        visit(base + side[k], species, g);
+            }
+            if (component.size() > 1)
+            {
+                for (int id : component)
+                {
+                    lat[id] = 0;
+                    int z = id / C, col = id - z * C;
+                    if (colDirtyGen[col] != g)
+                    {
+                        colDirtyGen[col] = g;
+                        lowestElim[col] = z;
+                        dirtyCols.push_back(col);
+                    }
+                    else if (z < lowestElim[col])
+                        lowestElim[col] = z;
+                }
+                ++ch.clusters;
+                ch.eliminated += static_cast<int>(component.size());
+            }
+        }
+    }
+
+    // compact each dirty column above its lowest hole; blocks below are inert
+    void fallDirty()
+    {
+        newMovedList.clear();
+        for (int c : dirtyCols)
+        {
+            int write = lowestElim[c];
+            for (int z = write + 1; z < colH[c]; ++z)
+            {
+                int id = z * C + c;
+                if (lat[id] != 0)
+                {
+                    int dst = write * C + c;
+                    lat[dst] = lat[id];
+                    lat[id] = 0;
+                    newMovedList.push_back(dst);
+                    ++write;
+                }
+            }
+            colH[c] = write;
+        }
+    }
+};
+
+// One mass-vs-time run of gravityMassVsTime{D}D: each step drops L^(D-1)
+// blocks, each drawing its column coordinates (x, y, w) and then its species,
+// and writes "step mass height"; D = 1 drops one block per step and writes
+// "step mass", as gravityMassVsTime1D did.
+template <int D, class URBG>
+void runGravityMassVsTime(std::ostream &file, int L, int N_SPECIES, int STEPS, bool periodic, URBG &gen)
+{
+    std::uniform_int_distribution<> dis_species(1, N_SPECIES);
+    std::uniform_int_distribution<> dis_l(0, L - 1);
+
+    int H = STEPS; // Height of the lattice
+    GravityPile<D> pile(D == 1 ? 1 : L, H, periodic, N_SPECIES);
+    int lastStep = D == 1 ? STEPS - 1 : STEPS;
+
+    for (int step = 0; step <= lastStep; ++step)
+    {
+        for (int i = 0; i < pile.C; ++i)
+        {
+            int col = 0;
+            for (int a = 0; a < D - 1; ++a)
+                col = col * L + dis_l(gen);
+            pile.drop(col, dis_species(gen));
+        }
+
+        if (D == 1)
+            file << step << "\t" << pile.mass() << "\n";
+        else
+            file << step << "\t" << pile.mass() << "\t" << pile.maxHeight() << "\n";
+
+        std::cout << "Progress: " << std::fixed << std::setprecision(2)
+                  << static_cast<double>(step) / STEPS * 100 << "%\r" << std::flush;
+    }
+}
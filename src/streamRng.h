@@ -0,0 +1,159 @@
+#pragma once
+
+// Keyed, counter-based random streams for the lattice engines.
+//
+// The engines used to seed a global std::mt19937 from std::random_device, so a
+// run could not be repeated, two runs of the same point could silently be
+// the same or different, and nothing could say which cached output came from
+// which draws.  StreamRng replaces that generator (it is a drop-in uniform
+// random bit generator: every std:: distribution and std::shuffle take it):
+//
+//   * it is Philox4x32-10 (Salmon et al., "Parallel random numbers: as easy
+//     as 1, 2, 3", SC'11): draw i of a stream is a pure function of
+//     (seed, stream, i), four 32-bit words per 128-bit counter block;
+//   * seed is the 64-bit key, stream the upper 64 bits of the counter, the
+//     lower 64 bits count blocks -- so streams never overlap, whatever the
+//     seed, and there is no seeding step to get wrong;
+//   * discard(n) and seek(pos) are O(1) and position() says how far a stream
+//     has been read, so a logical simulation can be stopped and resumed (or
+//     split at known positions) without replaying its draws.
+//
+// Every engine takes `--seed S` (default 0) and `--stream K` anywhere on its
+// command line, next to its old positional arguments; takeRngArgs() strips
+// them so the positional parsing is unchanged.  The default stream is the
+// engine's SIM_NO; an engine without one gets a hash of its positional
+// arguments (0 when there are none), so the points of a raster or N scan draw
+// independently, as they did from random_device, and rerunning a point
+// repeats it.  (seed, stream) plus the parameters in the file name
+// then identify an output exactly: keySuffix() adds "_seed_S" to the name
+// when S != 0 (and "_stream_K" where the stream is not already the sim
+// number), so default runs keep their old file names.
+
+#include <cstdint>
+#include <cstring>
+#include <string>
+#include <iostream>
+#include <limits>
+
+class StreamRng
+{
+public:
+    using result_type = uint32_t;
+    static constexpr result_type min() { return 0; }
+    static constexpr result_type max() { return std::numeric_limits<uint32_t>::max(); }
+
+    explicit StreamRng(uint64_t seed = 0, uint64_t stream = 0)
+        : k0(uint32_t(seed)), k1(uint32_t(seed >> 32)), s0(uint32_t(stream)), s1(uint32_t(stream >> 32)) {}
+
+    result_type operator()()
+    {
+        if (used == 4)
+            refill();
+        return block[used++];
+    }
+
+    // position (in draws) from the start of the stream
+    uint64_t position() const { return next * 4 - (4 - used); }
+
+    void seek(uint64_t pos)
+    {
+        next = pos / 4;
+        used = 4;
+        if (pos % 4)
+        {
+            refill();
+            used = pos % 4;
+        }
+    }
+
+    void discard(uint64_t n) { seek(position() + n); }
+
+private:
+    uint32_t k0, k1, s0, s1;
+    uint64_t next = 0; // counter of the next block
+    uint32_t block[4];
+    unsigned used = 4; // words of `block` handed out
+
+    static void mulhilo(uint32_t a, uint32_t b, uint32_t &hi, uint32_t &lo)
+    {
+        uint64_t p = uint64_t(a) * b;
+        hi = uint32_t(p >> 32);
+        lo = uint32_t(p);
+    }
+
+    void refill()
+    {
+        uint32_t c0 = uint32_t(next), c1 = uint32_t(next >> 32), c2 = s0, c3 = s1;
+        uint32_t a = k0, b = k1;
+        for (int r = 0; r < 10; ++r)
+        {
+            uint32_t hi0, lo0, hi1, lo1;
+            mulhilo(0xD2511F53u, c0, hi0, lo0);
+            mulhilo(0xCD9E8D57u, c2, hi1, lo1);
+            c0 = hi1 ^ c1 ^ a;
+            c1 = lo1;
+            c2 = hi0 ^ c3 ^ b;
+            c3 = lo0;
+            a += 0x9E3779B9u;
+            b += 0xBB67AE85u;
+        }
+        block[0] = c0, block[1] = c1, block[2] = c2, block[3] = c3;
+        ++next;
+        used = 0;
+    }
+};
+
+struct RngArgs
+{
+    uint64_t seed = 0;
+    uint64_t stream = 0;
+    bool streamGiven = false;
+    uint64_t argsStream = 0; // hash of the positional arguments
+
+    // the generator for this run; `defaultStream` (the sim number) unless --stream was given
+    StreamRng rng(uint64_t defaultStream) const { return StreamRng(seed, streamGiven ? stream : defaultStream); }
+
+    // for engines without a sim number: the stream defaults to the parameter point
+    StreamRng rng() const { return rng(argsStream); }
+
+    // file-name tag for a non-default key; `streamInName` when the name already carries the sim number
+    std::string keySuffix(bool streamInName = true) const
+    {
+        std::string s;
+        if (seed != 0)
+            s += "_seed_" + std::to_string(seed);
+        if (!streamInName && streamGiven && stream != 0)
+            s += "_stream_" + std::to_string(stream);
+        return s;
+    }
+};
+
+// removes "--seed S" and "--stream K" from argv (argc shrinks accordingly) and
+// hashes what is left, program name excluded (FNV-1a over the NUL-separated
+// arguments; the text, so "6" and "6.0" are different points)
+inline RngArgs takeRngArgs(int &argc, char *argv[])
+{
+    RngArgs a;
+    int out = 1;
+    uint64_t h = 0xcbf29ce484222325ull;
+    for (int i = 1; i < argc; ++i)
+    {
+        if (i + 1 < argc && std::strcmp(argv[i], "--seed") == 0)
+            a.seed = std::stoull(argv[++i]);
+        else if (i + 1 < argc && std::strcmp(argv[i], "--stream") == 0)
+            a.stream = std::stoull(argv[++i]), a.streamGiven = true;
+        else
+        {
+            for (const char *c = argv[i];; ++c)
+            {
+                h = (h ^ static_cast<unsigned char>(*c)) * 0x100000001b3ull;
+                if (*c == 0)
+                    break;
+            }
+            argv[out++] = argv[i];
+        }
+    }
+    a.argsStream = out > 1 ? h : 0;
+    argc = out;
+    return a;
+}